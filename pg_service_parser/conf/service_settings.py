@@ -1,11 +1,13 @@
-from qgis.PyQt.QtCore import QCoreApplication
+from types import MappingProxyType
+
+from qgis.PyQt.QtCore import QCoreApplication, QLocale
 
 from pg_service_parser.conf.enums import SslModeEnum, WidgetTypeEnum
 
 
 # Settings available for manual addition
 # See https://www.postgresql.org/docs/current/libpq-connect.html#LIBPQ-PARAMKEYWORDS
-def SERVICE_SETTINGS():
+def _build_service_settings():
     return {
         "host": {
             "default": "localhost",
@@ -54,7 +56,7 @@ def SERVICE_SETTINGS():
                 "This option determines whether or with what priority a secure SSL TCP/IP connection will be negotiated with the server.",
             ),
             "custom_type": WidgetTypeEnum.COMBOBOX,
-            "config": {"values": [e.value for e in SslModeEnum]},
+            "config": {"values": tuple(e.value for e in SslModeEnum)},
         },
         "sslrootcert": {
             "default": "",
@@ -103,6 +105,52 @@ def SERVICE_SETTINGS():
     }
 
 
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+class ServiceSettingsCatalog:
+    """Read-only settings catalog, with lookup tables precomputed."""
+
+    def __init__(self, settings: dict):
+        self.settings = _freeze(settings)
+        self.keys = tuple(settings)
+        self.defaults = MappingProxyType({key: data["default"] for key, data in settings.items()})
+        self.key_set = frozenset(self.keys)
+
+    def has_addable_settings(self, used_keys) -> bool:
+        """Whether some catalog settings are not used yet, and so can be added to a service."""
+        return not self.key_set.issubset(used_keys)
+
+
+_catalog = None
+_catalog_key = None
+
+
+def service_settings_catalog() -> ServiceSettingsCatalog:
+    """
+    Shared settings catalog, only rebuilt when the locale or the
+    installed translation changes.
+    """
+    global _catalog, _catalog_key
+    # A single translated string tells whether translations changed
+    key = (QLocale().name(), QCoreApplication.translate("Plugin", "The database name."))
+    if _catalog is None or key != _catalog_key:
+        _catalog = ServiceSettingsCatalog(_build_service_settings())
+        _catalog_key = key
+
+    return _catalog
+
+
+def SERVICE_SETTINGS():
+    """Read-only dict of the settings, see service_settings_catalog()."""
+    return service_settings_catalog().settings
+
+
 # Settings to initialize new files
 SETTINGS_TEMPLATE = {
     "host": "localhost",
@@ -0,0 +1,65 @@
+import os
+import shutil
+import stat
+import tempfile
+from pathlib import Path
+
+
+def ensure_writable(path: Path):
+    """
+    Like pgserviceparser, try to add write permissions to a read-only file.
+    Needed since the atomic replace would otherwise ignore them.
+
+    :raises PermissionError: when the file permissions cannot be changed
+    """
+    if os.access(path, os.W_OK):
+        return
+
+    current_permission = stat.S_IMODE(path.stat().st_mode)
+    path.chmod(current_permission | stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH)
+
+
+def write_atomically(path: Path, *chunks: bytes) -> None:
+    """
+    Write a file through a temporary file in the same folder, renamed
+    over the target once complete. Readers (and network shares) never see
+    a partially written file, and the original is left untouched on error.
+
+    Symbolic links are followed, the file they point to being replaced.
+    Permissions are kept, and so are the owner and group where permitted:
+    only the owner of the file or root may keep them for a file written by
+    another user, otherwise the written file belongs to the current user.
+
+    :param chunks: file content, written one after the other
+    """
+    path = Path(path).resolve()
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as tmp_file:
+            for chunk in chunks:
+                tmp_file.write(chunk)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+
+        if path.exists():
+            shutil.copymode(path, tmp_path)
+            _copy_owner(path, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _copy_owner(source: Path, target: str) -> None:
+    if not hasattr(os, "chown"):
+        return  # Windows
+
+    stat_result = source.stat()
+    try:
+        os.chown(target, stat_result.st_uid, stat_result.st_gid)
+    except PermissionError:
+        try:
+            os.chown(target, -1, stat_result.st_gid)  # Users may set groups they belong to
+        except PermissionError:
+            pass
@@ -0,0 +1,85 @@
+from qgis.PyQt.QtCore import QAbstractTableModel, QModelIndex, Qt
+from qgis.PyQt.QtGui import QColorConstants, QFont
+
+from pg_service_parser.core.bulk_edit import BulkChange
+from pg_service_parser.core.setting_index import UNINDEXED_KEYS
+
+
+class BulkChangesModel(QAbstractTableModel):
+    """Preview of the setting changes of a bulk edit."""
+
+    SERVICE_COL = 0
+    KEY_COL = 1
+    OLD_VALUE_COL = 2
+    NEW_VALUE_COL = 3
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.__changes = []
+
+        self.__service_font = QFont()
+        self.__service_font.setBold(True)
+        self.__missing_font = QFont()
+        self.__missing_font.setItalic(True)
+
+    def set_changes(self, changes: list[BulkChange]):
+        self.beginResetModel()
+        self.__changes = changes
+        self.endResetModel()
+
+    def changes(self) -> list[BulkChange]:
+        return list(self.__changes)
+
+    def service_names(self) -> list[str]:
+        return list(dict.fromkeys(change.service_name for change in self.__changes))
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self.__changes)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 4
+
+    def __value_text(self, change: BulkChange, value: str | None) -> str:
+        if value is None:
+            return self.tr("(none)")
+        if change.key in UNINDEXED_KEYS:
+            return "************"
+        return value
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        change = self.__changes[index.row()]
+        column = index.column()
+        value = change.old_value if column == self.OLD_VALUE_COL else change.new_value
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.ToolTipRole):
+            if column == self.SERVICE_COL:
+                return change.service_name
+            elif column == self.KEY_COL:
+                return change.key
+            else:
+                return self.__value_text(change, value)
+        elif role == Qt.ItemDataRole.FontRole:
+            if column == self.SERVICE_COL:
+                return self.__service_font
+            elif column in (self.OLD_VALUE_COL, self.NEW_VALUE_COL) and value is None:
+                return self.__missing_font
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.NEW_VALUE_COL and value is None:
+                return QColorConstants.Red
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            if section == self.SERVICE_COL:
+                return self.tr("Service")
+            elif section == self.KEY_COL:
+                return self.tr("Setting")
+            elif section == self.OLD_VALUE_COL:
+                return self.tr("Current value")
+            elif section == self.NEW_VALUE_COL:
+                return self.tr("New value")
+
+        return super().headerData(section, orientation, role)
@@ -0,0 +1,160 @@
+"""
+Bulk edit of setting values across services, e.g., when a database host
+moves. Services are selected by name pattern and setting values, edits
+are previewed, then the previewed changes are written with a single
+parse and a single write:
+
+    edit = BulkEdit.from_query("host=db-prod-03")
+    edit.set("host", "db-prod-04")
+    changes = edit.preview()
+    for change in changes:
+        print(change)
+    edit.commit(changes)
+"""
+
+import fnmatch
+from pathlib import Path
+
+from pg_service_parser.core.service_cache import snapshot
+from pg_service_parser.core.service_transaction import ServiceTransaction
+from pg_service_parser.core.setting_index import parse_query, value_matches
+
+
+class BulkChange:
+    """A setting of a service changed by a bulk edit, None values meaning missing."""
+
+    __slots__ = ("service_name", "key", "old_value", "new_value")
+
+    def __init__(self, service_name: str, key: str, old_value: str | None, new_value: str | None):
+        self.service_name = service_name
+        self.key = key
+        self.old_value = old_value
+        self.new_value = new_value
+
+    def __repr__(self):
+        return "BulkChange({!r}, {!r}, {!r}, {!r})".format(
+            self.service_name, self.key, self.old_value, self.new_value
+        )
+
+
+class BulkEdit:
+    """Edits of setting values, applied to all services matching a predicate."""
+
+    SET = "set"
+    REPLACE = "replace"
+    REMOVE = "remove"
+
+    def __init__(self, name_pattern: str = "", terms: list[tuple[str, str]] = ()):
+        """
+        :param name_pattern: service name wildcard pattern, or text contained in the
+                             service names if without wildcards, all services if empty
+        :param terms: (key, pattern) setting terms the services must all match
+        """
+        self.name_pattern = name_pattern.strip().lower()
+        if self.name_pattern and not any(char in self.name_pattern for char in "*?["):
+            self.name_pattern = "*{}*".format(self.name_pattern)
+        self.terms = list(terms)
+        self.__operations = []
+
+    @classmethod
+    def from_query(cls, text: str) -> "BulkEdit":
+        """Select services like the service list search, e.g., "prod-* host=db-prod-03"."""
+        name_text, terms = parse_query(text)
+        return cls(name_text, terms)
+
+    def __len__(self):
+        return len(self.__operations)
+
+    def set(self, key: str, value: str):
+        """Set a setting value, added to the services not having it yet."""
+        self.__operations.append((self.SET, key.lower(), value))
+
+    def replace(self, key: str, old: str, new: str):
+        """Replace a text in a setting value, for the services having it."""
+        self.__operations.append((self.REPLACE, key.lower(), old, new))
+
+    def remove(self, key: str):
+        self.__operations.append((self.REMOVE, key.lower()))
+
+    def selects(self, service_name: str, settings: dict[str, str]) -> bool:
+        if self.name_pattern and not fnmatch.fnmatchcase(service_name.lower(), self.name_pattern):
+            return False
+
+        for key, pattern in self.terms:
+            value = settings.get(key.lower())
+            if value is None or not value_matches(value, pattern):
+                return False
+        return True
+
+    def edited(self, settings: dict[str, str]) -> dict[str, str]:
+        """:return: the settings once edited, in their original order"""
+        settings = dict(settings)
+        for operation, key, *args in self.__operations:
+            if operation == self.SET:
+                settings[key] = args[0]
+            elif operation == self.REPLACE:
+                old, new = args
+                if key in settings and old:
+                    settings[key] = settings[key].replace(old, new)
+            elif operation == self.REMOVE:
+                settings.pop(key, None)
+
+        return settings
+
+    def changes(
+        self, configs: dict[str, dict[str, str]], defaults: dict[str, str] | None = None
+    ) -> list[BulkChange]:
+        """
+        Changes to make to the given services settings, service by service.
+
+        :param defaults: [DEFAULT] settings, included in the service settings: they
+                         cannot be removed from a single service
+        """
+        defaults = defaults or {}
+        changes = []
+        for service_name, settings in configs.items():
+            if not self.selects(service_name, settings):
+                continue
+
+            edited = self.edited(settings)
+            for key in dict.fromkeys(list(settings) + list(edited)):
+                old_value, new_value = settings.get(key), edited.get(key)
+                if old_value == new_value:
+                    continue
+                if new_value is None and defaults.get(key) == old_value:
+                    continue  # Inherited from [DEFAULT], or still once removed
+                changes.append(BulkChange(service_name, key, old_value, new_value))
+
+        return changes
+
+    def preview(self, conf_file_path: Path | None = None) -> list[BulkChange]:
+        """
+        Changes to make to the service file, from its cached snapshot.
+
+        :raises ServiceFileNotFound: when the service file is not found
+        """
+        current = snapshot(conf_file_path)
+        return self.changes(current.configs, current.index.defaults())
+
+    @staticmethod
+    def commit(changes: list[BulkChange], conf_file_path: Path | None = None) -> None:
+        """
+        Write previewed changes at once, only if the changed settings
+        still have their previewed values.
+
+        :raises ServiceFileNotFound: when the service file is not found
+        :raises ServiceNotFound: when a changed service was removed meanwhile
+        :raises ServiceChangedError: when a changed setting was edited meanwhile
+        :raises PermissionError: when the service file is read-only
+        """
+        by_service = {}
+        for change in changes:
+            by_service.setdefault(change.service_name, []).append(change)
+
+        with ServiceTransaction(conf_file_path) as transaction:
+            for service_name, service_changes in by_service.items():
+                transaction.edit(
+                    service_name,
+                    {change.key: change.new_value for change in service_changes},
+                    expected={change.key: change.old_value for change in service_changes},
+                )
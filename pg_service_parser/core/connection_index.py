@@ -0,0 +1,147 @@
+from qgis.core import (
+    QgsDataSourceUri,
+    QgsProviderConnectionException,
+    QgsProviderRegistry,
+)
+from qgis.PyQt.QtCore import QObject, pyqtSlot
+
+
+def uri_fingerprint(uri: QgsDataSourceUri) -> tuple:
+    """
+    Normalized connection parameters used to tell whether
+    two data source URIs point to the same connection.
+    """
+    return (
+        uri.service(),
+        uri.host(),
+        uri.port(),
+        uri.database(),
+        uri.username(),
+        uri.password(),
+        QgsDataSourceUri.encodeSslMode(uri.sslMode()),
+    )
+
+
+class ConnectionIndex(QObject):
+    """
+    Hash indexes of the stored QGIS PG connections by connection fingerprint
+    and by service name.
+
+    Kept up to date from the provider metadata connection signals, so that
+    lookups never have to go through every stored connection.
+    """
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self.__connections = {}  # Connection name -> fingerprint
+        self.__fingerprints = {}  # Fingerprint -> set of connection names
+        self.__services = {}  # Service name -> set of connection names
+        self.__dirty = True
+        self.revision = 0  # Incremented on every index change
+
+        provider = QgsProviderRegistry.instance().providerMetadata("postgres")
+        provider.connectionCreated.connect(self.__connection_changed)
+        provider.connectionChanged.connect(self.__connection_changed)
+        provider.connectionDeleted.connect(self.__connection_deleted)
+
+    def invalidate(self):
+        """Force a full rebuild on next lookup."""
+        self.__dirty = True
+        self.revision += 1
+
+    def __ensure_built(self):
+        if not self.__dirty:
+            return
+
+        self.__connections.clear()
+        self.__fingerprints.clear()
+        self.__services.clear()
+        provider = QgsProviderRegistry.instance().providerMetadata("postgres")
+        for name, conn in provider.connections().items():
+            self.__add(name, uri_fingerprint(QgsDataSourceUri(conn.uri())))
+
+        self.__dirty = False
+
+    def __add(self, name: str, fingerprint: tuple):
+        self.__connections[name] = fingerprint
+        self.__fingerprints.setdefault(fingerprint, set()).add(name)
+        self.__services.setdefault(fingerprint[0], set()).add(name)
+
+    def __remove(self, name: str):
+        fingerprint = self.__connections.pop(name, None)
+        if fingerprint is None:
+            return
+
+        for index, key in ((self.__fingerprints, fingerprint), (self.__services, fingerprint[0])):
+            names = index[key]
+            names.discard(name)
+            if not names:
+                del index[key]
+
+    @pyqtSlot(str)
+    def __connection_changed(self, name: str):
+        if self.__dirty:
+            return  # Will be read on the next rebuild anyway
+
+        self.__remove(name)
+        provider = QgsProviderRegistry.instance().providerMetadata("postgres")
+        try:
+            conn = provider.findConnection(name)
+        except QgsProviderConnectionException:
+            conn = None
+
+        if conn is not None:
+            self.__add(name, uri_fingerprint(QgsDataSourceUri(conn.uri())))
+        self.revision += 1
+
+    @pyqtSlot(str)
+    def __connection_deleted(self, name: str):
+        if not self.__dirty:
+            self.__remove(name)
+        self.revision += 1
+
+    def connections_for_uri(self, uri: QgsDataSourceUri) -> set[str]:
+        """Names of the stored connections matching the given URI."""
+        self.__ensure_built()
+        return set(self.__fingerprints.get(uri_fingerprint(uri), ()))
+
+    def has_connection_for_uri(self, uri: QgsDataSourceUri) -> bool:
+        self.__ensure_built()
+        return uri_fingerprint(uri) in self.__fingerprints
+
+    def connection_names(self, service: str) -> list[str]:
+        """
+        Names of the stored connections using the given service.
+        An empty service gives all connections, grouped by service.
+        """
+        self.__ensure_built()
+        if service == "":
+            return [
+                name
+                for _service in sorted(self.__services, key=str.lower)
+                for name in sorted(self.__services[_service], key=str.lower)
+            ]
+
+        return sorted(self.__services.get(service, ()), key=str.lower)
+
+    def connection_count(self, service: str) -> int:
+        self.__ensure_built()
+        return len(self.__services.get(service, ()))
+
+    def connection_service(self, connection_name: str) -> str | None:
+        """Service used by the given connection, None if the connection is unknown."""
+        self.__ensure_built()
+        fingerprint = self.__connections.get(connection_name)
+        return fingerprint[0] if fingerprint is not None else None
+
+
+_connection_index = None
+
+
+def connection_index() -> ConnectionIndex:
+    """Shared connection index, created on first use."""
+    global _connection_index
+    if _connection_index is None:
+        _connection_index = ConnectionIndex()
+
+    return _connection_index
@@ -1,7 +1,39 @@
+import hashlib
+import os
+
 from qgis.core import QgsAbstractDatabaseProviderConnection, QgsDataSourceUri
 from qgis.PyQt.QtCore import QAbstractTableModel, QModelIndex, Qt
 from qgis.PyQt.QtGui import QFont
 
+_CLEAN_URI_CACHE_SIZE = 4096
+# Redacted URIs by keyed digest of the raw URI, so that raw URIs (and
+# their passwords) are never kept in memory. The key is random per session.
+_clean_uris: dict[bytes, str] = {}
+_digest_key = os.urandom(16)
+
+
+def _clean_uri(uri_string: str) -> str:
+    """
+    Clean a datasource URI by removing password.
+
+    Cached, so that a connection is only redacted again once its URI changes.
+    """
+    digest = hashlib.blake2b(uri_string.encode(), key=_digest_key, digest_size=16).digest()
+    cleaned_uri = _clean_uris.get(digest)
+    if cleaned_uri is not None:
+        return cleaned_uri
+
+    cleaned_uri = QgsDataSourceUri.removePassword(uri_string, True)
+    # Awkward, but we must also manually remove the password.
+    # In some cases, the method does not work
+    uri = QgsDataSourceUri(uri_string)
+    cleaned_uri = cleaned_uri.replace(f"password='{uri.password()}'", "password='XXXXXXX'")
+
+    if len(_clean_uris) >= _CLEAN_URI_CACHE_SIZE:
+        _clean_uris.clear()
+    _clean_uris[digest] = cleaned_uri
+    return cleaned_uri
+
 
 class ServiceConnectionModel(QAbstractTableModel):
     KEY_COL = 0
@@ -13,50 +45,48 @@ class ServiceConnectionModel(QAbstractTableModel):
         super().__init__()
         self.__service_name = service_name
         self.__model_data = connections
+        # Row order and redacted URIs, computed once so that painting is a lookup
+        self.__keys = list(connections.keys())
+        self.__clean_uris = [_clean_uri(conn.uri()) for conn in connections.values()]
+
+        self.__key_font = QFont()
+        self.__key_font.setBold(True)
+        self.__value_font = QFont()
+        self.__value_font.setItalic(True)
 
     def rowCount(self, parent=QModelIndex()):
-        return len(self.__model_data)
+        return len(self.__keys)
 
     def columnCount(self, parent=QModelIndex()):
         return 2
 
     def index_to_connection_key(self, index):
-        return list(self.__model_data.keys())[index.row()]
+        return self.__keys[index.row()]
 
     def clean_uri(self, uri_string: str) -> str:
         """
         Clean a datasource URI by removing password
         """
-        cleaned_uri = QgsDataSourceUri.removePassword(uri_string, True)
-        # Awkward, but we must also manually remove the password.
-        # In some cases, the method does not work
-        uri = QgsDataSourceUri(uri_string)
-        cleaned_uri = cleaned_uri.replace(f"password='{uri.password()}'", "password='XXXXXXX'")
-
-        return cleaned_uri
+        return _clean_uri(uri_string)
 
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid():
             return None
 
-        key = list(self.__model_data.keys())[index.row()]
+        row = index.row()
         if role == Qt.ItemDataRole.DisplayRole:
             if index.column() == self.KEY_COL:
-                return key
+                return self.__keys[row]
             elif index.column() == self.VALUE_COL:
-                return self.clean_uri(self.__model_data[key].uri())
+                return self.__clean_uris[row]
         elif role == Qt.ItemDataRole.FontRole:
             if index.column() == self.KEY_COL:
-                font = QFont()
-                font.setBold(True)
-                return font
+                return self.__key_font
             elif index.column() == self.VALUE_COL:
-                font = QFont()
-                font.setItalic(True)
-                return font
+                return self.__value_font
         elif role == Qt.ItemDataRole.ToolTipRole:
             if index.column() == self.VALUE_COL:
-                return self.clean_uri(self.__model_data[key].uri())
+                return self.__clean_uris[row]
 
         return None
 
@@ -1,3 +1,5 @@
+import json
+
 from qgis.PyQt.QtCore import QAbstractTableModel, QModelIndex, QObject, Qt
 from qgis.PyQt.QtGui import QColorConstants, QFont
 
@@ -5,6 +7,8 @@ from pg_service_parser.core.plugin_settings import PluginSettings
 
 
 class Shortcut:
+    __slots__ = ("name", "service_from", "service_to")
+
     def __init__(self, service_from: str, service_to: str, name: str = None):
         if name:
             self.name = name
@@ -13,79 +17,151 @@ class Shortcut:
         self.service_from = service_from
         self.service_to = service_to
 
-    def save(self):
-        PluginSettings().shortcut_from.setValue(self.service_from, self.name)
-        PluginSettings().shortcut_to.setValue(self.service_to, self.name)
-
-    def rename(self, name: str):
-        PluginSettings().shortcuts_node.deleteItem(self.name)
-        self.name = name
-        self.save()
 
-    def delete(self):
-        PluginSettings().shortcuts_node.deleteItem(self.name)
+def load_shortcuts() -> list[Shortcut]:
+    """Read all shortcuts at once from the plugin settings."""
+    value = PluginSettings().shortcut_list.value()
+    if value:
+        try:
+            return [
+                Shortcut(service_from, service_to, name)
+                for name, service_from, service_to in json.loads(value)
+            ]
+        except (ValueError, TypeError):
+            pass
+
+    # Shortcuts stored one settings group each by former plugin versions
+    shortcuts = []
+    for name in PluginSettings().shortcuts_node.items():
+        sh_from = PluginSettings().shortcut_from.value(name)
+        sh_to = PluginSettings().shortcut_to.value(name)
+        shortcuts.append(Shortcut(sh_from, sh_to, name))
+    return shortcuts
+
+
+def save_shortcuts(shortcuts: list[Shortcut]):
+    """Write all shortcuts at once, skipping the ones not filled yet."""
+    data = [
+        [shortcut.name, shortcut.service_from, shortcut.service_to]
+        for shortcut in shortcuts
+        if shortcut.service_from or shortcut.service_to
+    ]
+    PluginSettings().shortcut_list.setValue(json.dumps(data))
 
 
 class ShortcutsModel(QAbstractTableModel):
-    def __init__(self, parent: QObject = None, service_names_func=None):
+    def __init__(self, parent: QObject = None, service_exists_func=None):
         super().__init__(parent)
-        self.shortcuts = []
-        self.__service_names_func = service_names_func
-
-        for shortcut in PluginSettings().shortcuts_node.items():
-            sh_from = PluginSettings().shortcut_from.value(shortcut)
-            sh_to = PluginSettings().shortcut_to.value(shortcut)
-            self.shortcuts.append(Shortcut(sh_from, sh_to, shortcut))
+        self.shortcuts = load_shortcuts()
+        self.__service_exists_func = service_exists_func
+
+        self.__by_name = {}  # Name -> shortcut
+        self.__rows = {}  # Name -> row
+        self.__by_service = {}  # Service -> names of the shortcuts using it
+        self.__build_indexes()
+
+    def __build_indexes(self):
+        self.__by_name = {shortcut.name: shortcut for shortcut in self.shortcuts}
+        self.__rows = {shortcut.name: row for row, shortcut in enumerate(self.shortcuts)}
+        self.__by_service = {}
+        for shortcut in self.shortcuts:
+            self.__index_services(shortcut)
+
+    def __index_services(self, shortcut: Shortcut):
+        for service in (shortcut.service_from, shortcut.service_to):
+            self.__by_service.setdefault(service, set()).add(shortcut.name)
+
+    def __unindex_services(self, shortcut: Shortcut):
+        for service in (shortcut.service_from, shortcut.service_to):
+            names = self.__by_service.get(service)
+            if names is not None:
+                names.discard(shortcut.name)
+                if not names:
+                    del self.__by_service[service]
+
+    def __set_shortcut(self, shortcut: Shortcut, service_from: str, service_to: str, name: str):
+        """Change a shortcut, keeping the indexes up-to-date."""
+        row = self.__rows.pop(shortcut.name)
+        del self.__by_name[shortcut.name]
+        self.__unindex_services(shortcut)
+
+        shortcut.service_from = service_from
+        shortcut.service_to = service_to
+        shortcut.name = name
+
+        self.__rows[name] = row
+        self.__by_name[name] = shortcut
+        self.__index_services(shortcut)
+        return row
 
-    def add_shortcut(self, service_from: str, service_to: str):
-        existing_names = [sh.name for sh in self.shortcuts]
-        base_name = f"{service_from} -> {service_to}"
+    def __unique_name(self, base_name: str, shortcut: Shortcut = None) -> str:
         name = base_name
         i = 2
-        while name in existing_names:
+        while name in self.__by_name and self.__by_name[name] is not shortcut:
             name = f"{base_name} ({i})"
             i += 1
+        return name
+
+    def shortcut(self, name: str) -> Shortcut | None:
+        return self.__by_name.get(name)
 
-        shortcut = Shortcut(service_from, service_to, name)
-        shortcut.save()
+    def shortcuts_using(self, service: str) -> list[Shortcut]:
+        return [self.__by_name[name] for name in self.__by_service.get(service, ())]
+
+    def add_shortcut(self, service_from: str, service_to: str):
+        shortcut = Shortcut(
+            service_from, service_to, self.__unique_name(f"{service_from} -> {service_to}")
+        )
         row = self.rowCount()
         self.beginInsertRows(QModelIndex(), row, row)
         self.shortcuts.append(shortcut)
+        self.__by_name[shortcut.name] = shortcut
+        self.__rows[shortcut.name] = row
+        self.__index_services(shortcut)
         self.endInsertRows()
+        save_shortcuts(self.shortcuts)
         self.dataChanged.emit(self.index(row, 0), self.index(row, 0))
 
     def add_empty_shortcut(self):
         """Add a new empty shortcut row to be filled by the user."""
         row = self.rowCount()
         self.beginInsertRows(QModelIndex(), row, row)
-        shortcut = Shortcut("", "", f"new shortcut {row + 1}")
+        shortcut = Shortcut("", "", self.__unique_name(f"new shortcut {row + 1}"))
         self.shortcuts.append(shortcut)
+        self.__by_name[shortcut.name] = shortcut
+        self.__rows[shortcut.name] = row
+        self.__index_services(shortcut)
         self.endInsertRows()
         return row
 
     def rename_service(self, old_name: str, new_name: str):
         """Update all shortcuts that reference old_name to use new_name."""
-        for row, shortcut in enumerate(self.shortcuts):
-            changed = False
-            if shortcut.service_from == old_name:
-                shortcut.service_from = new_name
-                changed = True
-            if shortcut.service_to == old_name:
-                shortcut.service_to = new_name
-                changed = True
-            if changed:
-                shortcut.rename(f"{shortcut.service_from} -> {shortcut.service_to}")
-                shortcut.save()
-                self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+        shortcuts = self.shortcuts_using(old_name)
+        if not old_name or not shortcuts:
+            return
+
+        for shortcut in shortcuts:
+            service_from = new_name if shortcut.service_from == old_name else shortcut.service_from
+            service_to = new_name if shortcut.service_to == old_name else shortcut.service_to
+            row = self.__set_shortcut(
+                shortcut,
+                service_from,
+                service_to,
+                self.__unique_name(f"{service_from} -> {service_to}", shortcut),
+            )
+            self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+
+        save_shortcuts(self.shortcuts)
 
     def remove_shortcut(self, index: QModelIndex):
         if not index.isValid():
             return
 
         self.beginRemoveRows(QModelIndex(), index.row(), index.row())
-        self.shortcuts[index.row()].delete()
         del self.shortcuts[index.row()]
+        self.__build_indexes()  # Rows shifted
         self.endRemoveRows()
+        save_shortcuts(self.shortcuts)
         self.dataChanged.emit(index, index)
 
     def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
@@ -118,9 +194,9 @@ class ShortcutsModel(QAbstractTableModel):
 
     def __is_missing_service(self, service_name):
         """Check if a service name does not exist in available services."""
-        if not service_name or not self.__service_names_func:
+        if not service_name or not self.__service_exists_func:
             return False
-        return service_name not in self.__service_names_func()
+        return not self.__service_exists_func(service_name)
 
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid:
@@ -160,27 +236,25 @@ class ShortcutsModel(QAbstractTableModel):
             return False
 
         if role == Qt.ItemDataRole.EditRole and len(value) > 0:
+            shortcut = self.shortcuts[index.row()]
             if index.column() == 0:
-                for sh in self.shortcuts:
-                    if sh.name == value:
-                        return False
-                self.shortcuts[index.row()].rename(value)
+                if value in self.__by_name:
+                    return False
+                self.__set_shortcut(shortcut, shortcut.service_from, shortcut.service_to, value)
+                save_shortcuts(self.shortcuts)
                 self.dataChanged.emit(index, index)
                 return True
-            elif index.column() == 1:
-                shortcut = self.shortcuts[index.row()]
-                shortcut.service_from = value
-                # Auto-update name
-                shortcut.rename(f"{shortcut.service_from} -> {shortcut.service_to}")
-                shortcut.save()
-                self.dataChanged.emit(self.index(index.row(), 0), self.index(index.row(), 2))
-                return True
-            elif index.column() == 2:
-                shortcut = self.shortcuts[index.row()]
-                shortcut.service_to = value
+            elif index.column() in (1, 2):
+                service_from = value if index.column() == 1 else shortcut.service_from
+                service_to = value if index.column() == 2 else shortcut.service_to
                 # Auto-update name
-                shortcut.rename(f"{shortcut.service_from} -> {shortcut.service_to}")
-                shortcut.save()
+                self.__set_shortcut(
+                    shortcut,
+                    service_from,
+                    service_to,
+                    self.__unique_name(f"{service_from} -> {service_to}", shortcut),
+                )
+                save_shortcuts(self.shortcuts)
                 self.dataChanged.emit(self.index(index.row(), 0), self.index(index.row(), 2))
                 return True
 
@@ -0,0 +1,149 @@
+"""
+Pure Python handling of PG layer data source strings.
+
+Unlike QgsDataSourceUri, this module does not depend on QGIS, so it can
+be used from worker processes reading project files. Only the connection
+settings are interpreted, every other part of a data source is kept as is.
+"""
+
+import re
+
+# Connection settings that identify the target of a service
+MATCH_KEYS = ("host", "port", "dbname", "user", "sslmode")
+# Settings that can be taken over by a service
+SWITCHABLE_KEYS = MATCH_KEYS + ("password",)
+# libpq defaults, used when a setting is missing
+DEFAULT_VALUES = {"port": "5432", "sslmode": "prefer"}
+# Alternative data source keys
+KEY_ALIASES = {"username": "user"}
+
+_KEY_RE = re.compile(r"([A-Za-z_][A-Za-z0-9_]*)=")
+_GEOMETRY_COLUMN_RE = re.compile(r"\s*\([^)]*\)")
+_PASSWORD_RE = re.compile(r"password='(?:[^'\\]|\\.)*'|password=\S+")
+
+
+class DatasourceToken:
+    def __init__(self, key: str, value: str, start: int, end: int):
+        self.key = key
+        self.value = value  # Unquoted value
+        self.start = start
+        self.end = end
+
+
+def _end_of_single_quoted(text: str, start: int) -> int:
+    i = start + 1
+    while i < len(text):
+        if text[i] == "\\":
+            i += 2
+            continue
+        if text[i] == "'":
+            return i + 1
+        i += 1
+    return len(text)
+
+
+def _end_of_double_quoted(text: str, start: int) -> int:
+    i = start + 1
+    while i < len(text):
+        if text[i] == '"':
+            if text.startswith('"', i + 1):  # Escaped quote
+                i += 2
+                continue
+            return i + 1
+        i += 1
+    return len(text)
+
+
+def escape_value(value: str) -> str:
+    """Quote a value the way QgsDataSourceUri does."""
+    return "'{}'".format(value.replace("\\", "\\\\").replace("'", "\\'"))
+
+
+def _unescape_value(quoted: str) -> str:
+    return re.sub(r"\\(.)", r"\1", quoted[1:-1])
+
+
+def tokenize(datasource: str) -> list[DatasourceToken]:
+    """Split a PG data source string into key=value tokens."""
+    tokens = []
+    i = 0
+    length = len(datasource)
+    while i < length:
+        if datasource[i].isspace():
+            i += 1
+            continue
+
+        match = _KEY_RE.match(datasource, i)
+        if not match:
+            i += 1
+            continue
+
+        key = match.group(1)
+        j = match.end()
+        if key == "sql":
+            # The SQL filter always comes last and takes the rest of the string
+            tokens.append(DatasourceToken(key, datasource[j:], i, length))
+            break
+
+        if datasource.startswith("'", j):
+            end = _end_of_single_quoted(datasource, j)
+            value = _unescape_value(datasource[j:end])
+        elif datasource.startswith('"', j):
+            # Quoted identifiers, e.g. table="schema"."table" (geom)
+            end = _end_of_double_quoted(datasource, j)
+            while datasource.startswith('."', end):
+                end = _end_of_double_quoted(datasource, end + 1)
+            geometry_column = _GEOMETRY_COLUMN_RE.match(datasource, end)
+            if geometry_column:
+                end = geometry_column.end()
+            value = datasource[j:end]
+        else:
+            end = j
+            while end < length and not datasource[end].isspace():
+                end += 1
+            value = datasource[j:end]
+
+        tokens.append(DatasourceToken(KEY_ALIASES.get(key, key), value, i, end))
+        i = end
+
+    return tokens
+
+
+def connection_settings(datasource: str) -> dict[str, str]:
+    """Connection settings (service, host, port, ...) of a PG data source."""
+    return {
+        token.key: token.value
+        for token in tokenize(datasource)
+        if token.key in SWITCHABLE_KEYS or token.key == "service"
+    }
+
+
+def exact_match_key(settings: dict[str, str]) -> tuple:
+    """Normalized (host, port, dbname, user, sslmode) of a service or data source."""
+    return tuple(settings.get(key, "") or DEFAULT_VALUES.get(key, "") for key in MATCH_KEYS)
+
+
+def switch_datasource_to_service(datasource: str, service_name: str, config: dict) -> str:
+    """
+    Set the service in a data source and remove every connection
+    setting that the service already provides, keeping everything else.
+    """
+    spans = []
+    for token in tokenize(datasource):
+        if token.key == "service" or (
+            token.key in SWITCHABLE_KEYS and token.value and config.get(token.key) == token.value
+        ):
+            spans.append((token.start, token.end))
+
+    result = datasource
+    for start, end in reversed(spans):
+        while end < len(result) and result[end].isspace():
+            end += 1
+        result = result[:start] + result[end:]
+
+    service = f"service={escape_value(service_name)}"
+    return f"{service} {result}" if result else service
+
+
+def redact_password(datasource: str) -> str:
+    return _PASSWORD_RE.sub("password='XXXXXXX'", datasource)
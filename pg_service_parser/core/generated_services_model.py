@@ -0,0 +1,63 @@
+from qgis.PyQt.QtCore import QAbstractTableModel, QModelIndex, Qt
+from qgis.PyQt.QtGui import QColorConstants, QFont
+
+from pg_service_parser.core.service_generator import GeneratedService
+
+
+class GeneratedServicesModel(QAbstractTableModel):
+    """Preview of the services to generate, with the values of their parameters."""
+
+    SERVICE_COL = 0
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.__services = []
+        self.__keys = []  # Parameter keys, shown after the service name
+
+        self.__service_font = QFont()
+        self.__service_font.setBold(True)
+
+    def set_services(self, services: list[GeneratedService], keys: list[str]):
+        self.beginResetModel()
+        self.__services = services
+        self.__keys = list(keys)
+        self.endResetModel()
+
+    def collision_count(self) -> int:
+        return sum(1 for service in self.__services if service.collision)
+
+    def rowCount(self, parent=QModelIndex()):
+        return len(self.__services)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 1 + len(self.__keys)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        service = self.__services[index.row()]
+        column = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == self.SERVICE_COL:
+                return service.name
+            return service.settings.get(self.__keys[column - 1])
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            if column == self.SERVICE_COL and service.collision:
+                return self.tr("A service with this name already exists.")
+        elif role == Qt.ItemDataRole.FontRole:
+            if column == self.SERVICE_COL:
+                return self.__service_font
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if column == self.SERVICE_COL and service.collision:
+                return QColorConstants.Red
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            if section == self.SERVICE_COL:
+                return self.tr("Service")
+            return self.__keys[section - 1]
+
+        return super().headerData(section, orientation, role)
@@ -0,0 +1,128 @@
+"""
+Optional persistent cache of service file section indexes.
+
+Huge service files then do not have to be scanned at every QGIS startup:
+the cached index is revalidated with a stat (mtime, size and inode) and
+a hash of the first and last blocks of the file.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+
+from pg_service_parser.core.atomic_file import write_atomically
+from pg_service_parser.core.section_index import SectionIndex
+
+BLOCK_SIZE = 4096
+INDEX_CACHE_DIR_NAME = "section_index_cache"
+
+
+def _cache_file(cache_dir: Path, path: Path) -> Path:
+    return cache_dir / "{}.json".format(hashlib.blake2b(str(path).encode("utf-8")).hexdigest())
+
+
+def edge_hash(path: Path, size: int) -> str:
+    """Hash of the first and last blocks of a file."""
+    digest = hashlib.blake2b()
+    with open(path, "rb") as f:
+        digest.update(f.read(BLOCK_SIZE))
+        if size > BLOCK_SIZE:
+            f.seek(max(BLOCK_SIZE, size - BLOCK_SIZE))
+            digest.update(f.read(BLOCK_SIZE))
+
+    return digest.hexdigest()
+
+
+def _load_entry(cache_dir: Path, path: Path, signature: tuple) -> dict | None:
+    """:return: the cache entry of a service file, or None if not cached or outdated"""
+    _path, mtime, size, inode = signature
+    try:
+        entry = json.loads(_cache_file(cache_dir, path).read_text(encoding="utf-8"))
+        stat = (entry["path"], entry["mtime"], entry["size"], entry["inode"])
+        if stat != (str(path), mtime, size, inode):
+            return None
+        if entry["hash"] != edge_hash(path, size):
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    return entry
+
+
+def load_index(cache_dir: Path, path: Path, signature: tuple) -> SectionIndex | None:
+    """
+    Cached index of a service file.
+
+    :param signature: current file_signature() of the service file
+    :return: the index, or None if not cached or outdated
+    """
+    entry = _load_entry(cache_dir, path, signature)
+    if entry is None:
+        return None
+
+    try:
+        size = entry["size"]
+        starts = entry["starts"]
+        default_starts = entry["default_starts"]
+        # Sections end at the next header, of a service or not
+        all_starts = sorted(starts + default_starts) + [size]
+        ends = dict(zip(all_starts, all_starts[1:]))
+        return SectionIndex(
+            path,
+            {name: (start, ends[start]) for name, start in zip(entry["names"], starts)},
+            size,
+            [(start, ends[start]) for start in default_starts],
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def load_digests(cache_dir: Path, path: Path, signature: tuple) -> dict[str, bytes] | None:
+    """
+    Cached section digests of a service file, see section_digests().
+
+    :param signature: current file_signature() of the service file
+    :return: the digests, or None if not cached or outdated
+    """
+    entry = _load_entry(cache_dir, path, signature)
+    if entry is None or "digests" not in entry:
+        return None
+
+    try:
+        return {
+            name: bytes.fromhex(digest) for name, digest in zip(entry["names"], entry["digests"])
+        }
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def store_index(
+    cache_dir: Path, index: SectionIndex, signature: tuple, digests: dict[str, bytes] | None = None
+) -> None:
+    """
+    Cache the index of a service file, silently skipped on errors.
+
+    :param digests: section digests of the indexed file, cached as well if given
+    """
+    _path, mtime, size, inode = signature
+    if size != index.size:
+        return
+
+    try:
+        entry = {
+            "path": str(index.path),
+            "mtime": mtime,
+            "size": size,
+            "inode": inode,
+            "hash": edge_hash(index.path, size),
+            "names": index.names,
+            "starts": [index.spans[name][0] for name in index.names],
+            "default_starts": [start for start, _end in index.default_spans],
+        }
+        if digests is not None:
+            entry["digests"] = [digests[name].hex() for name in index.names]
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(entry, separators=(",", ":")).encode("utf-8")
+        write_atomically(_cache_file(cache_dir, index.path), data)
+    except OSError:
+        pass
@@ -1,4 +1,9 @@
-from qgis.core import QgsSettingsEntryString, QgsSettingsTree
+from qgis.core import (
+    QgsSettingsEntryBool,
+    QgsSettingsEntryString,
+    QgsSettingsEntryStringList,
+    QgsSettingsTree,
+)
 
 PLUGIN_NAME = "pg_service_parser"
 
@@ -16,5 +21,18 @@ class PluginSettings:
             cls.shortcut_from = QgsSettingsEntryString("shortcut_from", shortcuts_node)
             cls.shortcut_to = QgsSettingsEntryString("shortcut_to", shortcuts_node)
             cls.shortcuts_node = shortcuts_node
+            # All shortcuts as a JSON list of [name, from, to], read and written at once
+            cls.shortcut_list = QgsSettingsEntryString("shortcut_list", settings_node, "")
+
+            # Folders scanned for projects using PG services
+            cls.project_directories = QgsSettingsEntryStringList(
+                "project_directories", settings_node, []
+            )
+
+            # Keep the section index of the service file in the user profile. Only
+            # used while the file mtime, size and edge hash match, so on by default
+            cls.service_index_cache = QgsSettingsEntryBool(
+                "service_index_cache", settings_node, True
+            )
 
         return cls.instance
@@ -0,0 +1,342 @@
+"""
+Offline reading and rewriting of QGIS project files (.qgs/.qgz).
+
+Project files are stream-parsed without QGIS, so that no layer is loaded
+and no database is contacted. Many files are handled in parallel by a
+thread pool, the work being mostly zip and XML I/O.
+"""
+
+import html
+import io
+import os
+import re
+import xml.etree.ElementTree as ET
+import zipfile
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from pg_service_parser.core.atomic_file import write_atomically
+from pg_service_parser.core.datasource import (
+    DEFAULT_VALUES,
+    SWITCHABLE_KEYS,
+    connection_settings,
+    exact_match_key,
+    redact_password,
+    switch_datasource_to_service,
+)
+
+PROJECT_EXTENSIONS = (".qgs", ".qgz")
+
+_DATASOURCE_RE = re.compile(r"<datasource>(.*?)</datasource>", re.S)
+_SOURCE_ATTRIBUTE_RE = re.compile(r'(\ssource=")([^"]*)(")')
+# Entities escaped by QGIS on top of &, < and >
+_TEXT_ENTITIES = {'"': "&quot;"}
+_ATTRIBUTE_ENTITIES = {'"': "&quot;", "\n": "&#xa;", "\r": "&#xd;", "\t": "&#x9;"}
+
+
+class PgLayerSource:
+    def __init__(self, layer_id: str, layer_name: str, datasource: str):
+        self.layer_id = layer_id
+        self.layer_name = layer_name
+        self.datasource = datasource
+
+
+class ProjectRewrite:
+    """Outcome of rewriting (or simulating the rewrite of) a project file."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.changes = []  # (layer name, old data source, new data source, service)
+        self.skipped = []  # (layer name, data source, near match services), left unchanged
+        self.error = None
+        self.written = False
+
+
+def find_project_files(directories: list[Path]) -> list[Path]:
+    """All .qgs/.qgz files found in the given directory trees."""
+    paths = []
+    for directory in directories:
+        for root, _dirs, files in os.walk(directory):
+            for file_name in files:
+                if file_name.lower().endswith(PROJECT_EXTENSIONS):
+                    paths.append(Path(root) / file_name)
+
+    return sorted(paths)
+
+
+def _qgz_project_member(archive: zipfile.ZipFile) -> str:
+    for name in archive.namelist():
+        if name.lower().endswith(".qgs"):
+            return name
+
+    raise ValueError("No .qgs file found in the .qgz archive")
+
+
+def read_project_xml(path: Path) -> bytes:
+    """Raw XML of a .qgs file or of the project stored in a .qgz archive."""
+    path = Path(path)
+    if path.suffix.lower() == ".qgz":
+        with zipfile.ZipFile(path) as archive:
+            return archive.read(_qgz_project_member(archive))
+
+    return path.read_bytes()
+
+
+def write_project_xml(path: Path, xml: bytes) -> None:
+    """Atomically replace the XML of a .qgs file or of the project in a .qgz archive."""
+    path = Path(path)
+    if path.suffix.lower() != ".qgz":
+        write_atomically(path, xml)
+        return
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(path) as archive, zipfile.ZipFile(buffer, "w") as new_archive:
+        project_member = _qgz_project_member(archive)
+        for info in archive.infolist():
+            data = xml if info.filename == project_member else archive.read(info)
+            new_archive.writestr(info, data)
+
+    write_atomically(path, buffer.getvalue())
+
+
+def iter_pg_layer_sources(xml: bytes):
+    """
+    Stream the PG layers of a project, without building the whole XML tree.
+
+    :return: generator of PgLayerSource
+    """
+    maplayer_depth = 0
+    for event, element in ET.iterparse(io.BytesIO(xml), events=("start", "end")):
+        if element.tag == "maplayer":
+            maplayer_depth += 1 if event == "start" else -1
+        if event == "start":
+            continue
+
+        if element.tag == "maplayer":
+            if (element.findtext("provider") or "").strip() == "postgres":
+                yield PgLayerSource(
+                    element.findtext("id") or "",
+                    element.findtext("layername") or "",
+                    element.findtext("datasource") or "",
+                )
+            element.clear()
+        elif maplayer_depth == 0:
+            # Not needed anymore, keep memory low on big projects
+            element.clear()
+
+
+def services_by_match_key(configs: dict[str, dict[str, str]]) -> dict[tuple, tuple]:
+    """
+    Index services by normalized (host, port, dbname, user, sslmode).
+    The first service in the file wins, like for switch_to_service.
+    """
+    services = {}
+    for name, config in configs.items():
+        services.setdefault(exact_match_key(config), (name, config))
+
+    return services
+
+
+def services_by_setting(configs: dict[str, dict[str, str]]) -> dict[tuple, list[str]]:
+    """
+    Index services by (key, value) of their connection settings, to find
+    near matches like switch_to_service. libpq default values are left out,
+    since shared by most services.
+    """
+    services = {}
+    for name, config in configs.items():
+        for key in SWITCHABLE_KEYS:
+            value = config.get(key)
+            if value and value != DEFAULT_VALUES.get(key):
+                services.setdefault((key, value), []).append(name)
+
+    return services
+
+
+def _near_matches(settings: dict[str, str], near_services: dict[tuple, list[str]]) -> list[str]:
+    names = []
+    for key in SWITCHABLE_KEYS:
+        names.extend(near_services.get((key, settings.get(key)), ()))
+    return list(dict.fromkeys(names))
+
+
+def _replace_datasources(xml: bytes, replacements: dict[str, str]) -> bytes:
+    text = xml.decode("utf-8")
+
+    def replace_element(match):
+        datasource = html.unescape(match.group(1))
+        if datasource not in replacements:
+            return match.group(0)
+        return f"<datasource>{escape(replacements[datasource], _TEXT_ENTITIES)}</datasource>"
+
+    def replace_attribute(match):
+        datasource = html.unescape(match.group(2))
+        if datasource not in replacements:
+            return match.group(0)
+        new_value = escape(replacements[datasource], _ATTRIBUTE_ENTITIES)
+        return f"{match.group(1)}{new_value}{match.group(3)}"
+
+    text = _DATASOURCE_RE.sub(replace_element, text)
+    # Layer tree nodes keep a copy of the data source
+    text = _SOURCE_ATTRIBUTE_RE.sub(replace_attribute, text)
+    return text.encode("utf-8")
+
+
+def rewrite_project(
+    path: Path,
+    services: dict[tuple, tuple],
+    dry_run: bool = True,
+    near_services: dict[tuple, list[str]] | None = None,
+):
+    """
+    Switch the PG layers of a project file to services.
+
+    Only layers without service whose connection exactly matches a service
+    (same host, port, dbname, user and sslmode) are rewritten, the settings
+    provided by the service being removed like in switch_to_service. Unlike
+    switch_to_service, near matches are not applied, since nobody reviews
+    each layer: they are reported as skipped.
+
+    :param services: services indexed with services_by_match_key()
+    :param dry_run: if True, only compute the changes
+    :param near_services: services indexed with services_by_setting(), to report near matches
+    :return: ProjectRewrite
+    """
+    result = ProjectRewrite(Path(path))
+    try:
+        xml = read_project_xml(path)
+        replacements = {}
+        for layer in iter_pg_layer_sources(xml):
+            settings = connection_settings(layer.datasource)
+            if settings.get("service"):
+                continue
+
+            service = services.get(exact_match_key(settings))
+            if service is None:
+                near_matches = _near_matches(settings, near_services or {})
+                if near_matches:
+                    result.skipped.append((layer.layer_name, layer.datasource, near_matches))
+                continue
+
+            name, config = service
+            new_datasource = switch_datasource_to_service(layer.datasource, name, config)
+            replacements[layer.datasource] = new_datasource
+            result.changes.append((layer.layer_name, layer.datasource, new_datasource, name))
+
+        if replacements and not dry_run:
+            write_project_xml(path, _replace_datasources(xml, replacements))
+            result.written = True
+    except (OSError, ET.ParseError, ValueError, zipfile.BadZipFile) as e:
+        result.error = str(e)
+
+    return result
+
+
+def scan_project_services(path: Path) -> tuple[list[tuple[str, str]], str | None]:
+    """
+    Extract the services used by the PG layers of a project file.
+
+    :return: ([(layer name, service)], error message or None)
+    """
+    try:
+        layers = []
+        for layer in iter_pg_layer_sources(read_project_xml(path)):
+            service = connection_settings(layer.datasource).get("service")
+            if service:
+                layers.append((layer.layer_name, service))
+        return layers, None
+    except (OSError, ET.ParseError, ValueError, zipfile.BadZipFile) as e:
+        return [], str(e)
+
+
+def project_executor(max_workers: int | None = None) -> ThreadPoolExecutor:
+    """
+    Thread pool for project file jobs.
+
+    Never a process pool: forking the multithreaded QGIS process is
+    unsafe, and spawned processes would start the QGIS executable again.
+    """
+    return ThreadPoolExecutor(max_workers, thread_name_prefix="pg_service_projects")
+
+
+def map_project_files(
+    func: Callable,
+    paths: list[Path],
+    max_workers: int | None = None,
+    is_canceled: Callable[[], bool] | None = None,
+    set_progress: Callable[[float], None] | None = None,
+) -> list | None:
+    """
+    Call a function on many project files in parallel.
+
+    :param is_canceled: checked after each file, the remaining files being
+                        skipped once it returns True
+    :param set_progress: called with the percentage of files done
+    :return: results in the order of the paths, None if canceled
+    """
+    paths = list(paths)
+    results = [None] * len(paths)
+    with project_executor(max_workers) as executor:
+        futures = {executor.submit(func, path): i for i, path in enumerate(paths)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            if set_progress is not None:
+                set_progress(100 * done / len(paths))
+            if is_canceled is not None and is_canceled():
+                for pending in futures:
+                    pending.cancel()
+                return None
+
+    return results
+
+
+def rewrite_projects(
+    paths: list[Path],
+    configs: dict[str, dict[str, str]],
+    dry_run: bool = True,
+    max_workers: int | None = None,
+    is_canceled: Callable[[], bool] | None = None,
+    set_progress: Callable[[float], None] | None = None,
+) -> list[ProjectRewrite] | None:
+    """
+    Switch the PG layers of many project files to services, in parallel.
+
+    :param configs: service configs, e.g. from service_configs()
+    :param dry_run: if True, nothing is written, use format_report() to review the changes
+    :return: results in the order of the paths, None if canceled
+    """
+    services = services_by_match_key(configs)
+    near_services = services_by_setting(configs)
+    return map_project_files(
+        lambda path: rewrite_project(path, services, dry_run, near_services),
+        paths,
+        max_workers,
+        is_canceled,
+        set_progress,
+    )
+
+
+def format_report(results: list[ProjectRewrite]) -> str:
+    """Diff-like report of project rewrites, with passwords redacted."""
+    lines = []
+    for result in results:
+        if result.error:
+            lines.append(f"!!! {result.path}: {result.error}")
+            continue
+        if not result.changes and not result.skipped:
+            continue
+
+        lines.append(f"--- {result.path}")
+        lines.append(f"+++ {result.path}")
+        for layer_name, old_datasource, new_datasource, service in result.changes:
+            lines.append(f"@@ {layer_name} -> service '{service}' @@")
+            lines.append(f"-{redact_password(old_datasource)}")
+            lines.append(f"+{redact_password(new_datasource)}")
+        for layer_name, datasource, near_matches in result.skipped:
+            services = ", ".join(f"'{service}'" for service in near_matches[:5])
+            lines.append(f"@@ {layer_name} skipped, near match only: {services} @@")
+            lines.append(f" {redact_password(datasource)}")
+
+    return "\n".join(lines)
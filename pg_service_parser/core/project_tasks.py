@@ -0,0 +1,83 @@
+from pathlib import Path
+
+from qgis.core import QgsTask
+from qgis.PyQt.QtCore import QCoreApplication
+
+from pg_service_parser.core.project_files import find_project_files, rewrite_projects
+from pg_service_parser.core.project_usage import project_usage_index
+
+
+class RewriteProjectsTask(QgsTask):
+    """
+    Background task switching the PG layers of project files to services,
+    or only computing the changes in dry run mode. Files are handled by a
+    thread pool; results are available in `results` once the task is completed.
+    """
+
+    def __init__(
+        self,
+        configs: dict[str, dict[str, str]],
+        dry_run: bool = True,
+        paths: list[Path] = (),
+        directories: list[Path] = (),
+    ):
+        """
+        :param configs: service configs, e.g. from service_configs()
+        :param paths: project files to rewrite
+        :param directories: folders searched for more project files
+        """
+        super().__init__(
+            QCoreApplication.translate("Plugin", "Switch project files to PG services"),
+            QgsTask.Flag.CanCancel,
+        )
+        self.configs = configs
+        self.dry_run = dry_run
+        self.__paths = list(paths)
+        self.__directories = list(directories)
+
+        self.project_count = 0
+        self.results = []  # ProjectRewrite
+
+    def run(self) -> bool:
+        paths = self.__paths + find_project_files(self.__directories)
+        self.project_count = len(paths)
+        results = rewrite_projects(
+            paths,
+            self.configs,
+            self.dry_run,
+            is_canceled=self.isCanceled,
+            set_progress=self.setProgress,
+        )
+        if results is None:
+            return False
+
+        self.results = results
+        return True
+
+
+class ScanProjectUsageTask(QgsTask):
+    """
+    Background task updating the project usage index with the project files
+    of the given directories. The number of scanned files is available in
+    `scanned_count` once the task is completed.
+    """
+
+    def __init__(self, directories: list[Path]):
+        super().__init__(
+            QCoreApplication.translate("Plugin", "Scan projects for PG service usage"),
+            QgsTask.Flag.CanCancel,
+        )
+        self.__directories = list(directories)
+        self.scanned_count = 0
+
+    def run(self) -> bool:
+        scanned_count = project_usage_index().update(
+            self.__directories,
+            is_canceled=self.isCanceled,
+            set_progress=self.setProgress,
+        )
+        if scanned_count is None:
+            return False
+
+        self.scanned_count = scanned_count
+        return True
@@ -0,0 +1,140 @@
+import json
+from collections.abc import Callable
+from pathlib import Path
+
+from qgis.core import QgsApplication
+
+from pg_service_parser.core.atomic_file import write_atomically
+from pg_service_parser.core.plugin_settings import PLUGIN_NAME
+from pg_service_parser.core.project_files import (
+    find_project_files,
+    map_project_files,
+    scan_project_services,
+)
+
+INDEX_FILE_NAME = "project_usage.json"
+
+
+class ProjectUsageIndex:
+    """
+    Persistent index of the services used by project files.
+
+    Projects are only rescanned when their mtime or size changed since
+    the last scan, and the index is kept on disk between sessions.
+    """
+
+    def __init__(self, index_path: Path):
+        self.__index_path = Path(index_path)
+        self.__projects = {}  # Project path -> {"mtime", "size", "layers": [[layer, service]]}
+        self.__services = {}  # Service -> {project path: [layer names]}
+        self.__load()
+
+    def __load(self):
+        try:
+            data = json.loads(self.__index_path.read_text(encoding="utf-8"))
+            self.__projects = data.get("projects", {})
+        except (OSError, ValueError):
+            self.__projects = {}
+        self.__services = self.__build_service_index(self.__projects)
+
+    def __save(self):
+        self.__index_path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"projects": self.__projects}, indent=1)
+        write_atomically(self.__index_path, data.encode("utf-8"))
+
+    @staticmethod
+    def __build_service_index(projects: dict) -> dict[str, dict[str, list[str]]]:
+        services = {}
+        for project, entry in projects.items():
+            for layer_name, service in entry["layers"]:
+                services.setdefault(service, {}).setdefault(project, []).append(layer_name)
+
+        return services
+
+    def update(
+        self,
+        directories: list[Path],
+        max_workers: int | None = None,
+        is_canceled: Callable[[], bool] | None = None,
+        set_progress: Callable[[float], None] | None = None,
+    ) -> int | None:
+        """
+        Scan the project files found in the given directories,
+        skipping those unchanged since the last scan.
+
+        May run in a background thread: the index is only swapped once the
+        scan is done, the lookups seeing either the old or the new index.
+
+        :return: number of project files scanned, None if canceled
+        """
+        directories = [Path(directory) for directory in directories]
+        found = {}
+        for path in find_project_files(directories):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found[str(path)] = (stat.st_mtime_ns, stat.st_size)
+
+        # Forget projects removed from the scanned directories
+        projects = {
+            project: entry
+            for project, entry in self.__projects.items()
+            if project in found
+            or not any(Path(project).is_relative_to(directory) for directory in directories)
+        }
+
+        to_scan = [
+            project
+            for project, (mtime, size) in found.items()
+            if project not in projects
+            or projects[project]["mtime"] != mtime  # noqa W503
+            or projects[project]["size"] != size  # noqa W503
+        ]
+        if to_scan:
+            scans = map_project_files(
+                scan_project_services,
+                to_scan,
+                max_workers,
+                is_canceled=is_canceled,
+                set_progress=set_progress,
+            )
+            if scans is None:
+                return None
+
+            for project, (layers, error) in zip(to_scan, scans):
+                mtime, size = found[project]
+                projects[project] = {
+                    "mtime": mtime,
+                    "size": size,
+                    "layers": [list(layer) for layer in layers],
+                    "error": error,
+                }
+
+        services = self.__build_service_index(projects)
+        self.__projects, self.__services = projects, services
+        self.__save()
+        return len(to_scan)
+
+    def projects_using(self, service: str) -> dict[str, list[str]]:
+        """Layer names using the given service, by project path."""
+        return {
+            project: list(layers) for project, layers in self.__services.get(service, {}).items()
+        }
+
+    def project_count(self, service: str) -> int:
+        return len(self.__services.get(service, ()))
+
+
+_project_usage_index = None
+
+
+def project_usage_index() -> ProjectUsageIndex:
+    """Shared project usage index, stored in the QGIS user profile."""
+    global _project_usage_index
+    if _project_usage_index is None:
+        _project_usage_index = ProjectUsageIndex(
+            Path(QgsApplication.qgisSettingsDirPath()) / PLUGIN_NAME / INDEX_FILE_NAME
+        )
+
+    return _project_usage_index
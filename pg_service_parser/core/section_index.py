@@ -0,0 +1,452 @@
+"""
+Byte offset index of the sections of a service file.
+
+Finding the [service] headers is a single regex pass over a memory-mapped
+file, much cheaper than a full configparser parse. Files with indented
+headers or old Mac line endings, where telling a header from a multiline
+value needs the configparser rules, are scanned line by line instead.
+One service can then be read, or patched, through its byte span only.
+"""
+
+import configparser
+import hashlib
+import io
+import locale
+import mmap
+import os
+import re
+from pathlib import Path
+
+from pg_service_parser.core.atomic_file import write_atomically
+
+# Like configparser.SECTCRE, for non-indented headers
+_HEADER_RE = re.compile(rb"^\[([^\r\n]+)\]", re.M)
+# Lines the header regex could get wrong: indented brackets and lone CR line endings
+_AMBIGUOUS_RE = re.compile(rb"^[ \t\v\f]+\[|\r(?!\n)", re.M)
+_SECTION_RE = re.compile(rb"\[(.+)\]")  # configparser.SECTCRE, on a stripped line
+_INDENT_RE = re.compile(rb"^[ \t\v\f]+")
+_COMMENT_PREFIXES = ("#", ";")
+_DELIMITERS_RE = re.compile(r"[=:]")
+_DELIMITER_RE = re.compile(rb"[=:]")
+DEFAULT_SECTION = configparser.DEFAULTSECT
+
+
+class StaleIndexError(Exception):
+    """The service file changed on disk since it was indexed."""
+
+
+def stat_signature(path: Path, stat: os.stat_result) -> tuple:
+    """
+    Identify the state of a file from its stat() result.
+
+    :return: (path, mtime, size, inode) tuple
+    """
+    return (str(path), stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+
+def _encoding() -> str:
+    # The one used by configparser.read() and by pgserviceparser writes
+    return locale.getpreferredencoding(False)
+
+
+def parse_config(text: str) -> configparser.ConfigParser:
+    """Parse a service file content like configparser.read() does, with universal newlines."""
+    config = configparser.ConfigParser(interpolation=None)
+    config.read_file(io.StringIO(text, newline=None))
+    return config
+
+
+class SectionIndex:
+    """
+    Byte spans of the sections of a service file, by service name.
+
+    [DEFAULT] sections are not services: their spans are kept apart and
+    their settings are inherited by every service, like with configparser.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        spans: dict[str, tuple[int, int]],
+        size: int,
+        default_spans: list[tuple[int, int]] = (),
+    ):
+        self.path = path
+        self.spans = spans  # Service name -> (start, end), from header to next header
+        self.size = size
+        self.default_spans = list(default_spans)
+        self.names = list(spans.keys())
+        self.__defaults = None  # Parsed once needed
+
+    def read_bytes(self, service_name: str) -> bytes:
+        start, end = self.spans[service_name]
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            return f.read(end - start)
+
+    def defaults(self) -> dict[str, str]:
+        """Settings of the [DEFAULT] sections."""
+        if self.__defaults is None:
+            self.__defaults = {}
+            if self.default_spans:
+                with open(self.path, "rb") as f:
+                    chunks = []
+                    for start, end in self.default_spans:
+                        f.seek(start)
+                        chunks.append(f.read(end - start))
+                self.__defaults = dict(
+                    parse_config(_join_lines(chunks).decode(_encoding())).defaults()
+                )
+
+        return self.__defaults
+
+    def read_section(self, service_name: str) -> dict[str, str]:
+        """Parse a single section, without reading the rest of the file."""
+        settings = parse_section(self.read_bytes(service_name).decode(_encoding()), service_name)
+        for key, value in self.defaults().items():
+            settings.setdefault(key, value)
+        return settings
+
+    def shifted(self, service_name: str, new_length: int) -> "SectionIndex":
+        """Index of the file once the given section is replaced by new_length bytes."""
+        start, end = self.spans[service_name]
+        delta = new_length - (end - start)
+
+        def shift(span_start, span_end):
+            if span_start > start:
+                return (span_start + delta, span_end + delta)
+            return (span_start, span_end)
+
+        spans = {}
+        for name, span in self.spans.items():
+            spans[name] = (start, start + new_length) if name == service_name else shift(*span)
+
+        default_spans = [shift(*span) for span in self.default_spans]
+        return SectionIndex(self.path, spans, self.size + delta, default_spans)
+
+    def appended(self, service_name: str, separator_length: int, length: int) -> "SectionIndex":
+        """Index of the file once a section is appended, separator included in length."""
+
+        def extend(span_start, span_end):
+            # The separator belongs to the former last section
+            if span_end == self.size:
+                return (span_start, span_end + separator_length)
+            return (span_start, span_end)
+
+        spans = {name: extend(*span) for name, span in self.spans.items()}
+        spans[service_name] = (self.size + separator_length, self.size + length)
+        default_spans = [extend(*span) for span in self.default_spans]
+        return SectionIndex(self.path, spans, self.size + length, default_spans)
+
+
+def _join_lines(chunks: list[bytes]) -> bytes:
+    return b"".join(chunk if chunk.endswith((b"\n", b"\r")) else chunk + b"\n" for chunk in chunks)
+
+
+def parse_section(section: str, service_name: str) -> dict[str, str]:
+    """Settings of a section text on its own, without inherited defaults."""
+    return dict(parse_config(section)[service_name])
+
+
+def _scan_headers(buffer) -> list[tuple[bytes, int]]:
+    """
+    Find the section headers, following configparser rules: stripped
+    lines, comments, and indented lines continuing a multiline value.
+
+    :return: (header, start offset) tuples, in file order
+    """
+    if _AMBIGUOUS_RE.search(buffer) is None:
+        return [(match.group(1), match.start()) for match in _HEADER_RE.finditer(buffer)]
+
+    headers = []
+    in_section = False
+    option = False  # Whether the last setting line had a name, so might be continued
+    indent_level = 0
+    offset = 0
+    for line in bytes(buffer).splitlines(keepends=True):
+        start, offset = offset, offset + len(line)
+        value = line.strip()
+        if not value or value.startswith((b"#", b";")):
+            continue  # Blank lines do not end multiline values
+
+        indent = len(line) - len(line.lstrip())
+        if in_section and option and indent > indent_level:
+            continue  # Continuation of a multiline value
+
+        indent_level = indent
+        match = _SECTION_RE.match(value)
+        if match is not None:
+            headers.append((match.group(1), start))
+            in_section = True
+            option = False
+        elif in_section:
+            delimiter = _DELIMITER_RE.search(value)
+            if delimiter is not None:
+                option = bool(value[: delimiter.start()].strip())
+
+    return headers
+
+
+def _index_buffer(path: Path, buffer, size: int) -> SectionIndex:
+    encoding = _encoding()
+    headers = [(header.decode(encoding), start) for header, start in _scan_headers(buffer)]
+
+    spans = {}
+    default_spans = []
+    for i, (name, start) in enumerate(headers):
+        end = headers[i + 1][1] if i + 1 < len(headers) else size
+        if name == DEFAULT_SECTION:
+            default_spans.append((start, end))
+            continue
+        if name in spans:
+            raise configparser.DuplicateSectionError(name, str(path))
+        spans[name] = (start, end)
+
+    return SectionIndex(path, spans, size, default_spans)
+
+
+def build_section_index(path: Path) -> SectionIndex:
+    """
+    Index the sections of a service file.
+
+    :raises configparser.DuplicateSectionError: like configparser, on duplicate sections
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            return SectionIndex(path, {}, 0)
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            return _index_buffer(path, buffer, size)
+
+
+def index_bytes(path: Path, data: bytes) -> SectionIndex:
+    """Index the sections of a service file content, already read."""
+    return _index_buffer(Path(path), data, len(data))
+
+
+def section_digests(index: SectionIndex) -> dict[str, bytes]:
+    """
+    Digest of the raw bytes of every section, to find out which services
+    changed. [DEFAULT] sections are part of the digest of every service.
+    """
+    digests = {}
+    if not index.size:
+        return digests
+
+    with open(index.path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            defaults = hashlib.blake2b(digest_size=16)
+            for start, end in index.default_spans:
+                defaults.update(buffer[start:end])
+            for name, (start, end) in index.spans.items():
+                digest = defaults.copy()
+                digest.update(buffer[start:end])
+                digests[name] = digest.digest()
+
+    return digests
+
+
+def _format_setting(key: str, value: str, newline: str, indent: str = "") -> str:
+    # Like ConfigParser.write(space_around_delimiters=False), continuation
+    # lines being indented deeper than the setting line
+    return "{indent}{}={}{}".format(
+        key, str(value).replace("\n", "\n{}\t".format(indent)), newline, indent=indent
+    )
+
+
+def _indent(line: str) -> str:
+    return line[: len(line) - len(line.lstrip())]
+
+
+def patch_section(section: str, service_name: str, settings: dict) -> str:
+    """
+    Update the settings of a section text, line by line.
+
+    Unchanged settings, comments and blank lines are kept as is, removed
+    settings are dropped and new ones are added after the last setting.
+    Lines are told apart with the configparser rules: a line is the
+    continuation of a multiline value only if indented deeper than the
+    setting line, so indented settings are settings. Written settings
+    keep the indentation of the line they replace.
+    """
+    current_settings = parse_section(section, service_name)
+
+    lines = list(io.StringIO(section, newline=""))  # Universal newlines, kept as is
+    newline = "\r\n" if lines[0].endswith("\r\n") else "\n"
+    patched = [lines[0]]
+    written = set()
+    insert_at = 1
+    indent = _indent(lines[0])  # Of new settings, like the last setting line
+    option = False  # Whether the last setting line had a name, so might be continued
+    indent_level = 0
+    skip_continuation = False
+    for line in lines[1:]:
+        stripped = line.strip()
+        if not stripped or stripped.startswith(_COMMENT_PREFIXES):
+            patched.append(line)  # Blank lines do not end multiline values
+            continue
+
+        line_indent = _indent(line)
+        if option and len(line_indent) > indent_level:
+            # Continuation of a multiline value
+            if not skip_continuation:
+                patched.append(line)
+                insert_at = len(patched)
+            continue
+
+        indent_level = len(line_indent)
+        skip_continuation = False
+        delimiter = _DELIMITERS_RE.search(stripped)
+        if delimiter is None:
+            patched.append(line)  # Invalid line, configparser does not read it either
+            continue
+
+        key = stripped[: delimiter.start()].strip().lower()
+        option = bool(key)
+        indent = line_indent
+        if key not in settings:
+            skip_continuation = True
+            continue
+
+        written.add(key)
+        if current_settings.get(key) == settings[key]:
+            patched.append(line)
+        else:
+            patched.append(_format_setting(key, settings[key], newline, line_indent))
+            skip_continuation = True
+        insert_at = len(patched)
+
+    if insert_at > 0 and not patched[insert_at - 1].endswith(("\n", "\r")):
+        patched[insert_at - 1] += newline
+    patched[insert_at:insert_at] = [
+        _format_setting(key, value, newline, indent)
+        for key, value in settings.items()
+        if key not in written
+    ]
+    return "".join(patched)
+
+
+def _dedent_header(chunk: bytes) -> bytes:
+    """
+    Remove the indentation of the header starting a chunk: an indented header
+    could be read as the continuation of a less indented setting before it,
+    never a header at the line start.
+    """
+    return _INDENT_RE.sub(b"", chunk, count=1)
+
+
+def _new_section(tail: bytes, service_name: str, settings: dict, encoding: str) -> tuple:
+    """
+    :param tail: last bytes of the file the section is appended to
+    :return: (separator, section) bytes, the separator keeping a blank
+             line between sections like configparser
+    """
+    separator = b"" if tail in (b"", b"\n\n") else b"\n" if tail.endswith(b"\n") else b"\n\n"
+    section = "[{}]\n{}\n".format(
+        service_name,
+        "".join(_format_setting(key, value, "\n") for key, value in settings.items()),
+    ).encode(encoding)
+    return separator, separator + section
+
+
+def write_section(
+    index: SectionIndex, service_name: str, settings: dict, signature: tuple | None = None
+) -> SectionIndex:
+    """
+    Replace the settings of a service, splicing its section into the
+    untouched bytes of the rest of the file. The service is appended if
+    it does not exist yet.
+
+    :param signature: stat_signature() of the file when it was indexed,
+                      checked against the opened file before splicing
+    :return: the index of the written file
+    :raises StaleIndexError: when the file changed since it was indexed
+    """
+    encoding = _encoding()
+    with open(index.path, "rb") as f:
+        if signature is not None and stat_signature(index.path, os.fstat(f.fileno())) != signature:
+            raise StaleIndexError(str(index.path))
+
+        if index.size:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = b""
+
+        if service_name in index.spans:
+            start, end = index.spans[service_name]
+            section = buffer[start:end].decode(encoding)
+            new_section = patch_section(section, service_name, settings).encode(encoding)
+            new_index = index.shifted(service_name, len(new_section))
+            rest = buffer[end:]
+            dedented = _dedent_header(rest)
+            if len(dedented) != len(rest):
+                # Rare enough to index the whole content again
+                rest = dedented
+                new_index = index_bytes(index.path, buffer[:start] + new_section + rest)
+        else:
+            start = index.size
+            rest = b""
+            separator, new_section = _new_section(buffer[-2:], service_name, settings, encoding)
+            new_index = index.appended(service_name, len(separator), len(new_section))
+
+        try:
+            write_atomically(index.path, buffer[:start], new_section, rest)
+        finally:
+            if index.size:
+                buffer.close()
+
+    return new_index
+
+
+def _tail(chunks: list[bytes]) -> bytes:
+    """Last two bytes of the chunks once joined."""
+    tail = b""
+    for chunk in reversed(chunks):
+        tail = chunk[-2:] + tail
+        if len(tail) >= 2:
+            return tail[-2:]
+    return tail
+
+
+def rewrite_sections(index: SectionIndex, data: bytes, changes: dict[str, dict | None]) -> bytes:
+    """
+    Apply changes to many sections of a service file content at once.
+    Sections are patched line by line, so comments, blank lines and
+    untouched sections are kept as is.
+
+    :param index: index of data
+    :param changes: new settings by service name, None to remove the
+                    service; services not in the index yet are appended,
+                    in order
+    :return: the new file content
+    """
+    encoding = _encoding()
+    spans = sorted(
+        [(start, end, name) for name, (start, end) in index.spans.items()]
+        + [(start, end, None) for start, end in index.default_spans]
+    )
+    chunks = [data[: spans[0][0]] if spans else data]
+    dedent = False
+    for start, end, name in spans:
+        if name is None or name not in changes:
+            chunk = data[start:end]
+        elif changes[name] is not None:
+            section = data[start:end].decode(encoding)
+            chunk = patch_section(section, name, changes[name]).encode(encoding)
+        else:
+            dedent = True  # The next header now follows the settings of another section
+            continue
+
+        if dedent:
+            chunk = _dedent_header(chunk)
+        # Settings of a patched section may be less indented than the next header
+        dedent = name is not None and name in changes
+        chunks.append(chunk)
+
+    for name, settings in changes.items():
+        if name not in index.spans and settings is not None:
+            chunks.append(_new_section(_tail(chunks), name, settings, encoding)[1])
+
+    return b"".join(chunks)
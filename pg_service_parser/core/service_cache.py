@@ -0,0 +1,339 @@
+import locale
+import os
+import threading
+from functools import wraps
+from pathlib import Path
+
+from pg_service_parser.core.atomic_file import ensure_writable
+from pg_service_parser.core.index_cache import load_digests, load_index, store_index
+from pg_service_parser.core.section_index import (
+    SectionIndex,
+    StaleIndexError,
+    build_section_index,
+    index_bytes,
+    parse_config,
+    section_digests,
+    stat_signature,
+    write_section,
+)
+from pg_service_parser.libs import pgserviceparser
+from pg_service_parser.libs.pgserviceparser import conf_path
+from pg_service_parser.libs.pgserviceparser.exceptions import (
+    ServiceFileNotFound,
+    ServiceNotFound,
+)
+
+
+class ServiceSnapshot:
+    """
+    Content of a service file, valid for a given file signature.
+
+    Service names come from the section index, settings are parsed on
+    demand: one section at a time with config(), or all at once with configs.
+    """
+
+    def __init__(self, path: Path, signature: tuple, index: SectionIndex):
+        self.path = path
+        self.signature = signature
+        self.index = index
+        self.names = index.names
+        self.sorted_names = sorted(self.names, key=str.lower)
+        self.name_set = frozenset(self.names)
+        self.__configs = None  # Full parse, once needed
+        self.__sections = {}  # Sections parsed on their own, by service name
+        self.__digests = None  # Section digests, once needed
+
+    @property
+    def configs(self) -> dict[str, dict[str, str]]:
+        """
+        Settings of every service, parsed at once. If the file changed since
+        the snapshot was taken, they are the ones of the new content, cached
+        in a new snapshot.
+
+        :raises ServiceFileNotFound: when the service file was removed meanwhile
+        """
+        if self.__configs is None:
+            data, signature = _read_signed(self.path)
+            config = parse_config(data.decode(locale.getpreferredencoding(False)))
+            self.__configs = {name: dict(config[name]) for name in config.sections()}
+            if signature != self.signature:
+                current = ServiceSnapshot(self.path, signature, index_bytes(self.path, data))
+                current.__configs = self.__configs
+                _store(current)
+
+        return self.__configs
+
+    @property
+    def digests(self) -> dict[str, bytes]:
+        """Section digests, see section_digests(), kept in the index cache if enabled."""
+        if self.__digests is None:
+            self.__digests = _section_digests(self.index, self.signature)
+
+        return self.__digests
+
+    def config(self, service_name: str) -> dict[str, str]:
+        """
+        Settings of a single service, read through the section index
+        unless the whole file was already parsed.
+
+        :raises KeyError: when the service is not found
+        """
+        if self.__configs is not None:
+            return self.__configs[service_name]
+
+        if service_name not in self.__sections:
+            if service_name not in self.name_set:
+                raise KeyError(service_name)
+            self.__sections[service_name] = self.index.read_section(service_name)
+
+        return self.__sections[service_name]
+
+    def replaced(self, signature: tuple, index: SectionIndex, service_name: str):
+        """Snapshot of the file once a single service was written, keeping other parsed settings."""
+        new_snapshot = ServiceSnapshot(self.path, signature, index)
+        if self.__configs is not None:
+            configs = dict(self.__configs)
+            configs[service_name] = index.read_section(service_name)
+            new_snapshot.__configs = configs
+        else:
+            new_snapshot.__sections = {
+                name: config for name, config in self.__sections.items() if name != service_name
+            }
+
+        return new_snapshot
+
+
+# Snapshots by resolved conf file path
+_snapshots: dict[Path, ServiceSnapshot] = {}
+_snapshots_lock = threading.Lock()
+# Held by every write of the plugin to a service file, in any thread
+write_lock = threading.RLock()
+# Folder of the persistent section index cache, None if disabled
+_index_cache_dir: Path | None = None
+
+
+def set_index_cache_dir(cache_dir: Path | None) -> None:
+    """Enable (or disable with None) the persistent cache of section indexes."""
+    global _index_cache_dir
+    _index_cache_dir = Path(cache_dir) if cache_dir is not None else None
+
+
+def _section_index(path: Path, signature: tuple) -> SectionIndex:
+    if _index_cache_dir is None:
+        return build_section_index(path)
+
+    index = load_index(_index_cache_dir, path, signature)
+    if index is None:
+        index = build_section_index(path)
+        store_index(_index_cache_dir, index, signature)
+
+    return index
+
+
+def _section_digests(index: SectionIndex, signature: tuple) -> dict[str, bytes]:
+    if _index_cache_dir is None:
+        return section_digests(index)
+
+    digests = load_digests(_index_cache_dir, index.path, signature)
+    if digests is None:
+        digests = section_digests(index)
+        store_index(_index_cache_dir, index, signature, digests)
+
+    return digests
+
+
+def file_signature(path: Path) -> tuple | None:
+    """
+    Identify the current state of a file on disk.
+
+    :return: (path, mtime, size, inode) tuple or None if the file does not exist.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+
+    return stat_signature(path, stat)
+
+
+def _read_signed(path: Path) -> tuple[bytes, tuple]:
+    """:return: the content of a file and the signature of that content"""
+    try:
+        with open(path, "rb") as f:
+            signature = stat_signature(path, os.fstat(f.fileno()))
+            return f.read(), signature
+    except FileNotFoundError:
+        raise ServiceFileNotFound(pg_service_filepath=path)
+
+
+def _resolve(conf_file_path: Path | None) -> Path:
+    return Path(conf_file_path) if conf_file_path is not None else conf_path()
+
+
+def snapshot(conf_file_path: Path | None = None) -> ServiceSnapshot:
+    """
+    Return the parsed service file, reparsing it only if the
+    file signature changed since the last parse.
+
+    :raises ServiceFileNotFound: when the service file is not found
+    """
+    path = _resolve(conf_file_path)
+    signature = file_signature(path)
+    if signature is None:
+        with _snapshots_lock:
+            _snapshots.pop(path, None)
+        raise ServiceFileNotFound(pg_service_filepath=path)
+
+    current = _snapshots.get(path)
+    if current is not None and current.signature == signature:
+        return current
+
+    current = ServiceSnapshot(path, signature, _section_index(path, signature))
+    _store(current)
+    return current
+
+
+def _store(current: ServiceSnapshot) -> None:
+    with _snapshots_lock:
+        _snapshots[current.path] = current
+
+
+def cached_snapshot(conf_file_path: Path | None = None) -> ServiceSnapshot | None:
+    """
+    Return the last parsed snapshot without checking the file on disk.
+    Meant for hot paths like model data() calls.
+
+    :return: the snapshot, or None if the file was never parsed.
+    """
+    return _snapshots.get(_resolve(conf_file_path))
+
+
+def invalidate(conf_file_path: Path | None = None) -> None:
+    """
+    Drop the snapshot of the given file. To be called after every write
+    made by the plugin, since mtime granularity might hide fast rewrites.
+    """
+    with _snapshots_lock:
+        _snapshots.pop(_resolve(conf_file_path), None)
+
+
+def _invalidate_after(func):
+    """Decorator for pgserviceparser functions that write the service file."""
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with write_lock:
+            try:
+                return func(*args, **kwargs)
+            finally:
+                # Writes may target any file, so drop every snapshot
+                with _snapshots_lock:
+                    _snapshots.clear()
+
+    return wrapper
+
+
+copy_service_settings = _invalidate_after(pgserviceparser.copy_service_settings)
+create_service = _invalidate_after(pgserviceparser.create_service)
+remove_service = _invalidate_after(pgserviceparser.remove_service)
+rename_service = _invalidate_after(pgserviceparser.rename_service)
+
+
+def write_service(
+    service_name: str,
+    settings: dict,
+    conf_file_path: Path | None = None,
+    create_if_not_found: bool = False,
+) -> dict:
+    """
+    Like pgserviceparser.write_service(), but only the section of the
+    service is patched: comments and other sections are kept as is,
+    and the file is not parsed again afterwards.
+
+    :raises ServiceFileNotFound: when the service file is not found
+    :raises ServiceNotFound: when the service is not found
+    :raises PermissionError: when the service file is read-only
+    """
+    with write_lock:
+        current = snapshot(conf_file_path)
+        try:
+            index = _write_section(current, service_name, settings, create_if_not_found)
+        except StaleIndexError:
+            # Changed by another program since the last check, index it again
+            invalidate(current.path)
+            current = snapshot(conf_file_path)
+            index = _write_section(current, service_name, settings, create_if_not_found)
+
+        signature = file_signature(current.path)
+        written = current.replaced(signature, index, service_name)
+        _store(written)
+        if _index_cache_dir is not None:
+            store_index(_index_cache_dir, index, signature)
+
+    return written.config(service_name).copy()
+
+
+def _write_section(
+    current: ServiceSnapshot, service_name: str, settings: dict, create_if_not_found: bool
+) -> SectionIndex:
+    if service_name not in current.name_set and not create_if_not_found:
+        raise ServiceNotFound(
+            service_name=service_name,
+            existing_service_names=current.names,
+            pg_service_filepath=current.path,
+        )
+
+    ensure_writable(current.path)
+    try:
+        return write_section(current.index, service_name, settings, current.signature)
+    except StaleIndexError:
+        raise
+    except BaseException:
+        invalidate(current.path)
+        raise
+
+
+def service_names(
+    conf_file_path: Path | None = None, sorted_alphabetically: bool = False
+) -> list[str]:
+    """Cached version of pgserviceparser.service_names()."""
+    current = snapshot(conf_file_path)
+    return list(current.sorted_names if sorted_alphabetically else current.names)
+
+
+def service_config(service_name: str, conf_file_path: Path | None = None) -> dict:
+    """Cached version of pgserviceparser.service_config()."""
+    current = snapshot(conf_file_path)
+    if service_name not in current.name_set:
+        raise ServiceNotFound(
+            service_name=service_name,
+            existing_service_names=current.names,
+            pg_service_filepath=current.path,
+        )
+
+    return current.config(service_name).copy()
+
+
+def service_configs(conf_file_path: Path | None = None) -> dict[str, dict[str, str]]:
+    """
+    Return the config of every service, read in a single parse.
+
+    :return: dict of service settings by service name, in file order
+    """
+    current = snapshot(conf_file_path)
+    return {name: config.copy() for name, config in current.configs.items()}
+
+
+def has_service(service_name: str, conf_file_path: Path | None = None) -> bool:
+    """
+    Whether the service exists in the last parsed snapshot.
+    Never touches the disk once the file has been parsed.
+    """
+    current = cached_snapshot(conf_file_path)
+    if current is None:
+        try:
+            current = snapshot(conf_file_path)
+        except ServiceFileNotFound:
+            return False
+
+    return service_name in current.name_set
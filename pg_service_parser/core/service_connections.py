@@ -1,25 +1,36 @@
 from qgis.core import (
     Qgis,
     QgsAbstractDatabaseProviderConnection,
-    QgsDataSourceUri,
+    QgsProviderConnectionException,
     QgsProviderRegistry,
 )
 from qgis.gui import QgsGui
 from qgis.PyQt.QtCore import QSettings
 from qgis.PyQt.QtWidgets import QWidget
 
+from pg_service_parser.core.connection_index import connection_index
+
 
 def get_connections(service: str) -> dict[str, QgsAbstractDatabaseProviderConnection]:
+    """
+    Stored connections using the given service, or all of them
+    grouped by service if the service is empty.
+    """
     res = {}
     provider = QgsProviderRegistry.instance().providerMetadata("postgres")
-    conns = provider.connections()
-    for key, pg_conn in conns.items():
-        if service == "" or QgsDataSourceUri(pg_conn.uri()).service() == service:
-            res[key] = pg_conn
+    for name in connection_index().connection_names(service):
+        try:
+            res[name] = provider.findConnection(name)
+        except QgsProviderConnectionException:
+            pass  # Removed meanwhile, the index will be updated by the provider signal
 
     return res
 
 
+def connection_count(service: str) -> int:
+    return connection_index().connection_count(service)
+
+
 def create_connection(service: str, connection_name: str) -> None:
     config = {}
     uri = f"service='{service}'"
@@ -57,19 +68,24 @@ def rename_service_in_connections(old_service: str, new_service: str) -> int:
 
     Returns the number of connections updated.
     """
-    provider = QgsProviderRegistry.instance().providerMetadata("postgres")
     count = 0
-    for name, conn in provider.connections().items():
-        uri = QgsDataSourceUri(conn.uri())
-        if uri.service() == old_service:
-            new_uri = conn.uri().replace(f"service='{old_service}'", f"service='{new_service}'")
-            new_conn = provider.createConnection(new_uri, {})
-            provider.saveConnection(new_conn, name)
-            count += 1
+    if not old_service:
+        return count
+
+    provider = QgsProviderRegistry.instance().providerMetadata("postgres")
+    for name, conn in get_connections(old_service).items():
+        new_uri = conn.uri().replace(f"service='{old_service}'", f"service='{new_service}'")
+        new_conn = provider.createConnection(new_uri, {})
+        provider.saveConnection(new_conn, name)
+        count += 1
     return count
 
 
 def refresh_connections(iface):
+    # Connections may have been stored without provider signals (e.g.,
+    # through the PG source select widget), so rebuild our index as well.
+    connection_index().invalidate()
+
     # Refresh PG connections in the browser
     # and in the Data Source Manager.
     browser = iface.browserModel()
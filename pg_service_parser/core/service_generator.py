@@ -0,0 +1,212 @@
+"""
+Generation of service families from a template service and a parameter
+matrix, e.g., the same host and user for many databases, or the same
+database on many cluster nodes. Every combination of the parameter
+values gives a service, named after a pattern:
+
+    generator = ServiceGenerator.from_template(
+        "prod-gis", "{dbname}-{host}", parse_matrix("dbname=gis, water\\nhost=node01..node12")
+    )
+    for service in generator.preview():
+        print(service)
+    generator.commit()
+
+All services are written with a single parse and a single write, and
+only if none of their names is already used.
+"""
+
+import configparser
+import itertools
+import re
+from pathlib import Path
+
+from pg_service_parser.core.service_cache import snapshot
+from pg_service_parser.core.service_transaction import ServiceTransaction
+
+MAX_SERVICES = 10000  # Generated at once
+
+# "5432..5440", "01..12" or "node01..node12", zero padding being kept
+_RANGE_PATTERN = re.compile(r"^(?P<prefix>.*?)(?P<start>\d+)\.\.(?P=prefix)?(?P<end>\d+)$")
+
+
+def parse_values(text: str) -> list[str]:
+    """
+    Split comma separated parameter values, expanding ranges.
+
+    "gis, water" gives ["gis", "water"], "node1..3" gives ["node1", "node2", "node3"].
+    """
+    values = []
+    for item in text.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        match = _RANGE_PATTERN.match(item)
+        if match is None:
+            values.append(item)
+            continue
+
+        start, end = match["start"], match["end"]
+        width = len(start) if start.startswith("0") else 1
+        step = 1 if int(end) >= int(start) else -1
+        for number in range(int(start), int(end) + step, step):
+            values.append("{}{}".format(match["prefix"], str(number).zfill(width)))
+
+    return values
+
+
+def parse_matrix(text: str) -> dict[str, list[str]]:
+    """
+    Parse a parameter matrix, one "key=values" line per setting key.
+
+    "dbname=gis, water\\nport=5432..5433" gives
+    {"dbname": ["gis", "water"], "port": ["5432", "5433"]}.
+    """
+    parameters = {}
+    for line in text.splitlines():
+        key, sep, values = line.partition("=")
+        key = key.strip().lower()
+        if sep and key:
+            parameters.setdefault(key, []).extend(parse_values(values))
+
+    return parameters
+
+
+class GeneratedService:
+    """A service to generate, colliding if its name is already used."""
+
+    __slots__ = ("name", "settings", "collision")
+
+    def __init__(self, name: str, settings: dict[str, str], collision: bool = False):
+        self.name = name
+        self.settings = settings
+        self.collision = collision
+
+    def __repr__(self):
+        return "GeneratedService({!r}, {!r}, {!r})".format(
+            self.name, self.settings, self.collision
+        )
+
+
+class ServiceGenerator:
+    """Services from a template service, one per combination of parameter values."""
+
+    def __init__(
+        self,
+        template_settings: dict[str, str],
+        name_pattern: str,
+        parameters: dict[str, list[str]],
+    ):
+        """
+        :param template_settings: settings shared by the generated services
+        :param name_pattern: service name pattern, e.g., "{dbname}-{host}", referring
+                             to any setting of the generated services
+        :param parameters: values of the settings to vary, by setting key
+        """
+        self.template_settings = dict(template_settings)
+        self.name_pattern = name_pattern.strip()
+        self.parameters = {
+            key.lower(): list(dict.fromkeys(values)) for key, values in parameters.items()
+        }
+
+    @classmethod
+    def from_template(
+        cls,
+        template_name: str,
+        name_pattern: str,
+        parameters: dict[str, list[str]],
+        conf_file_path: Path | None = None,
+    ) -> "ServiceGenerator":
+        """
+        :raises ServiceFileNotFound: when the service file is not found
+        :raises KeyError: when the template service is not found
+        """
+        return cls(snapshot(conf_file_path).config(template_name), name_pattern, parameters)
+
+    def __len__(self):
+        """Number of services to generate."""
+        count = 1
+        for values in self.parameters.values():
+            count *= len(values)
+        return count
+
+    def expand(self) -> list[tuple[str, dict[str, str]]]:
+        """
+        :return: (name, settings) of the services, in matrix order
+        :raises ValueError: when the name pattern is invalid, refers to an unknown
+                            setting or gives invalid names, or when too many
+                            services would be generated
+        """
+        if not self.name_pattern:
+            raise ValueError("The service name pattern is empty")
+        if not self.parameters or not all(self.parameters.values()):
+            return []
+        if len(self) > MAX_SERVICES:
+            raise ValueError(
+                "{} services would be generated, at most {} at once".format(
+                    len(self), MAX_SERVICES
+                )
+            )
+
+        services = []
+        keys = list(self.parameters)
+        for combination in itertools.product(*self.parameters.values()):
+            settings = dict(self.template_settings)
+            settings.update(zip(keys, combination))
+            try:
+                name = self.name_pattern.format_map(settings)
+            except KeyError as e:
+                raise ValueError("Unknown setting {} in the name pattern".format(e)) from e
+            except (IndexError, ValueError) as e:
+                raise ValueError("Invalid name pattern: {}".format(e)) from e
+            name = name.strip().replace(" ", "-")
+            if not name or any(char in name for char in "[]\r\n"):
+                raise ValueError("Invalid service name '{}'".format(name))
+            services.append((name, settings))
+
+        return services
+
+    def services(self, existing_names) -> list[GeneratedService]:
+        """
+        :param existing_names: names of the services already in the service file
+        :return: the services, flagged as colliding if their name is already
+                 used, or generated more than once
+        """
+        services = []
+        seen = set()
+        for name, settings in self.expand():
+            collision = name in existing_names or name in seen
+            seen.add(name)
+            services.append(GeneratedService(name, settings, collision))
+
+        return services
+
+    def preview(self, conf_file_path: Path | None = None) -> list[GeneratedService]:
+        """
+        Services to generate, checked against the cached service names.
+
+        :raises ServiceFileNotFound: when the service file is not found
+        """
+        return self.services(snapshot(conf_file_path).name_set)
+
+    def commit(self, conf_file_path: Path | None = None) -> list[str]:
+        """
+        Write all services at once.
+
+        :return: names of the generated services
+        :raises ServiceFileNotFound: when the service file is not found
+        :raises DuplicateSectionError: when a service name is already used,
+                                       nothing being written
+        :raises PermissionError: when the service file is read-only
+        """
+        current = snapshot(conf_file_path)
+        services = self.services(current.name_set)
+        for service in services:
+            if service.collision:
+                raise configparser.DuplicateSectionError(service.name, str(current.path))
+
+        with ServiceTransaction(conf_file_path) as transaction:
+            for service in services:
+                transaction.create(service.name, service.settings, exist_ok=False)
+
+        return [service.name for service in services]
@@ -0,0 +1,148 @@
+from pathlib import Path
+
+from qgis.core import QgsDataSourceUri
+
+from pg_service_parser.core.datasource import (
+    DEFAULT_VALUES,
+    SWITCHABLE_KEYS,
+    exact_match_key,
+)
+from pg_service_parser.core.service_cache import ServiceSnapshot, snapshot
+
+
+def uri_settings(uri: QgsDataSourceUri) -> dict[str, str]:
+    """Connection settings of a data source URI, named after the service keys."""
+    return {
+        "host": uri.host(),
+        "port": uri.port(),
+        "dbname": uri.database(),
+        "user": uri.username(),
+        "password": uri.password(),
+        "sslmode": QgsDataSourceUri.encodeSslMode(uri.sslMode()),
+    }
+
+
+def switch_uri_to_service(source: str, service_name: str, config: dict[str, str]) -> str:
+    """
+    Set the service in a data source URI and remove
+    every setting that the service already provides.
+
+    :return: the resulting data source URI
+    """
+    uri = QgsDataSourceUri(source)
+    uri.setService(service_name)
+
+    if uri.host() != "" and "host" in config and uri.host() == config["host"]:
+        uri.setHost("")
+
+    if uri.port() != "" and "port" in config and uri.port() == config["port"]:
+        uri.setPort("")
+
+    sslmode = QgsDataSourceUri.encodeSslMode(uri.sslMode())
+    if sslmode != "sslprefer" and "sslmode" in config and sslmode == config["sslmode"]:
+        uri.setSslMode(QgsDataSourceUri.SslMode.SslPrefer)
+
+    if (
+        uri.database() != ""
+        and "dbname" in config  # noqa W503
+        and uri.database() == config["dbname"]  # noqa W503
+    ):
+        uri.setDatabase("")
+
+    if uri.username() != "" and "user" in config and uri.username() == config["user"]:
+        uri.setUsername("")
+
+    if (
+        uri.password() != ""
+        and "password" in config  # noqa W503
+        and uri.password() == config["password"]  # noqa W503
+    ):
+        uri.setPassword("")
+
+    return uri.uri()
+
+
+class ServiceMatch:
+    def __init__(self, service: str, data_source: str, score: int, exact: bool):
+        self.service = service
+        self.data_source = data_source
+        self.score = score  # Number of URI characters taken over by the service
+        self.exact = exact  # Whether the service has the same host, port, dbname, user, sslmode
+
+
+class ServiceMatchIndex:
+    """
+    Index of services by connection settings, built from a single
+    parse of the service file.
+
+    Exact matches are found with one lookup by (host, port, dbname, user, sslmode).
+    Near matches are the services sharing at least one setting with the URI.
+    """
+
+    def __init__(self, service_snapshot: ServiceSnapshot):
+        self.snapshot = service_snapshot
+        self.__positions = {}  # Service name -> position in the file
+        self.__exact = {}  # (host, port, dbname, user, sslmode) -> [service names]
+        self.__postings = {}  # (key, value) -> [service names]
+
+        for position, (name, config) in enumerate(service_snapshot.configs.items()):
+            self.__positions[name] = position
+            self.__exact.setdefault(exact_match_key(config), []).append(name)
+            for key in SWITCHABLE_KEYS:
+                if config.get(key):
+                    self.__postings.setdefault((key, config[key]), []).append(name)
+
+    def __rank(self, source: str, names, exact_names) -> list[ServiceMatch]:
+        matches = []
+        for name in sorted(set(names), key=self.__positions.__getitem__):
+            data_source = switch_uri_to_service(source, name, self.snapshot.configs[name])
+            score = len(source) - (len(data_source) - len(name))
+            if score > 0:
+                matches.append(ServiceMatch(name, data_source, score, name in exact_names))
+
+        # Stable sort keeps the file order between equally good services
+        matches.sort(key=lambda match: (not match.exact, -match.score))
+        return matches
+
+    def ranked_matches(self, source: str) -> list[ServiceMatch]:
+        """
+        Services that could replace settings of the given data source,
+        exact matches first, then by number of characters taken over.
+        """
+        settings = uri_settings(QgsDataSourceUri(source))
+        exact_names = set(self.__exact.get(exact_match_key(settings), ()))
+
+        names = list(exact_names)
+        default_postings = []
+        for key in SWITCHABLE_KEYS:
+            value = settings[key]
+            if not value:
+                continue
+            if value == DEFAULT_VALUES.get(key):
+                # Shared by most services, only worth ranking if nothing else matches
+                default_postings.append((key, value))
+            else:
+                names.extend(self.__postings.get((key, value), ()))
+
+        if not names:
+            for posting in default_postings:
+                names.extend(self.__postings.get(posting, ()))
+
+        return self.__rank(source, names, exact_names)
+
+    def best_match(self, source: str) -> ServiceMatch | None:
+        matches = self.ranked_matches(source)
+        return matches[0] if matches else None
+
+
+_match_index = None
+
+
+def match_index(conf_file_path: Path | None = None) -> ServiceMatchIndex:
+    """Match index of the current service file, rebuilt only when the file changes."""
+    global _match_index
+    current = snapshot(conf_file_path)
+    if _match_index is None or _match_index.snapshot is not current:
+        _match_index = ServiceMatchIndex(current)
+
+    return _match_index
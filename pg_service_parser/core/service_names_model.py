@@ -0,0 +1,322 @@
+import bisect
+
+from qgis.PyQt.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    Qt,
+    QTimer,
+    pyqtSignal,
+    pyqtSlot,
+)
+
+from pg_service_parser.core.service_cache import snapshot
+from pg_service_parser.core.service_search import PREFIX_MATCH, ServiceNameIndex
+from pg_service_parser.core.service_watcher import ServiceDiff, service_file_watcher
+from pg_service_parser.core.setting_index import SettingIndex, parse_query
+from pg_service_parser.libs.pgserviceparser.exceptions import ServiceFileNotFound
+
+
+class ServiceNamesModel(QAbstractListModel):
+    """
+    Service names sorted alphabetically, after an empty first row (no
+    service). Kept up-to-date row by row from the service file watcher,
+    so that combos, completers and delegates can share a single list.
+    """
+
+    ServiceNameRole = Qt.ItemDataRole.UserRole
+
+    settings_changed = pyqtSignal(list)  # Services whose settings changed
+
+    def __init__(self, parent: QObject = None):
+        super().__init__(parent)
+        self.__names = [""]
+        self.__keys = [""]  # Lowercase names, for bisect lookups
+        self.__name_set = set()
+        self.__search_index = None  # Built on first search
+        self.__setting_index = None  # Built on first query of settings
+        self.reset()
+
+        service_file_watcher().services_changed.connect(self.__services_changed)
+
+    def reset(self):
+        """Reload all names from the service file snapshot."""
+        try:
+            names = snapshot().sorted_names
+        except ServiceFileNotFound:
+            names = []
+
+        self.beginResetModel()
+        self.__names = [""] + names
+        self.__keys = [name.lower() for name in self.__names]
+        self.__name_set = set(names)
+        self.__search_index = None
+        self.__setting_index = None
+        self.endResetModel()
+
+    def row(self, service_name: str) -> int:
+        """:return: the row of the service, or -1 if unknown"""
+        if service_name not in self.__name_set:
+            return -1
+
+        key = service_name.lower()
+        row = bisect.bisect_left(self.__keys, key, 1)
+        while self.__names[row] != service_name:
+            row += 1  # Names only differing by case
+        return row
+
+    def contains(self, service_name: str) -> bool:
+        return service_name in self.__name_set
+
+    def service_names(self) -> list[str]:
+        return self.__names[1:]
+
+    def search_index(self) -> ServiceNameIndex:
+        if self.__search_index is None:
+            self.__search_index = ServiceNameIndex(self.__names[1:])
+        return self.__search_index
+
+    def setting_index(self) -> SettingIndex:
+        """Services by setting value, parsing the whole service file on first use."""
+        if self.__setting_index is None:
+            try:
+                configs = snapshot().configs
+            except ServiceFileNotFound:
+                configs = {}
+            self.__setting_index = SettingIndex(configs)
+        return self.__setting_index
+
+    def __update_setting_index(self, diff: ServiceDiff):
+        if self.__setting_index is None:
+            return
+
+        for name in diff.removed:
+            self.__setting_index.remove_service(name)
+        try:
+            current = snapshot()
+            for name in diff.added + diff.changed:
+                self.__setting_index.set_service(name, current.config(name))
+        except (ServiceFileNotFound, KeyError):
+            self.__setting_index = None  # Changed again meanwhile, rebuilt when needed
+
+    @pyqtSlot(object)
+    def __services_changed(self, diff: ServiceDiff):
+        # Settings first, for views filtering rows by setting
+        self.__update_setting_index(diff)
+
+        for name in diff.removed:
+            row = self.row(name)
+            if row == -1:
+                continue
+            # Already unknown to views reacting to the removal of the row
+            self.__name_set.discard(name)
+            if self.__search_index is not None:
+                self.__search_index.remove(name)
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.__names[row]
+            del self.__keys[row]
+            self.endRemoveRows()
+
+        for name in diff.added:
+            if name in self.__name_set:
+                continue
+            key = name.lower()
+            row = bisect.bisect(self.__keys, key, 1)
+            self.__name_set.add(name)
+            if self.__search_index is not None:
+                self.__search_index.add(name)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.__names.insert(row, name)
+            self.__keys.insert(row, key)
+            self.endInsertRows()
+
+        if diff.changed:
+            self.settings_changed.emit(diff.changed)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.__names)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role in (
+            Qt.ItemDataRole.DisplayRole,
+            Qt.ItemDataRole.EditRole,
+            self.ServiceNameRole,
+        ):
+            return self.__names[index.row()]
+
+        return None
+
+
+class ServiceSearchModel(QAbstractListModel):
+    """
+    Services of a ServiceNamesModel matching a search text, best matches
+    first, without the empty row. Filtering is debounced while typing and
+    changes of the service names are applied row by row.
+
+    The search text may contain "key=pattern" terms to only list services
+    having matching setting values, e.g., "prod host=db-prod-* port=5433".
+    """
+
+    SEARCH_DELAY = 150  # ms
+
+    ServiceNameRole = ServiceNamesModel.ServiceNameRole
+
+    def __init__(self, source: ServiceNamesModel, parent: QObject = None):
+        super().__init__(parent)
+        self.__source = source
+        self.__filter_text = ""
+        self.__query = ""  # Normalized service name search
+        self.__terms = []  # Setting (key, pattern) terms
+        self.__pending_text = ""
+        self.__ranks = self.__search_ranks()  # Sorted rank keys of the rows
+
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(self.SEARCH_DELAY)
+        self.__timer.timeout.connect(self.__apply_pending_filter)
+
+        source.rowsInserted.connect(self.__source_rows_inserted)
+        source.rowsAboutToBeRemoved.connect(self.__source_rows_about_to_be_removed)
+        source.modelReset.connect(self.__search)
+        source.settings_changed.connect(self.__settings_changed)
+
+    def filter_text(self) -> str:
+        return self.__filter_text
+
+    def set_filter(self, text: str):
+        self.__timer.stop()
+        name_text, terms = parse_query(text)
+        query = ServiceNameIndex.normalized_query(name_text)
+        self.__filter_text = text.strip()
+        if (query, terms) != (self.__query, self.__terms):
+            self.__query = query
+            self.__terms = terms
+            self.__search()
+
+    @pyqtSlot(str)
+    def filter_later(self, text: str):
+        """Filter once the text did not change for SEARCH_DELAY."""
+        self.__pending_text = text
+        self.__timer.start()
+
+    @pyqtSlot()
+    def __apply_pending_filter(self):
+        self.set_filter(self.__pending_text)
+
+    def __search_ranks(self) -> list[tuple]:
+        services = None
+        if self.__terms:
+            services = self.__source.setting_index().find_all(self.__terms)
+
+        if not self.__query:
+            # No need to build the search index yet
+            if services is None:
+                names = self.__source.service_names()
+            else:
+                names = [name for name in services if self.__source.contains(name)]
+            return sorted((PREFIX_MATCH, 0, name.lower(), name) for name in names)
+
+        ranks = self.__source.search_index().search(self.__query)
+        if services is None:
+            return ranks
+        return [rank for rank in ranks if rank[3] in services]
+
+    def __rank(self, service_name: str) -> tuple | None:
+        if self.__terms and not self.__source.setting_index().matches(service_name, self.__terms):
+            return None
+        return ServiceNameIndex.rank(service_name, self.__query)
+
+    @pyqtSlot(list)
+    def __settings_changed(self, service_names):
+        if self.__terms:
+            self.__search()
+
+    @pyqtSlot()
+    def __search(self):
+        self.beginResetModel()
+        self.__ranks = self.__search_ranks()
+        self.endResetModel()
+
+    def service_names(self) -> list[str]:
+        """:return: names of the services listed, best matches first"""
+        return [rank[3] for rank in self.__ranks]
+
+    def row(self, service_name: str) -> int:
+        """:return: the row of the service, or -1 if filtered out or unknown"""
+        return self.__row(self.__rank(service_name))
+
+    def __row(self, rank: tuple | None) -> int:
+        if rank is None:
+            return -1
+
+        row = bisect.bisect_left(self.__ranks, rank)
+        if row < len(self.__ranks) and self.__ranks[row] == rank:
+            return row
+        return -1
+
+    @pyqtSlot(QModelIndex, int, int)
+    def __source_rows_inserted(self, parent, first, last):
+        for source_row in range(first, last + 1):
+            name = self.__source.index(source_row, 0).data(self.ServiceNameRole)
+            rank = self.__rank(name) if name else None
+            if rank is None:
+                continue
+            row = bisect.bisect(self.__ranks, rank)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.__ranks.insert(row, rank)
+            self.endInsertRows()
+
+    @pyqtSlot(QModelIndex, int, int)
+    def __source_rows_about_to_be_removed(self, parent, first, last):
+        for source_row in range(first, last + 1):
+            name = self.__source.index(source_row, 0).data(self.ServiceNameRole)
+            # Settings of removed services are already unindexed
+            row = self.__row(ServiceNameIndex.rank(name, self.__query)) if name else -1
+            if row == -1:
+                continue
+            self.beginRemoveRows(QModelIndex(), row, row)
+            del self.__ranks[row]
+            self.endRemoveRows()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.__ranks)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role in (
+            Qt.ItemDataRole.DisplayRole,
+            Qt.ItemDataRole.EditRole,
+            self.ServiceNameRole,
+        ):
+            return self.__ranks[index.row()][3]
+
+        return None
+
+
+_service_names_model = None
+
+
+def service_names_model() -> ServiceNamesModel:
+    """Shared model of the service names."""
+    global _service_names_model
+    if _service_names_model is None:
+        _service_names_model = ServiceNamesModel()
+
+    return _service_names_model
+
+
+def dispose_service_names_model() -> None:
+    """Delete the shared model, e.g., when the plugin is unloaded."""
+    global _service_names_model
+    if _service_names_model is not None:
+        _service_names_model.deleteLater()
+        _service_names_model = None
@@ -0,0 +1,130 @@
+"""
+Index of service names for search as you type.
+
+Prefix matches are a range of the sorted names, substring matches are
+looked up through trigrams and fuzzy (subsequence) matches through the
+characters of the names, so that only candidates are ever scanned.
+"""
+
+import bisect
+import functools
+import re
+
+PREFIX_MATCH = 0
+SUBSTRING_MATCH = 1
+FUZZY_MATCH = 2
+
+
+def _trigrams(key: str) -> set[str]:
+    return {key[i : i + 3] for i in range(len(key) - 2)}
+
+
+@functools.lru_cache(maxsize=32)
+def _fuzzy_pattern(query: str) -> re.Pattern:
+    return re.compile(".*?".join(re.escape(char) for char in query))
+
+
+class ServiceNameIndex:
+    """Prefix, trigram and character index of service names, updated incrementally."""
+
+    def __init__(self, names: list[str] = ()):
+        self.__keys = sorted((name.lower(), name) for name in names)
+        self.__trigrams = {}  # Trigram -> names
+        self.__chars = {}  # Character -> names
+        for key, name in self.__keys:
+            self.__index(key, name)
+
+    def __index(self, key: str, name: str):
+        for trigram in _trigrams(key):
+            self.__trigrams.setdefault(trigram, set()).add(name)
+        for char in set(key):
+            self.__chars.setdefault(char, set()).add(name)
+
+    def __len__(self):
+        return len(self.__keys)
+
+    def add(self, name: str):
+        key = name.lower()
+        row = bisect.bisect_left(self.__keys, (key, name))
+        if row < len(self.__keys) and self.__keys[row] == (key, name):
+            return
+
+        self.__keys.insert(row, (key, name))
+        self.__index(key, name)
+
+    def remove(self, name: str):
+        key = name.lower()
+        row = bisect.bisect_left(self.__keys, (key, name))
+        if row == len(self.__keys) or self.__keys[row] != (key, name):
+            return
+
+        del self.__keys[row]
+        for index, parts in ((self.__trigrams, _trigrams(key)), (self.__chars, set(key))):
+            for part in parts:
+                names = index[part]
+                names.discard(name)
+                if not names:
+                    del index[part]
+
+    @staticmethod
+    def normalized_query(text: str) -> str:
+        return text.strip().lower()
+
+    @staticmethod
+    def rank(name: str, query: str) -> tuple | None:
+        """
+        Sort key of a service name for a normalized query, best matches first:
+        prefix matches, then substring matches by position, then fuzzy
+        matches by compactness. Ties are sorted alphabetically.
+
+        :return: the sort key, or None if the name does not match
+        """
+        key = name.lower()
+        if key.startswith(query):
+            return (PREFIX_MATCH, 0, key, name)
+
+        position = key.find(query)
+        if position != -1:
+            return (SUBSTRING_MATCH, position, key, name)
+
+        match = _fuzzy_pattern(query).search(key)
+        if match:
+            return (FUZZY_MATCH, match.end() - match.start(), key, name)
+
+        return None
+
+    def __intersection(self, index: dict[str, set], parts: set[str]) -> set[str]:
+        sets = sorted((index.get(part, set()) for part in parts), key=len)
+        if not sets:
+            return set()
+        return sets[0].intersection(*sets[1:])
+
+    def search(self, query: str) -> list[tuple]:
+        """
+        :param query: normalized query, see normalized_query()
+        :return: sorted rank() keys of the matching names, all names if the query is empty
+        """
+        if not query:
+            return [(PREFIX_MATCH, 0, key, name) for key, name in self.__keys]
+
+        start = bisect.bisect_left(self.__keys, (query,))
+        end = bisect.bisect_left(self.__keys, (query + "\U0010ffff",))
+        results = [(PREFIX_MATCH, 0, key, name) for key, name in self.__keys[start:end]]
+        found = {name for _key, name in self.__keys[start:end]}
+
+        if len(query) >= 3:
+            for name in self.__intersection(self.__trigrams, _trigrams(query)) - found:
+                key = name.lower()
+                position = key.find(query)
+                if position != -1:
+                    results.append((SUBSTRING_MATCH, position, key, name))
+                    found.add(name)
+
+        # Names having all the characters of the query, in any order
+        for name in self.__intersection(self.__chars, set(query)) - found:
+            rank = self.rank(name, query)
+            if rank is not None:
+                results.append(rank)
+
+        results.sort()
+        return results
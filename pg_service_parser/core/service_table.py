@@ -0,0 +1,204 @@
+"""
+Settings of many services at once, stored column by column to edit them
+as a grid: one array per setting key holding, for each service, the code
+of its value in a pool of distinct values for that key. Values repeated
+across services (hosts, ports, sslmodes...) are stored once, and
+filtering or sorting by a column works on distinct values only.
+
+Edits are kept apart from the columns until saved, all at once:
+
+    table = ServiceTable.from_file()
+    table.set_value(table.row("prod-gis"), "port", "5433")
+    table.save()
+"""
+
+import sys
+from array import array
+from pathlib import Path
+
+from pg_service_parser.conf.service_settings import service_settings_catalog
+from pg_service_parser.core.service_cache import snapshot
+from pg_service_parser.core.service_transaction import ServiceTransaction
+from pg_service_parser.core.setting_index import value_matches
+
+MISSING = 0  # Value code of services not having a setting
+_UNEDITED = object()
+
+
+class ServiceTable:
+    """Columnar table of service settings, services being rows and keys columns."""
+
+    def __init__(
+        self, configs: dict[str, dict[str, str]], keys: list[str] = (), conf_file_path=None
+    ):
+        """
+        :param configs: settings by service name, as parsed from a service file
+        :param keys: setting keys to show as columns even if no service has them
+        :param conf_file_path: service file to save edits to, the default one if None
+        """
+        self.__conf_file_path = conf_file_path
+        self.__names = list(configs)
+        self.__rows = {name: row for row, name in enumerate(self.__names)}
+
+        used_keys = dict.fromkeys(key for settings in configs.values() for key in settings)
+        used_keys.update(dict.fromkeys(keys))
+        catalog_keys = service_settings_catalog().keys
+        self.__keys = [key for key in catalog_keys if key in used_keys]
+        self.__keys.extend(sorted(key for key in used_keys if key not in catalog_keys))
+
+        self.__pools = {key: [None] for key in self.__keys}  # Key -> values by code
+        self.__codes = {key: {} for key in self.__keys}  # Key -> codes by value
+        self.__columns = {key: array("I", [MISSING]) * len(self.__names) for key in self.__keys}
+        for row, settings in enumerate(configs.values()):
+            for key, value in settings.items():
+                self.__columns[key][row] = self.__code(key, value)
+
+        self.__edits = {}  # (row, key) -> value, None for removed settings
+
+    @classmethod
+    def from_file(
+        cls, conf_file_path: Path | None = None, service_names: list[str] | None = None
+    ) -> "ServiceTable":
+        """
+        Table of the services of a service file, from its cached snapshot.
+
+        :param service_names: services to put in the table, all if None
+        :raises ServiceFileNotFound: when the service file is not found
+        """
+        configs = snapshot(conf_file_path).configs
+        if service_names is not None:
+            configs = {name: configs[name] for name in service_names if name in configs}
+        return cls(configs, ("host", "port", "dbname", "user"), conf_file_path)
+
+    def __code(self, key: str, value: str) -> int:
+        codes = self.__codes[key]
+        code = codes.get(value)
+        if code is None:
+            value = sys.intern(str(value))
+            code = codes[value] = len(self.__pools[key])
+            self.__pools[key].append(value)
+        return code
+
+    def __len__(self):
+        return len(self.__names)
+
+    def keys(self) -> list[str]:
+        return list(self.__keys)
+
+    def service_name(self, row: int) -> str:
+        return self.__names[row]
+
+    def row(self, service_name: str) -> int:
+        """:return: row of a service, -1 if not in the table"""
+        return self.__rows.get(service_name, -1)
+
+    def original_value(self, row: int, key: str) -> str | None:
+        """:return: value as last read or saved, None if missing"""
+        return self.__pools[key][self.__columns[key][row]]
+
+    def value(self, row: int, key: str) -> str | None:
+        """:return: value, edited or not, None if missing"""
+        edit = self.__edits.get((row, key), _UNEDITED)
+        if edit is not _UNEDITED:
+            return edit
+        return self.original_value(row, key)
+
+    def set_value(self, row: int, key: str, value: str | None) -> bool:
+        """
+        Edit a value, None removing the setting.
+
+        :return: whether the value is now different from the saved one
+        """
+        if value == self.original_value(row, key):
+            self.__edits.pop((row, key), None)
+            return False
+
+        self.__edits[(row, key)] = value
+        return True
+
+    def is_edited(self, row: int, key: str) -> bool:
+        return (row, key) in self.__edits
+
+    def edit_count(self) -> int:
+        return len(self.__edits)
+
+    def values(self, key: str) -> list[str]:
+        """Distinct saved values of a setting."""
+        return self.__pools[key][1:]
+
+    def filter_rows(self, rows: list[int], key: str, pattern: str) -> list[int]:
+        """
+        :param pattern: value or wildcard pattern, matched ignoring case; an empty
+                        pattern keeps the rows missing the setting
+        :return: rows whose value of a setting matches a pattern, in the same order
+        """
+        pool = self.__pools[key]
+        if pattern:
+            codes = {code for code in range(1, len(pool)) if value_matches(pool[code], pattern)}
+        else:
+            codes = {MISSING}
+        column = self.__columns[key]
+        edits = self.__edits
+        result = []
+        for row in rows:
+            edit = edits.get((row, key), _UNEDITED)
+            if edit is _UNEDITED:
+                if column[row] in codes:
+                    result.append(row)
+            elif (edit is not None and value_matches(edit, pattern)) if pattern else edit is None:
+                result.append(row)
+        return result
+
+    def sorted_rows(self, rows: list[int], key: str | None, reverse: bool = False) -> list[int]:
+        """
+        :param key: setting to sort by, service names if None; missing values
+                    sort after all others
+        :return: rows sorted by setting value or service name, ignoring case
+        """
+        if key is None:
+            return sorted(rows, key=lambda row: self.__names[row].lower(), reverse=reverse)
+
+        # Rank the distinct values once, then sort rows by rank
+        edited = {row: value for (row, edit_key), value in self.__edits.items() if edit_key == key}
+        pool = self.__pools[key]
+        values = set(pool[1:]) | {value for value in edited.values() if value is not None}
+        ranks = {value: rank for rank, value in enumerate(sorted(values, key=str.lower))}
+        ranks[None] = len(ranks)  # Missing values after all others
+        code_ranks = [ranks[value] for value in pool]
+        column = self.__columns[key]
+
+        def sort_key(row):
+            if row in edited:
+                return ranks[edited[row]]
+            return code_ranks[column[row]]
+
+        return sorted(rows, key=sort_key, reverse=reverse)
+
+    def changes(self) -> dict[str, dict[str, str | None]]:
+        """:return: edited settings by service name, None values meaning removed"""
+        changes = {}
+        for (row, key), value in self.__edits.items():
+            changes.setdefault(self.__names[row], {})[key] = value
+        return changes
+
+    def save(self) -> list[str]:
+        """
+        Write all edits to the service file at once.
+
+        :return: names of the edited services
+        :raises ServiceFileNotFound: when the service file is not found
+        :raises ServiceNotFound: when an edited service was removed from the file
+        :raises PermissionError: when the service file is read-only
+        """
+        changes = self.changes()
+        with ServiceTransaction(self.__conf_file_path) as transaction:
+            for service_name, settings in changes.items():
+                transaction.edit(service_name, settings)
+
+        for (row, key), value in self.__edits.items():
+            self.__columns[key][row] = MISSING if value is None else self.__code(key, value)
+        self.__edits.clear()
+        return list(changes)
+
+    def discard_edits(self):
+        self.__edits.clear()
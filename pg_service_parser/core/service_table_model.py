@@ -0,0 +1,202 @@
+from qgis.PyQt.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from qgis.PyQt.QtGui import QColorConstants, QFont
+
+from pg_service_parser.core.service_table import ServiceTable
+from pg_service_parser.core.setting_index import UNINDEXED_KEYS
+
+
+class ServiceTableModel(QAbstractTableModel):
+    """
+    Grid of service settings, services being rows and setting keys columns.
+
+    Rows are fetched by batches while scrolling, and can be filtered and
+    sorted by column. Edits are kept in the table until saved.
+    """
+
+    FETCH_BATCH = 200  # Rows added each time the view needs more
+
+    is_dirty_changed = pyqtSignal(bool)  # Whether the model gets dirty or not
+
+    def __init__(self, table: ServiceTable, parent=None):
+        super().__init__(parent)
+        self.__table = table
+        self.__keys = table.keys()
+        self.__rows = list(range(len(table)))  # Table rows shown, filtered and sorted
+        self.__fetched = min(len(self.__rows), self.FETCH_BATCH)
+        self.__filter = None  # (key, pattern)
+        self.__sort = None  # (column, order)
+        self.__dirty = False
+
+        self.__changed_font = QFont()
+        self.__changed_font.setItalic(True)
+
+    def table(self) -> ServiceTable:
+        return self.__table
+
+    def keys(self) -> list[str]:
+        return list(self.__keys)
+
+    def filtered_count(self) -> int:
+        """:return: number of services passing the filter, fetched or not"""
+        return len(self.__rows)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.__fetched
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.__keys)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.__fetched < len(self.__rows)
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return
+        count = min(len(self.__rows) - self.__fetched, self.FETCH_BATCH)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.__fetched, self.__fetched + count - 1)
+        self.__fetched += count
+        self.endInsertRows()
+
+    def __cell(self, index) -> tuple[int, str]:
+        return self.__rows[index.row()], self.__keys[index.column()]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row, key = self.__cell(index)
+        value = self.__table.value(row, key)
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return None
+            return "************" if key in UNINDEXED_KEYS else value
+        elif role == Qt.ItemDataRole.EditRole:
+            return value or ""
+        elif role == Qt.ItemDataRole.ToolTipRole:
+            if self.__table.is_edited(row, key) and key not in UNINDEXED_KEYS:
+                original = self.__table.original_value(row, key)
+                return self.tr("Saved value: {}").format(
+                    original if original is not None else self.tr("(none)")
+                )
+        elif role == Qt.ItemDataRole.FontRole:
+            if self.__table.is_edited(row, key):
+                return self.__changed_font
+        elif role == Qt.ItemDataRole.ForegroundRole:
+            if self.__table.is_edited(row, key):
+                return QColorConstants.DarkGreen
+
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.__keys[section]
+            elif orientation == Qt.Orientation.Vertical:
+                return self.__table.service_name(self.__rows[section])
+
+        return super().headerData(section, orientation, role)
+
+    def flags(self, idx):
+        if not idx.isValid():
+            return ~Qt.ItemFlag.ItemIsSelectable & ~Qt.ItemFlag.ItemIsEnabled
+
+        _flags = Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+        if self.__keys[idx.column()] in UNINDEXED_KEYS:
+            return _flags  # Passwords are edited service by service
+        return _flags | Qt.ItemFlag.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+
+        if not self.__set_cell(index, value):
+            return False
+
+        self.dataChanged.emit(index, index)
+        self.__update_dirty_status()
+        return True
+
+    def set_values(self, values: list[tuple[QModelIndex, str]]) -> int:
+        """
+        Edit many cells at once, e.g., when pasting.
+
+        :return: number of cells changed
+        """
+        changed = [index for index, value in values if self.__set_cell(index, value)]
+        if changed:
+            rows = [index.row() for index in changed]
+            columns = [index.column() for index in changed]
+            self.dataChanged.emit(
+                self.index(min(rows), min(columns)), self.index(max(rows), max(columns))
+            )
+            self.__update_dirty_status()
+        return len(changed)
+
+    def __set_cell(self, index, value) -> bool:
+        if not index.isValid():
+            return False
+
+        row, key = self.__cell(index)
+        if key in UNINDEXED_KEYS:
+            return False
+        value = str(value).strip() if value is not None else ""
+        value = value or None  # Empty cells have no setting
+        if value == self.__table.value(row, key):
+            return False
+
+        self.__table.set_value(row, key, value)
+        return True
+
+    def is_dirty(self):
+        return self.__dirty
+
+    def __update_dirty_status(self):
+        dirty = self.__table.edit_count() > 0
+        if dirty != self.__dirty:
+            self.__dirty = dirty
+            self.is_dirty_changed.emit(dirty)
+
+    def set_filter(self, key: str | None, pattern: str = ""):
+        """
+        Show only the services whose setting value matches a pattern.
+
+        :param key: setting to filter by, None to show all services
+        :param pattern: value or wildcard pattern, empty to show all services
+        """
+        pattern = pattern.strip()
+        self.__filter = (key, pattern) if key in self.__keys and pattern else None
+        self.__reset_rows()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.__sort = (column, order) if 0 <= column < len(self.__keys) else None
+        self.__reset_rows()
+
+    def __reset_rows(self):
+        self.beginResetModel()
+        rows = list(range(len(self.__table)))
+        if self.__filter:
+            rows = self.__table.filter_rows(rows, *self.__filter)
+        if self.__sort:
+            column, order = self.__sort
+            rows = self.__table.sorted_rows(
+                rows, self.__keys[column], order == Qt.SortOrder.DescendingOrder
+            )
+        self.__rows = rows
+        self.__fetched = min(len(rows), max(self.__fetched, self.FETCH_BATCH))
+        self.endResetModel()
+
+    def save(self) -> list[str]:
+        """
+        Write all edits to the service file at once.
+
+        :return: names of the edited services
+        """
+        edited_services = self.__table.save()
+        if self.__fetched:
+            self.dataChanged.emit(
+                self.index(0, 0), self.index(self.__fetched - 1, len(self.__keys) - 1)
+            )
+        self.__update_dirty_status()
+        return edited_services
@@ -0,0 +1,282 @@
+import configparser
+import io
+import locale
+from pathlib import Path
+
+from pg_service_parser.core.atomic_file import ensure_writable, write_atomically
+from pg_service_parser.core.section_index import (
+    index_bytes,
+    parse_config,
+    parse_section,
+    rewrite_sections,
+)
+from pg_service_parser.core.service_cache import invalidate, write_lock
+from pg_service_parser.libs.pgserviceparser import conf_path
+from pg_service_parser.libs.pgserviceparser.exceptions import (
+    ServiceFileNotFound,
+    ServiceNotFound,
+)
+
+
+class ServiceChangedError(Exception):
+    """A service setting no longer has the value it was read with."""
+
+
+def config_to_bytes(config: configparser.ConfigParser) -> bytes:
+    """Serialize a service config the way pgserviceparser writes it."""
+    stream = io.StringIO()
+    config.write(stream, space_around_delimiters=False)
+    return stream.getvalue().encode(locale.getpreferredencoding(False))
+
+
+class ServiceTransaction:
+    """
+    Stage any number of service changes and apply them to the service
+    file with a single parse, a single atomic write and a single cache
+    invalidation. Only the sections of changed services are rewritten,
+    comments and formatting being kept everywhere else.
+
+    Can be used as a context manager, committing on successful exit:
+
+        with ServiceTransaction(path) as transaction:
+            for name in names:
+                transaction.remove(name)
+    """
+
+    def __init__(self, conf_file_path: Path | None = None):
+        self.__conf_file_path = Path(conf_file_path) if conf_file_path else conf_path()
+        self.__operations = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        return False
+
+    def __len__(self):
+        return len(self.__operations)
+
+    def conf_file_path(self) -> Path:
+        return self.__conf_file_path
+
+    def create(self, service_name: str, settings: dict, exist_ok: bool = True):
+        """
+        Create a service, left unchanged if it already exists.
+
+        :param exist_ok: if False, fail when the service already exists
+        """
+        self.__operations.append(("create", service_name, settings.copy(), exist_ok))
+
+    def update(self, service_name: str, settings: dict, create_if_not_found: bool = False):
+        """Replace all settings of a service."""
+        self.__operations.append(("update", service_name, settings.copy(), create_if_not_found))
+
+    def rename(self, old_name: str, new_name: str):
+        self.__operations.append(("rename", old_name, new_name))
+
+    def copy(self, source_service_name: str, target_service_name: str):
+        """Copy all settings from one service to another, created if needed."""
+        self.__operations.append(("copy", source_service_name, target_service_name))
+
+    def remove(self, service_name: str, missing_ok: bool = False):
+        self.__operations.append(("remove", service_name, missing_ok))
+
+    def edit(
+        self,
+        service_name: str,
+        changes: dict[str, str | None],
+        expected: dict[str, str | None] | None = None,
+    ):
+        """
+        Set some settings of a service in place, None values removing them.
+
+        :param expected: values the settings must still have, None meaning missing
+        """
+        self.__operations.append(
+            ("edit", service_name, changes.copy(), dict(expected) if expected else {})
+        )
+
+    def apply(self, config: configparser.ConfigParser) -> None:
+        """
+        Apply the staged operations to a parsed service file.
+
+        :raises ServiceNotFound: when an operation targets a missing service
+        :raises DuplicateSectionError: when creating a service that must not exist yet
+        :raises ServiceChangedError: when an edited setting does not have the expected value
+        """
+        for operation, *args in self.__operations:
+            if operation == "create":
+                service_name, settings, exist_ok = args
+                if service_name not in config:
+                    config[service_name] = settings
+                elif not exist_ok:
+                    raise configparser.DuplicateSectionError(
+                        service_name, str(self.__conf_file_path)
+                    )
+            elif operation == "update":
+                service_name, settings, create_if_not_found = args
+                self.__check_exists(config, service_name, create_if_not_found)
+                if service_name in config:
+                    config.remove_section(service_name)
+                config[service_name] = settings
+            elif operation == "rename":
+                old_name, new_name = args
+                self.__check_exists(config, old_name)
+                settings = dict(config[old_name])
+                config.remove_section(old_name)
+                config[new_name] = settings
+            elif operation == "copy":
+                source_service_name, target_service_name = args
+                self.__check_exists(config, source_service_name)
+                config[target_service_name] = dict(config[source_service_name])
+            elif operation == "remove":
+                service_name, missing_ok = args
+                self.__check_exists(config, service_name, missing_ok)
+                config.remove_section(service_name)
+            elif operation == "edit":
+                service_name, changes, expected = args
+                self.__check_exists(config, service_name)
+                for key, value in expected.items():
+                    if config[service_name].get(key) != value:
+                        raise ServiceChangedError(
+                            "Setting '{}' of service '{}' changed".format(key, service_name)
+                        )
+                for key, value in changes.items():
+                    if value is None:
+                        config.remove_option(service_name, key)
+                    else:
+                        config.set(service_name, key, value)
+
+    def __check_exists(self, config, service_name: str, missing_ok: bool = False):
+        if service_name not in config and not missing_ok:
+            raise ServiceNotFound(
+                service_name=service_name,
+                existing_service_names=config.sections(),
+                pg_service_filepath=self.__conf_file_path,
+            )
+
+    def commit(self) -> None:
+        """
+        Write all staged operations at once. Nothing is written if any
+        operation fails.
+
+        :raises ServiceFileNotFound: when the service file is not found
+        :raises ServiceNotFound: when an operation targets a missing service
+        :raises DuplicateSectionError: when creating a service that must not exist yet
+        :raises ServiceChangedError: when an edited setting does not have the expected value
+        :raises PermissionError: when the service file is read-only
+        """
+        if not self.__operations:
+            return
+
+        (error,) = ServiceTransaction.commit_all([self])
+        if error is not None:
+            raise error
+
+    @staticmethod
+    def commit_all(transactions: list["ServiceTransaction"]) -> list[Exception | None]:
+        """
+        Commit transactions on the same service file with a single parse and
+        a single write. Each transaction is applied entirely or not at all,
+        so a failing one does not prevent the others from being written.
+
+        :return: the error of each transaction, None if it was written
+        :raises ServiceFileNotFound: when the service file is not found
+        :raises PermissionError: when the service file is read-only
+        """
+        path = transactions[0].conf_file_path()
+        with write_lock:
+            try:
+                data = path.read_bytes()
+            except FileNotFoundError:
+                raise ServiceFileNotFound(pg_service_filepath=path)
+
+            # The index and the parsed config come from the same bytes
+            index = index_bytes(path, data)
+            config = parse_config(data.decode(locale.getpreferredencoding(False)))
+            defaults = config.defaults().copy()
+            before = {name: dict(config[name]) for name in config.sections()}
+            errors = [transaction.__apply_or_restore(config) for transaction in transactions]
+
+            if any(error is None for error in errors):
+                if config.defaults() != defaults:
+                    content = config_to_bytes(config)
+                else:
+                    content = rewrite_sections(
+                        index, data, ServiceTransaction.__changes(index, data, config, before)
+                    )
+
+                ensure_writable(path)
+                try:
+                    write_atomically(path, content)
+                finally:
+                    invalidate(path)
+
+        for transaction, error in zip(transactions, errors):
+            if error is None:
+                transaction.__operations.clear()
+        return errors
+
+    def __touched_services(self) -> set[str]:
+        """:return: names of the services the operations may change"""
+        names = set()
+        for operation, *args in self.__operations:
+            if operation in ("rename", "copy"):
+                names.update(args[:2])
+            else:
+                names.add(args[0])
+
+        return names
+
+    def __apply_or_restore(self, config: configparser.ConfigParser) -> Exception | None:
+        """
+        Apply the operations, restoring the services they changed if one fails.
+
+        :return: the error, None if applied
+        """
+        names = self.__touched_services()
+        saved = {name: dict(config[name]) for name in names if config.has_section(name)}
+        try:
+            self.apply(config)
+        except Exception as e:
+            for name in names:
+                config.remove_section(name)
+                if name in saved:
+                    config[name] = saved[name]
+            return e
+
+        return None
+
+    @staticmethod
+    def __changes(index, data: bytes, config, before: dict) -> dict[str, dict | None]:
+        """
+        Settings of the services changed by the operations, None for removed
+        ones, without the settings only inherited from [DEFAULT].
+        """
+        defaults = config.defaults()
+        changes = {}
+        for name in config.sections():
+            settings = dict(config[name])
+            if before.get(name) == settings:
+                continue
+
+            own = set()
+            if name in index.spans:
+                start, end = index.spans[name]
+                section = data[start:end].decode(locale.getpreferredencoding(False))
+                own = set(parse_section(section, name))
+            # A setting now equal to its default was removed, unless left unchanged
+            previous = before.get(name, {})
+            changes[name] = {
+                key: value
+                for key, value in settings.items()
+                if defaults.get(key) != value or (key in own and previous.get(key) == value)
+            }
+
+        for name in index.names:
+            if not config.has_section(name):
+                changes[name] = None
+
+        return changes
@@ -0,0 +1,132 @@
+import configparser
+from pathlib import Path
+
+from qgis.PyQt.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal, pyqtSlot
+
+from pg_service_parser.core.service_cache import snapshot
+from pg_service_parser.libs.pgserviceparser import conf_path
+from pg_service_parser.libs.pgserviceparser.exceptions import ServiceFileNotFound
+
+
+class ServiceDiff:
+    """Services added, removed and changed in the service file."""
+
+    def __init__(self, added: list[str], removed: list[str], changed: list[str]):
+        self.added = added
+        self.removed = removed
+        self.changed = changed
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+
+class ServiceFileWatcher(QObject):
+    """
+    Watch the service file for changes, e.g., made by other applications
+    or QGIS instances, and report the services added, removed or changed
+    since the last check. Notifications are debounced, since files are
+    often written in several steps.
+    """
+
+    DEBOUNCE_DELAY = 500  # ms
+
+    services_changed = pyqtSignal(object)  # ServiceDiff
+
+    def __init__(self, conf_file_path: Path | None = None, parent: QObject = None):
+        super().__init__(parent)
+        self.__conf_file_path = Path(conf_file_path) if conf_file_path else conf_path()
+        self.__signature = None  # Signature of the snapshot the digests were computed on
+        # Read from the index cache if enabled, instead of hashing the whole file at startup
+        self.__digests = self.__current_digests() or {}
+
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(self.DEBOUNCE_DELAY)
+        self.__timer.timeout.connect(self.check)
+
+        self.__watcher = QFileSystemWatcher(self)
+        self.__watcher.fileChanged.connect(self.__path_changed)
+        # Only watched while the file is missing, to see it being created
+        self.__watcher.directoryChanged.connect(self.__path_changed)
+        self.__watch()
+
+    @pyqtSlot(str)
+    def __path_changed(self, path):
+        self.__timer.start()  # Restart the debounce delay
+
+    def __watch(self):
+        """
+        Watch the file itself, or its folder while it does not exist: the
+        folder may be a busy one, e.g., the home folder for ~/.pg_service.conf.
+        Atomic replaces drop the file from the watch list, it is added again
+        at the next check.
+        """
+        file_path = str(self.__conf_file_path)
+        folder_path = str(self.__conf_file_path.parent)
+        if self.__conf_file_path.exists():
+            if file_path not in self.__watcher.files():
+                self.__watcher.addPath(file_path)
+            if folder_path in self.__watcher.directories():
+                self.__watcher.removePath(folder_path)
+        else:
+            if file_path in self.__watcher.files():
+                self.__watcher.removePath(file_path)
+            if folder_path not in self.__watcher.directories() and Path(folder_path).is_dir():
+                self.__watcher.addPath(folder_path)
+
+    def __current_digests(self) -> dict[str, bytes] | None:
+        """
+        :return: section digests, or None if unchanged since the last check or unreadable
+        """
+        try:
+            current = snapshot(self.__conf_file_path)
+            if current.signature == self.__signature:
+                return None
+            digests = current.digests
+            self.__signature = current.signature
+            return digests
+        except ServiceFileNotFound:
+            self.__signature = None
+            return {}
+        except (OSError, configparser.Error):
+            # Probably being written, wait for the next notification
+            return None
+
+    @pyqtSlot()
+    def check(self):
+        """Compare the service file with the last check, without waiting for notifications."""
+        self.__timer.stop()
+        self.__watch()  # The file is dropped from the watch list when replaced
+
+        digests = self.__current_digests()
+        if digests is None:
+            return
+
+        previous, self.__digests = self.__digests, digests
+        diff = ServiceDiff(
+            [name for name in digests if name not in previous],
+            [name for name in previous if name not in digests],
+            [name for name in digests if name in previous and previous[name] != digests[name]],
+        )
+        if diff:
+            self.services_changed.emit(diff)
+
+
+_service_file_watcher = None
+
+
+def service_file_watcher() -> ServiceFileWatcher:
+    """Shared watcher of the service file."""
+    global _service_file_watcher
+    if _service_file_watcher is None:
+        _service_file_watcher = ServiceFileWatcher()
+
+    return _service_file_watcher
+
+
+def dispose_service_file_watcher() -> None:
+    """Stop watching the service file, e.g., when the plugin is unloaded."""
+    global _service_file_watcher
+    if _service_file_watcher is not None:
+        _service_file_watcher.deleteLater()
+        _service_file_watcher = None
@@ -0,0 +1,168 @@
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+
+from qgis.PyQt.QtCore import QObject, Qt, QTimer, pyqtSignal, pyqtSlot
+
+from pg_service_parser.core.service_transaction import ServiceTransaction
+
+
+class ServiceWriter(QObject):
+    """
+    Write-behind writer for the service file.
+
+    Transactions are committed in a background thread, so that slow
+    (e.g., network) file systems do not freeze the GUI. Transactions
+    submitted on the same file within COALESCE_DELAY are merged and
+    written with a single parse and a single write, each one succeeding
+    or failing on its own. Completion is reported through signals and
+    callbacks, always called in the GUI thread.
+    """
+
+    COALESCE_DELAY = 300  # ms
+
+    write_finished = pyqtSignal(str)  # Success message
+    write_failed = pyqtSignal(str)  # Error message
+
+    # Relays results from the writer thread: callback, argument
+    __done = pyqtSignal(object, object)
+
+    def __init__(self, parent: QObject = None):
+        """Must be created in the GUI thread."""
+        super().__init__(parent)
+        # Conf file path -> [(transaction, message, on_finished, on_failed)]
+        self.__pending = {}
+        self.__executor = ThreadPoolExecutor(max_workers=1)  # Writes stay ordered
+        self.__closed = False
+
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(self.COALESCE_DELAY)
+        self.__timer.timeout.connect(self.flush)
+
+        # Queued, so that callbacks run in the thread of the writer, not in the worker
+        self.__done.connect(self.__call_back, Qt.ConnectionType.QueuedConnection)
+
+    def is_closed(self) -> bool:
+        return self.__closed
+
+    def submit(
+        self,
+        transaction: ServiceTransaction,
+        message: str = "",
+        on_finished: Callable[[], None] | None = None,
+        on_failed: Callable[[BaseException], None] | None = None,
+    ):
+        """
+        Commit a transaction in the writer thread. Transactions submitted
+        meanwhile are written with it, each one succeeding or failing on
+        its own.
+
+        :param message: shown through write_finished once written
+        :param on_finished: called once written
+        :param on_failed: called with the raised exception, write_failed
+                          being emitted if None
+        """
+        path = transaction.conf_file_path()
+        self.__pending.setdefault(path, []).append((transaction, message, on_finished, on_failed))
+        self.__timer.start()  # Restart the coalescing delay
+
+    def run(
+        self,
+        func: Callable,
+        on_finished: Callable | None = None,
+        on_failed: Callable[[BaseException], None] | None = None,
+    ):
+        """
+        Call a function writing the service file in the writer thread,
+        once the pending transactions are written.
+
+        :param on_finished: called with the result of the function
+        :param on_failed: called with the raised exception, write_failed
+                          being emitted if None
+        """
+        self.flush()
+        self.__start(func, on_finished, on_failed)
+
+    @pyqtSlot()
+    def flush(self):
+        """Send pending transactions to the writer thread right away."""
+        self.__timer.stop()
+        pending, self.__pending = self.__pending, {}
+        for entries in pending.values():
+            transactions = [transaction for transaction, *_callbacks in entries]
+            self.__start(
+                lambda _transactions=transactions: ServiceTransaction.commit_all(_transactions),
+                lambda errors, _entries=entries: self.__committed(_entries, errors),
+                lambda error, _entries=entries: self.__committed(
+                    _entries, [error] * len(_entries)
+                ),
+            )
+
+    def __committed(self, entries: list, errors: list):
+        """Report the result of each transaction written at once."""
+        messages = []
+        for (_transaction, message, on_finished, on_failed), error in zip(entries, errors):
+            if error is None:
+                if message:
+                    messages.append(message)
+                if on_finished is not None:
+                    on_finished()
+            elif on_failed is not None:
+                on_failed(error)
+            else:
+                self.write_failed.emit(str(error))
+
+        if messages:
+            self.write_finished.emit("\n".join(messages))
+
+    def __start(self, func, on_finished, on_failed=None):
+        if self.__closed:
+            return
+
+        future = self.__executor.submit(func)
+        future.add_done_callback(
+            lambda _future: self.__write_done(_future, on_finished, on_failed)
+        )
+
+    def __write_done(self, future, on_finished, on_failed):
+        # Called from the writer thread
+        if self.__closed:
+            return
+
+        error = future.exception()
+        if error is None:
+            if on_finished is not None:
+                self.__done.emit(on_finished, future.result())
+        elif on_failed is not None:
+            self.__done.emit(on_failed, error)
+        else:
+            self.__done.emit(self.__emit_failed, error)
+
+    @pyqtSlot(object, object)
+    def __call_back(self, callback, argument):
+        if not self.__closed:
+            callback(argument)
+
+    def __emit_failed(self, error: BaseException):
+        self.write_failed.emit(str(error))
+
+    def shutdown(self):
+        """
+        Write pending transactions and wait for all writes to complete.
+        Results are not reported anymore.
+        """
+        self.flush()
+        self.__closed = True
+        self.__executor.shutdown(wait=True)
+
+
+_service_writer = None
+
+
+def service_writer() -> ServiceWriter:
+    """Shared writer of the service file, to be first called from the GUI thread."""
+    global _service_writer
+    if _service_writer is None or _service_writer.is_closed():
+        _service_writer = ServiceWriter()
+
+    return _service_writer
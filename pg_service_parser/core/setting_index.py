@@ -0,0 +1,140 @@
+"""
+Inverted index of service settings, to find services by setting value,
+e.g., all services pointing at a given host or still using a given port.
+
+Values are matched case-insensitively, exactly or with wildcards
+(``*`` and ``?``). Trailing ``*`` only patterns are prefix matches.
+Passwords are never indexed.
+"""
+
+import bisect
+import fnmatch
+
+UNINDEXED_KEYS = frozenset({"password"})
+
+
+def parse_query(text: str) -> tuple[str, list[tuple[str, str]]]:
+    """
+    Split a search text into a service name text and setting terms.
+
+    "prod host=db-prod-* port=5433" gives ("prod", [("host", "db-prod-*"), ("port", "5433")]).
+    """
+    words = []
+    terms = []
+    for word in text.split():
+        key, sep, pattern = word.partition("=")
+        if sep and key:
+            terms.append((key.strip().lower(), pattern.strip()))
+        else:
+            words.append(word)
+
+    return " ".join(words), terms
+
+
+def value_matches(value: str, pattern: str) -> bool:
+    """Whether a setting value matches a value or wildcard pattern, ignoring case."""
+    return fnmatch.fnmatchcase(str(value).lower(), pattern.lower())
+
+
+class SettingIndex:
+    """Services by (setting key, value), updated service by service."""
+
+    def __init__(self, configs: dict[str, dict[str, str]] = None):
+        self.__settings = {}  # Service -> indexed settings, values lowercased
+        self.__services = {}  # (key, lowercase value) -> services
+        self.__values = {}  # Key -> sorted lowercase values
+        self.__originals = {}  # (key, lowercase value) -> value as written, for completion
+        for service_name, settings in (configs or {}).items():
+            self.set_service(service_name, settings)
+
+    def set_service(self, service_name: str, settings: dict[str, str]):
+        """Index the settings of a service, replacing the ones indexed before."""
+        self.remove_service(service_name)
+        indexed = {}
+        for key, value in settings.items():
+            key = key.lower()
+            if key in UNINDEXED_KEYS:
+                continue
+            value = str(value)
+            lower = value.lower()
+            indexed[key] = lower
+            services = self.__services.setdefault((key, lower), set())
+            if not services:
+                bisect.insort(self.__values.setdefault(key, []), lower)
+            services.add(service_name)
+            self.__originals[(key, lower)] = value
+
+        self.__settings[service_name] = indexed
+
+    def remove_service(self, service_name: str):
+        for key, lower in self.__settings.pop(service_name, {}).items():
+            services = self.__services[(key, lower)]
+            services.discard(service_name)
+            if services:
+                continue
+
+            del self.__services[(key, lower)]
+            del self.__originals[(key, lower)]
+            values = self.__values[key]
+            del values[bisect.bisect_left(values, lower)]
+            if not values:
+                del self.__values[key]
+
+    def __matching_values(self, key: str, pattern: str) -> list[str]:
+        pattern = pattern.lower()
+        values = self.__values.get(key, [])
+        if not any(char in pattern for char in "*?["):
+            return [pattern] if (key, pattern) in self.__services else []
+
+        prefix = pattern.rstrip("*")
+        if not any(char in prefix for char in "*?["):
+            start = bisect.bisect_left(values, prefix)
+            end = bisect.bisect_left(values, prefix + "\U0010ffff")
+            return values[start:end]
+
+        return fnmatch.filter(values, pattern)
+
+    def find(self, key: str, pattern: str) -> set[str]:
+        """
+        :param key: setting key, e.g., "host"
+        :param pattern: value, prefix ("db-prod-*") or wildcard pattern ("db-*-03")
+        :return: names of the services having a matching setting value
+        """
+        key = key.lower()
+        services = set()
+        for value in self.__matching_values(key, pattern):
+            services.update(self.__services[(key, value)])
+        return services
+
+    def find_all(self, terms: list[tuple[str, str]]) -> set[str]:
+        """:return: names of the services matching all (key, pattern) terms"""
+        result = None
+        for key, pattern in terms:
+            services = self.find(key, pattern)
+            result = services if result is None else result & services
+            if not result:
+                break
+
+        return result if result is not None else set(self.__settings)
+
+    def query(self, text: str) -> set[str]:
+        """Services matching a "key=pattern key=pattern ..." text."""
+        _name_text, terms = parse_query(text)
+        return self.find_all(terms)
+
+    def matches(self, service_name: str, terms: list[tuple[str, str]]) -> bool:
+        """Whether a single service matches all (key, pattern) terms."""
+        settings = self.__settings.get(service_name)
+        if settings is None:
+            return False
+
+        for key, pattern in terms:
+            value = settings.get(key.lower())
+            if value is None or not value_matches(value, pattern):
+                return False
+        return True
+
+    def values(self, key: str) -> list[str]:
+        """Distinct values of a setting, as written, sorted case-insensitively."""
+        key = key.lower()
+        return [self.__originals[(key, value)] for value in self.__values.get(key, [])]
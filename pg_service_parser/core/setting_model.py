@@ -2,7 +2,7 @@ from qgis.PyQt.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
 from qgis.PyQt.QtGui import QColorConstants, QFont
 
 from pg_service_parser.conf.enums import WidgetTypeEnum
-from pg_service_parser.conf.service_settings import SERVICE_SETTINGS
+from pg_service_parser.conf.service_settings import service_settings_catalog
 
 
 class ServiceConfigModel(QAbstractTableModel):
@@ -13,51 +13,96 @@ class ServiceConfigModel(QAbstractTableModel):
 
     is_dirty_changed = pyqtSignal(bool)  # Whether the model gets dirty or not
 
-    def __init__(self, service_name: str, service_config: dict):
+    def __init__(self, service_name: str = "", service_config: dict = None):
         super().__init__()
+        # Read-only dict with further info about settings
+        self.__settings_data = service_settings_catalog().settings
+        self.__key_font = QFont()
+        self.__key_font.setBold(True)
+        self.__changed_font = QFont()
+        self.__changed_font.setItalic(True)
+
+        self.__service_name = ""
+        self.__model_data = {}
+        self.__original_data = {}
+        self.__keys = []  # Setting keys by row
+        self.__changed_keys = set()  # Keys added, edited or removed since the last save
+        self.__dirty = False
+        if service_config is not None:
+            self.set_service(service_name, service_config)
+
+    def set_service(self, service_name: str, service_config: dict):
+        """Reset the model with the settings of another service."""
+        self.beginResetModel()
+        self.__settings_data = service_settings_catalog().settings
         self.__service_name = service_name
         self.__model_data = service_config
         self.__original_data = service_config.copy()
-        self.__settings_data = (
-            SERVICE_SETTINGS()
-        )  # Read-only dict with further info about settings
-        self.__dirty = False
+        self.__keys = list(service_config.keys())
+        self.__changed_keys = set()
+        self.endResetModel()
+        self.__set_dirty_status(False)
 
     def rowCount(self, parent=QModelIndex()):
-        return len(self.__model_data)
+        return len(self.__keys)
 
     def columnCount(self, parent=QModelIndex()):
         return 2
 
     def index_to_setting_key(self, index):
-        return list(self.__model_data.keys())[index.row()]
+        return self.__keys[index.row()]
+
+    def __update_changed_key(self, key: str):
+        """Keep track of changed keys, so that the dirty status is known in O(1)."""
+        if self.__model_data.get(key) == self.__original_data.get(key) and (
+            key in self.__model_data
+        ) == (key in self.__original_data):
+            self.__changed_keys.discard(key)
+        else:
+            self.__changed_keys.add(key)
+
+        if bool(self.__changed_keys) != self.__dirty:
+            self.__set_dirty_status(bool(self.__changed_keys))
+
+    def __is_changed(self, key: str) -> bool:
+        return key in self.__changed_keys
 
     def add_settings(self, settings: dict[str, str]):
-        self.beginInsertRows(QModelIndex(), self.rowCount(), self.rowCount() + len(settings) - 1)
-        self.__model_data.update(settings)
-        self.__set_dirty_status(True)
-        self.endInsertRows()
+        new_keys = [key for key in settings if key not in self.__model_data]
+        if new_keys:
+            self.beginInsertRows(
+                QModelIndex(), self.rowCount(), self.rowCount() + len(new_keys) - 1
+            )
+            self.__keys.extend(new_keys)
+            self.__model_data.update({key: settings[key] for key in new_keys})
+            self.endInsertRows()
+
+        for key, value in settings.items():
+            if key not in new_keys and self.__model_data[key] != value:
+                self.__model_data[key] = value
+                row = self.__keys.index(key)
+                self.dataChanged.emit(
+                    self.index(row, self.VALUE_COL), self.index(row, self.VALUE_COL)
+                )
 
-        if self.__model_data == self.__original_data:
-            self.__set_dirty_status(False)
+        for key in settings:
+            self.__update_changed_key(key)
 
     def remove_setting(self, index: QModelIndex):
         if not index.isValid():
             return
 
         self.beginRemoveRows(QModelIndex(), index.row(), index.row())
-        del self.__model_data[list(self.__model_data.keys())[index.row()]]
-        self.__set_dirty_status(True)
+        key = self.__keys.pop(index.row())
+        del self.__model_data[key]
         self.endRemoveRows()
-
-        if self.__model_data == self.__original_data:
-            self.__set_dirty_status(False)
+        self.__update_changed_key(key)
 
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid():
             return None
 
-        key = list(self.__model_data.keys())[index.row()]
+        key = self.__keys[index.row()]
         if role == Qt.ItemDataRole.DisplayRole:
             if index.column() == self.KEY_COL:
                 return key
@@ -79,21 +124,11 @@ class ServiceConfigModel(QAbstractTableModel):
             return self.__model_data[key]
         elif role == Qt.ItemDataRole.FontRole:
             if index.column() == self.KEY_COL:
-                font = QFont()
-                font.setBold(True)
-                return font
-            elif index.column() == self.VALUE_COL and (
-                key not in self.__original_data
-                or self.__model_data[key] != self.__original_data[key]
-            ):
-                font = QFont()
-                font.setItalic(True)
-                return font
+                return self.__key_font
+            elif index.column() == self.VALUE_COL and self.__is_changed(key):
+                return self.__changed_font
         elif role == Qt.ItemDataRole.ForegroundRole and index.column() == self.VALUE_COL:
-            if (
-                key not in self.__original_data
-                or self.__model_data[key] != self.__original_data[key]
-            ):
+            if self.__is_changed(key):
                 return QColorConstants.DarkGreen
         elif role == Qt.ItemDataRole.UserRole:
             # Store custom widget type and config
@@ -116,16 +151,11 @@ class ServiceConfigModel(QAbstractTableModel):
         if not index.isValid():
             return False
 
-        key = list(self.__model_data.keys())[index.row()]
+        key = self.__keys[index.row()]
         if value != self.__model_data[key]:
             self.__model_data[key] = value
-
-            if key not in self.__original_data or value != self.__original_data[key]:
-                self.__set_dirty_status(True)
-            else:
-                if self.__model_data == self.__original_data:
-                    self.__set_dirty_status(False)
-
+            self.__update_changed_key(key)
+            self.dataChanged.emit(index, index)
             return True
 
         return False
@@ -159,7 +189,12 @@ class ServiceConfigModel(QAbstractTableModel):
     def set_not_dirty(self):
         # Data saved in the provider
         self.__original_data = self.__model_data.copy()
+        changed_rows = [row for row, key in enumerate(self.__keys) if key in self.__changed_keys]
+        self.__changed_keys = set()
         self.__set_dirty_status(False)
+        for row in changed_rows:
+            # No more highlighted as changed
+            self.dataChanged.emit(self.index(row, self.VALUE_COL), self.index(row, self.VALUE_COL))
 
     def invalid_settings(self):
         """
@@ -0,0 +1,59 @@
+from qgis.core import QgsDataSourceUri, QgsTask
+from qgis.PyQt.QtCore import QCoreApplication
+
+from pg_service_parser.core.connection_index import uri_fingerprint
+from pg_service_parser.core.service_matching import (
+    ServiceMatchIndex,
+    switch_uri_to_service,
+)
+
+
+class SwitchLayersToServicesTask(QgsTask):
+    """
+    Background task finding the PG service matching each layer data source.
+
+    Layers sharing the same connection fingerprint are resolved only once.
+    Data sources are not applied here, since layers must be modified from
+    the main thread; results are available in `switched` and `unmatched`
+    once the task is completed.
+    """
+
+    def __init__(self, layer_sources: dict[str, str], index: ServiceMatchIndex):
+        super().__init__(
+            QCoreApplication.translate("Plugin", "Switch layers to PG services"),
+            QgsTask.Flag.CanCancel,
+        )
+        self.__layer_sources = layer_sources  # Layer id -> data source
+        self.__index = index
+
+        self.switched = []  # (layer id, original data source, service, new data source)
+        self.unmatched = []  # Layer ids
+
+    def run(self) -> bool:
+        groups = {}
+        for layer_id, source in self.__layer_sources.items():
+            groups.setdefault(uri_fingerprint(QgsDataSourceUri(source)), []).append(layer_id)
+
+        for i, layer_ids in enumerate(groups.values()):
+            if self.isCanceled():
+                return False
+
+            match = self.__index.best_match(self.__layer_sources[layer_ids[0]])
+            if match is None:
+                self.unmatched.extend(layer_ids)
+            else:
+                config = self.__index.snapshot.configs[match.service]
+                for layer_id in layer_ids:
+                    source = self.__layer_sources[layer_id]
+                    self.switched.append(
+                        (
+                            layer_id,
+                            source,
+                            match.service,
+                            switch_uri_to_service(source, match.service, config),
+                        )
+                    )
+
+            self.setProgress(100 * (i + 1) / len(groups))
+
+        return True
@@ -0,0 +1,159 @@
+from pathlib import Path
+
+from qgis.PyQt.QtCore import QTimer, pyqtSlot
+from qgis.PyQt.QtWidgets import QDialog, QDialogButtonBox, QHeaderView, QMessageBox
+
+from pg_service_parser.conf.service_settings import service_settings_catalog
+from pg_service_parser.core.bulk_changes_model import BulkChangesModel
+from pg_service_parser.core.bulk_edit import BulkEdit
+from pg_service_parser.core.service_transaction import ServiceChangedError
+from pg_service_parser.libs.pgserviceparser.exceptions import (
+    ServiceFileNotFound,
+    ServiceNotFound,
+)
+from pg_service_parser.utils import get_ui_class
+
+DIALOG_UI = get_ui_class("bulk_edit_dialog.ui")
+
+
+class BulkEditDialog(QDialog, DIALOG_UI):
+    """Set, replace or remove a setting of all services matching a search text."""
+
+    PREVIEW_DELAY = 300  # ms
+
+    def __init__(self, parent, conf_file_path: Path, query: str = ""):
+        QDialog.__init__(self, parent)
+        self.setupUi(self)
+        self.__conf_file_path = conf_file_path
+        self.edited_services = []
+
+        self.__model = BulkChangesModel(self)
+        self.tblPreview.setModel(self.__model)
+        self.tblPreview.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents
+        )
+        self.tblPreview.horizontalHeader().setStretchLastSection(True)
+
+        self.cboAction.addItem(self.tr("Set value"), BulkEdit.SET)
+        self.cboAction.addItem(self.tr("Replace text in value"), BulkEdit.REPLACE)
+        self.cboAction.addItem(self.tr("Remove setting"), BulkEdit.REMOVE)
+        self.cboSetting.addItems(service_settings_catalog().keys)
+        self.cboSetting.setCurrentText("host")
+        self.txtServices.setText(query)
+        self.txtServices.setToolTip(
+            self.tr(
+                "Services to edit, by name pattern and by setting values, "
+                "e.g., 'prod-* host=db-prod-03'.\nPatterns may contain * and ? wildcards."
+            )
+        )
+
+        # Preview once the form did not change for a while
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(self.PREVIEW_DELAY)
+        self.__timer.timeout.connect(self.__update_preview)
+
+        self.txtServices.textChanged.connect(self.__form_changed)
+        self.cboSetting.currentTextChanged.connect(self.__form_changed)
+        self.txtFind.textChanged.connect(self.__form_changed)
+        self.txtValue.textChanged.connect(self.__form_changed)
+        self.cboAction.currentIndexChanged.connect(self.__action_changed)
+        self.buttonBox.accepted.connect(self.__accepted)
+
+        self.__action_changed(self.cboAction.currentIndex())
+
+    def bulk_edit(self) -> BulkEdit | None:
+        """:return: the edit defined in the dialog, or None if incomplete"""
+        key = self.cboSetting.currentText().strip()
+        if not key:
+            return None
+
+        edit = BulkEdit.from_query(self.txtServices.text())
+        action = self.cboAction.currentData()
+        if action == BulkEdit.SET:
+            edit.set(key, self.txtValue.text())
+        elif action == BulkEdit.REPLACE:
+            if not self.txtFind.text():
+                return None
+            edit.replace(key, self.txtFind.text(), self.txtValue.text())
+        elif action == BulkEdit.REMOVE:
+            edit.remove(key)
+
+        return edit
+
+    @pyqtSlot(str)
+    def __form_changed(self, text):
+        self.__timer.start()  # Restart the preview delay
+
+    @pyqtSlot(int)
+    def __action_changed(self, index):
+        action = self.cboAction.currentData()
+        self.lblFind.setEnabled(action == BulkEdit.REPLACE)
+        self.txtFind.setEnabled(action == BulkEdit.REPLACE)
+        self.lblValue.setEnabled(action != BulkEdit.REMOVE)
+        self.txtValue.setEnabled(action != BulkEdit.REMOVE)
+        self.lblValue.setText(
+            self.tr("Replace with") if action == BulkEdit.REPLACE else self.tr("Value")
+        )
+        self.__update_preview()
+
+    @pyqtSlot()
+    def __update_preview(self):
+        self.__timer.stop()
+        edit = self.bulk_edit()
+        try:
+            changes = edit.preview(self.__conf_file_path) if edit else []
+        except ServiceFileNotFound:
+            changes = []
+
+        self.__model.set_changes(changes)
+        service_count = len(self.__model.service_names())
+        self.lblSummary.setText(
+            self.tr("{} setting(s) of {} service(s) will be changed.").format(
+                len(changes), service_count
+            )
+        )
+        self.buttonBox.button(QDialogButtonBox.StandardButton.Ok).setEnabled(bool(changes))
+
+    @pyqtSlot()
+    def __accepted(self):
+        if self.__timer.isActive():
+            # The form changed since the last preview, show it before committing
+            self.__update_preview()
+            return
+
+        changes = self.__model.changes()
+        if not changes:
+            return
+
+        # Exactly what is previewed
+        try:
+            BulkEdit.commit(changes, self.__conf_file_path)
+        except (ServiceChangedError, ServiceNotFound):
+            QMessageBox.warning(
+                self,
+                self.tr("Bulk edit services"),
+                self.tr(
+                    "Services changed since the preview, nothing was written. "
+                    "Check the updated preview and try again."
+                ),
+            )
+            self.__update_preview()
+            return
+        except PermissionError:
+            QMessageBox.warning(
+                self,
+                self.tr("Bulk edit services"),
+                self.tr("The service file is read-only and permissions could not be changed."),
+            )
+            return
+        except ServiceFileNotFound:
+            QMessageBox.warning(
+                self,
+                self.tr("Bulk edit services"),
+                self.tr("The service file could not be found."),
+            )
+            return
+
+        self.edited_services = self.__model.service_names()
+        self.accept()
@@ -1,11 +1,11 @@
 from qgis.core import QgsApplication
-from qgis.gui import QgsMessageBar
+from qgis.gui import QgsFilterLineEdit, QgsMessageBar
 from qgis.PyQt.QtCore import (
     QEvent,
+    QIdentityProxyModel,
     QItemSelection,
     QModelIndex,
     QObject,
-    QSortFilterProxyModel,
     Qt,
     pyqtSignal,
     pyqtSlot,
@@ -17,15 +17,25 @@ from qgis.PyQt.QtWidgets import (
     QCompleter,
     QDialog,
     QHeaderView,
+    QListView,
     QMenu,
     QMessageBox,
     QSizePolicy,
 )
 
-from pg_service_parser.conf.service_settings import SERVICE_SETTINGS, SETTINGS_TEMPLATE
+from pg_service_parser.conf.service_settings import (
+    SETTINGS_TEMPLATE,
+    service_settings_catalog,
+)
 from pg_service_parser.core.connection_model import ServiceConnectionModel
 from pg_service_parser.core.copy_shortcuts import ShortcutsModel
+from pg_service_parser.core.project_usage import project_usage_index
+from pg_service_parser.core.service_cache import (
+    service_config,
+    write_service,
+)
 from pg_service_parser.core.service_connections import (
+    connection_count,
     create_connection,
     edit_connection,
     get_connections,
@@ -33,24 +43,26 @@ from pg_service_parser.core.service_connections import (
     remove_connection,
     rename_service_in_connections,
 )
+from pg_service_parser.core.service_names_model import (
+    ServiceNamesModel,
+    ServiceSearchModel,
+    service_names_model,
+)
+from pg_service_parser.core.service_transaction import ServiceTransaction
+from pg_service_parser.core.service_watcher import ServiceDiff, service_file_watcher
+from pg_service_parser.core.service_writer import service_writer
 from pg_service_parser.core.setting_model import ServiceConfigModel
+from pg_service_parser.gui.dlg_bulk_edit import BulkEditDialog
 from pg_service_parser.gui.dlg_new_name import EnumNewName, NewNameDialog
+from pg_service_parser.gui.dlg_service_generator import ServiceGeneratorDialog
+from pg_service_parser.gui.dlg_service_grid import ServiceGridDialog
 from pg_service_parser.gui.dlg_service_settings import ServiceSettingsDialog
 from pg_service_parser.gui.item_delegates import (
     ServiceConfigDelegate,
     ShortcutServiceDelegate,
 )
-from pg_service_parser.libs.pgserviceparser import (
-    conf_path,
-    copy_service_settings,
-    create_service,
-    remove_service,
-    rename_service,
-    service_config,
-    service_names,
-    write_service,
-    write_service_to_text,
-)
+from pg_service_parser.libs.pgserviceparser import conf_path, write_service_to_text
+from pg_service_parser.libs.pgserviceparser.exceptions import ServiceFileNotFound
 from pg_service_parser.libs.pgserviceparser.gui.service_widget import (
     PGServiceParserWidget,
 )
@@ -80,6 +92,14 @@ class _QgisServiceWidget(PGServiceParserWidget):
 
     def _build_ui(self):
         super()._build_ui()
+        # A single model and delegate, reused for every edited service
+        self._config_model = ServiceConfigModel()
+        self._config_model.is_dirty_changed.connect(self.btnUpdateService.setEnabled)
+        self.tblServiceConfig.setItemDelegate(
+            ServiceConfigDelegate(
+                self, lambda key: service_names_model().setting_index().values(key)
+            )
+        )
         # Hide the built-in status bar (plugin dialog has its own)
         self.lblWarning.hide()
         self.lblConfFile.hide()
@@ -94,6 +114,176 @@ class _QgisServiceWidget(PGServiceParserWidget):
         self.btnRemoveSetting.setText("")
         self.btnCopySettings.setIcon(QgsApplication.getThemeIcon("/mActionEditCopy.svg"))
         self.btnCopySettings.setText("")
+        self.__build_service_list()
+
+    def __build_service_list(self):
+        """Replace the item based service list by a view on the shared service names."""
+        self._service_list_model = _ServiceListModel(service_names_model(), self)
+        service_list = QListView()
+        service_list.setUniformItemSizes(True)
+        service_list.setSelectionMode(self.lstServices.selectionMode())
+        service_list.setContextMenuPolicy(self.lstServices.contextMenuPolicy())
+        service_list.setAlternatingRowColors(self.lstServices.alternatingRowColors())
+        service_list.setSizePolicy(self.lstServices.sizePolicy())
+        service_list.setMinimumWidth(self.lstServices.minimumWidth())
+        service_list.setMaximumWidth(self.lstServices.maximumWidth())
+        service_list.setModel(self._service_list_model)
+
+        self.txtServiceFilter = QgsFilterLineEdit()
+        self.txtServiceFilter.setShowSearchIcon(True)
+        self.txtServiceFilter.setPlaceholderText(self.tr("Search services"))
+        self.txtServiceFilter.setToolTip(
+            self.tr(
+                "Filter services by name and by setting values, "
+                "e.g., 'prod host=db-prod-* port=5433'.\n"
+                "Setting values may contain * and ? wildcards."
+            )
+        )
+        self.txtServiceFilter.setMaximumWidth(self.lstServices.maximumWidth())
+
+        layout = _parent_layout(self._content_widget.layout(), self.lstServices)
+        layout.replaceWidget(self.lstServices, service_list)
+        layout.insertWidget(0, self.txtServiceFilter)
+        self.lstServices.deleteLater()
+        self.lstServices = service_list
+
+    def _connect_signals(self):
+        # Like the base class, for the service list view
+        self.btnAddService.clicked.connect(self._add_service_clicked)
+        self.btnRemoveService.clicked.connect(self._remove_service_clicked)
+        self.lstServices.selectionModel().selectionChanged.connect(
+            self._service_list_selection_changed
+        )
+        self.lstServices.customContextMenuRequested.connect(self._service_list_context_menu)
+        self.lstServices.doubleClicked.connect(self._service_list_double_clicked)
+        self.btnAddSettings.clicked.connect(self._add_settings_clicked)
+        self.btnRemoveSetting.clicked.connect(self._remove_setting_clicked)
+        self.btnCopySettings.clicked.connect(self._copy_settings_clicked)
+        self.btnUpdateService.clicked.connect(self._update_service_clicked)
+        self.txtServiceFilter.textChanged.connect(self._service_list_model.filter_later)
+        self._service_list_model.modelReset.connect(self._service_list_filtered)
+
+    # -- Service list: a view on the shared service names model --
+
+    def _refresh_service_list(self):
+        self._edit_model = None
+        if not self._conf_file_path.exists():
+            self._service_file_warning()
+            return
+
+        # The shared model follows the service file, bring it up-to-date now
+        service_file_watcher().check()
+        # Reload the selected service, like when list items are rebuilt
+        self._service_list_selection_changed()
+
+    def _selected_service_names(self) -> list[str]:
+        return [
+            index.data(ServiceNamesModel.ServiceNameRole)
+            for index in self.lstServices.selectionModel().selectedRows()
+        ]
+
+    def select_service(self, service_name: str, block_signals: bool = False):
+        """Select a service, clearing the search text if it hides the service."""
+        row = self._service_list_model.row(service_name)
+        if row == -1 and self._service_list_model.filter_text():
+            self.txtServiceFilter.blockSignals(True)
+            self.txtServiceFilter.clear()
+            self.txtServiceFilter.blockSignals(False)
+            self._service_list_model.set_filter("")
+            row = self._service_list_model.row(service_name)
+        if row == -1:
+            return
+
+        selection_model = self.lstServices.selectionModel()
+        selection_model.blockSignals(block_signals)
+        self.lstServices.setCurrentIndex(self._service_list_model.index(row, 0))
+        selection_model.blockSignals(False)
+        self.lstServices.scrollTo(self.lstServices.currentIndex())
+
+    @pyqtSlot()
+    def _service_list_filtered(self):
+        # Filtering resets the selection, keep the edited service selected if listed
+        if self._edit_model:
+            row = self._service_list_model.row(self._edit_model.service_name())
+            if row != -1:
+                selection_model = self.lstServices.selectionModel()
+                selection_model.blockSignals(True)
+                self.lstServices.setCurrentIndex(self._service_list_model.index(row, 0))
+                selection_model.blockSignals(False)
+        self.btnRemoveService.setEnabled(bool(self._selected_service_names()))
+
+    @pyqtSlot(QItemSelection, QItemSelection)
+    def _service_list_selection_changed(self, selected=None, deselected=None):
+        names = self._selected_service_names()
+        self.btnRemoveService.setEnabled(bool(names))
+
+        if len(names) == 1:
+            self._edit_service_selected(names[0])
+            self._set_edit_panel_enabled(True)
+        elif self._edit_model and not service_names_model().contains(
+            self._edit_model.service_name()
+        ):
+            pass  # Removed from the service file, see apply_service_diff()
+        else:
+            self._edit_model = None
+            self.tblServiceConfig.setModel(None)
+            self._set_edit_panel_enabled(False)
+            self.btnUpdateService.setDisabled(True)
+            self.btnRemoveSetting.setEnabled(False)
+            self._update_add_settings_button()
+
+    @pyqtSlot(QModelIndex)
+    def _service_list_double_clicked(self, index):
+        if index.isValid():
+            self._rename_service(index.data(ServiceNamesModel.ServiceNameRole))
+
+    def apply_service_diff(self, diff: ServiceDiff):
+        """
+        Apply changes made to the service file by others to the edited
+        service. The list itself follows the shared service names model.
+        """
+        edited_service = self._edit_model.service_name() if self._edit_model else None
+        dirty = bool(self._edit_model and self._edit_model.is_dirty())
+
+        if edited_service in diff.removed:
+            if dirty:
+                self._bar.pushWarning(
+                    self.tr("PG service"),
+                    self.tr(
+                        "Service '{}' was removed from the service file by another application, "
+                        "pending edits are discarded."
+                    ).format(edited_service),
+                )
+            self._edit_model = None
+            self.tblServiceConfig.setModel(None)
+            self._set_edit_panel_enabled(False)
+            self.btnUpdateService.setDisabled(True)
+            self.btnRemoveService.setEnabled(bool(self._selected_service_names()))
+        elif edited_service in diff.changed:
+            config = service_config(edited_service, self._conf_file_path)
+            if config == self._edit_model.service_config():
+                return  # E.g., just saved from this dialog
+            if dirty:
+                self._bar.pushWarning(
+                    self.tr("PG service"),
+                    self.tr(
+                        "Service '{}' was changed by another application. "
+                        "Updating it will overwrite these changes."
+                    ).format(edited_service),
+                )
+            else:
+                self._edit_service_selected(edited_service)
+
+    def _service_usage_text(self, names: list[str]) -> str:
+        usage_index = project_usage_index()
+        used = [(name, usage_index.project_count(name)) for name in names]
+        used = [(name, count) for name, count in used if count]
+        if not used:
+            return ""
+
+        return "\n\n" + "\n".join(
+            self.tr("'{}' is used by {} project(s)").format(name, count) for name, count in used
+        )
 
     # -- Name input: use NewNameDialog instead of QInputDialog --
 
@@ -106,33 +296,45 @@ class _QgisServiceWidget(PGServiceParserWidget):
         dlg = NewNameDialog(EnumNewName.SERVICE, self)
         dlg.exec()
         if dlg.result() == QDialog.DialogCode.Accepted:
-            try:
-                create_service(dlg.new_name, {}, self._conf_file_path)
-            except PermissionError:
-                self._permission_warning()
-            else:
-                self._bar.pushSuccess(
-                    self.tr("PG service"),
-                    self.tr("Service '{}' created!").format(dlg.new_name),
-                )
-                self._refresh_service_list()
-                items = self.lstServices.findItems(dlg.new_name, Qt.MatchFlag.MatchExactly)
-                if items:
-                    self.lstServices.setCurrentItem(items[0])
+            new_name = dlg.new_name
+            transaction = ServiceTransaction(self._conf_file_path)
+            transaction.create(new_name, {})
+            service_writer().submit(
+                transaction,
+                on_finished=lambda: self.__service_written(
+                    new_name, self.tr("Service '{}' created!").format(new_name)
+                ),
+                on_failed=self.__write_failed,
+            )
+
+    def __service_written(self, service_name: str, message: str):
+        """Called once a service is written in the background."""
+        self._bar.pushSuccess(self.tr("PG service"), message)
+        self._refresh_service_list()
+        self.select_service(service_name)
+
+    def __write_failed(self, error: BaseException):
+        if isinstance(error, PermissionError):
+            self._permission_warning()
+        else:
+            self._bar.pushWarning(
+                self.tr("PG service"),
+                self.tr("Could not write the service file: {}").format(error),
+            )
 
     @pyqtSlot()
     def _remove_service_clicked(self):
-        selected_items = self.lstServices.selectedItems()
-        if not selected_items:
+        names = self._selected_service_names()
+        if not names:
             return
 
-        names = [item.text() for item in selected_items]
         if len(names) == 1:
             message = self.tr("Are you sure you want to remove the service '{}'?").format(names[0])
         else:
             message = self.tr("Are you sure you want to remove {} services?\n\n{}").format(
                 len(names), "\n".join(names)
             )
+        message += self._service_usage_text(names)
 
         if (
             QMessageBox.question(
@@ -144,21 +346,24 @@ class _QgisServiceWidget(PGServiceParserWidget):
             )
             == QMessageBox.StandardButton.Yes
         ):
+            transaction = ServiceTransaction(self._conf_file_path)
             for name in names:
-                try:
-                    remove_service(name, self._conf_file_path)
-                except PermissionError:
-                    self._permission_warning()
-                    return
-
-            self._bar.pushSuccess(
-                self.tr("PG service"),
-                self.tr("{} service(s) removed.").format(len(names)),
+                transaction.remove(name, missing_ok=True)
+            service_writer().submit(
+                transaction,
+                on_finished=lambda: self.__services_removed(names),
+                on_failed=self.__write_failed,
             )
-            self._edit_model = None
-            self.tblServiceConfig.setModel(None)
-            self._set_edit_panel_enabled(False)
-            self._refresh_service_list()
+
+    def __services_removed(self, names: list[str]):
+        self._bar.pushSuccess(
+            self.tr("PG service"),
+            self.tr("{} service(s) removed.").format(len(names)),
+        )
+        self._edit_model = None
+        self.tblServiceConfig.setModel(None)
+        self._set_edit_panel_enabled(False)
+        self._refresh_service_list()
 
     def _rename_service(self, old_name):
         dlg = NewNameDialog(EnumNewName.SERVICE, self)
@@ -170,61 +375,89 @@ class _QgisServiceWidget(PGServiceParserWidget):
             new_name = dlg.new_name
             if new_name == old_name:
                 return
-            try:
-                rename_service(old_name, new_name, self._conf_file_path)
-            except PermissionError:
-                self._permission_warning()
-            else:
-                self._bar.pushSuccess(
-                    self.tr("PG service"),
-                    self.tr("Service '{}' renamed to '{}'!").format(old_name, new_name),
-                )
-                self._refresh_service_list()
-                items = self.lstServices.findItems(new_name, Qt.MatchFlag.MatchExactly)
-                if items:
-                    self.lstServices.setCurrentItem(items[0])
-                self.service_renamed.emit(old_name, new_name)
+            transaction = ServiceTransaction(self._conf_file_path)
+            transaction.rename(old_name, new_name)
+            service_writer().submit(
+                transaction,
+                on_finished=lambda: self.__service_renamed(old_name, new_name),
+                on_failed=self.__write_failed,
+            )
+
+    def __service_renamed(self, old_name: str, new_name: str):
+        self.__service_written(
+            new_name, self.tr("Service '{}' renamed to '{}'!").format(old_name, new_name)
+        )
+        self.service_renamed.emit(old_name, new_name)
 
     def _duplicate_and_edit_service(self, source_service_name):
         dlg = NewNameDialog(EnumNewName.SERVICE, self)
         dlg.exec()
         if dlg.result() == QDialog.DialogCode.Accepted:
             target_name = dlg.new_name
-            try:
-                copy_service_settings(source_service_name, target_name, self._conf_file_path)
-            except PermissionError:
-                self._permission_warning()
-            else:
-                self._bar.pushSuccess(
-                    self.tr("PG service"),
+            transaction = ServiceTransaction(self._conf_file_path)
+            transaction.copy(source_service_name, target_name)
+            service_writer().submit(
+                transaction,
+                on_finished=lambda: self.__service_written(
+                    target_name,
                     self.tr("Service '{}' duplicated to '{}'!").format(
                         source_service_name, target_name
                     ),
-                )
-                self._refresh_service_list()
-                items = self.lstServices.findItems(target_name, Qt.MatchFlag.MatchExactly)
-                if items:
-                    self.lstServices.setCurrentItem(items[0])
+                ),
+                on_failed=self.__write_failed,
+            )
+
+    def _generate_services(self, template_name):
+        try:
+            dlg = ServiceGeneratorDialog(self, self._conf_file_path, template_name)
+        except (ServiceFileNotFound, KeyError):
+            self._refresh_service_list()
+            return
+
+        dlg.exec()
+        if dlg.result() == QDialog.DialogCode.Accepted:
+            self._bar.pushSuccess(
+                self.tr("PG service"),
+                self.tr("{} service(s) created from '{}'.").format(
+                    len(dlg.generated_services), template_name
+                ),
+            )
+            self._refresh_service_list()
 
     # -- Context menu: add QGIS icons --
 
     @pyqtSlot("QPoint")
     def _service_list_context_menu(self, pos):
-        item = self.lstServices.itemAt(pos)
-        if not item:
-            return
+        menu = QMenu(self)
+        index = self.lstServices.indexAt(pos)
+        if index.isValid() and len(self._selected_service_names()) == 1:
+            self.__add_service_actions(menu, index.data(ServiceNamesModel.ServiceNameRole))
+            menu.addSeparator()
+
+        bulk_edit_action = QAction(
+            QgsApplication.getThemeIcon("/mActionMultiEdit.svg"),
+            self.tr("Bulk edit services..."),
+            self,
+        )
+        bulk_edit_action.triggered.connect(self._bulk_edit_services)
+        menu.addAction(bulk_edit_action)
 
-        selected_items = self.lstServices.selectedItems()
-        if len(selected_items) != 1:
-            return
+        grid_action = QAction(
+            QgsApplication.getThemeIcon("/mActionOpenTable.svg"),
+            self.tr("Edit services in a grid..."),
+            self,
+        )
+        grid_action.triggered.connect(self._edit_services_in_grid)
+        menu.addAction(grid_action)
+        menu.exec(self.lstServices.viewport().mapToGlobal(pos))
 
-        menu = QMenu(self)
+    def __add_service_actions(self, menu: QMenu, service_name: str):
         rename_action = QAction(
             QgsApplication.getThemeIcon("/mActionRename.svg"),
             self.tr("Rename service..."),
             self,
         )
-        rename_action.triggered.connect(lambda: self._rename_service(item.text()))
+        rename_action.triggered.connect(lambda: self._rename_service(service_name))
         menu.addAction(rename_action)
 
         duplicate_action = QAction(
@@ -232,9 +465,72 @@ class _QgisServiceWidget(PGServiceParserWidget):
             self.tr("Duplicate service..."),
             self,
         )
-        duplicate_action.triggered.connect(lambda: self._duplicate_and_edit_service(item.text()))
+        duplicate_action.triggered.connect(lambda: self._duplicate_and_edit_service(service_name))
         menu.addAction(duplicate_action)
-        menu.exec(self.lstServices.viewport().mapToGlobal(pos))
+
+        generate_action = QAction(
+            QgsApplication.getThemeIcon("/mActionDuplicateFeature.svg"),
+            self.tr("Generate services from template..."),
+            self,
+        )
+        generate_action.triggered.connect(lambda: self._generate_services(service_name))
+        menu.addAction(generate_action)
+
+    def __discard_pending_edits(self) -> bool:
+        """:return: whether there are no pending edits or the user accepts to discard them"""
+        if self._edit_model and self._edit_model.is_dirty():
+            return (
+                QMessageBox.question(
+                    self,
+                    self.tr("Pending edits"),
+                    self.tr(
+                        "There are pending edits for service '{}'. "
+                        "Are you sure you want to discard them?"
+                    ).format(self._edit_model.service_name()),
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                    QMessageBox.StandardButton.No,
+                )
+                == QMessageBox.StandardButton.Yes
+            )
+        return True
+
+    @pyqtSlot()
+    def _bulk_edit_services(self):
+        if not self.__discard_pending_edits():
+            return
+
+        # Edit the services listed by the current search by default
+        dlg = BulkEditDialog(self, self._conf_file_path, self.txtServiceFilter.text())
+        dlg.exec()
+        if dlg.result() == QDialog.DialogCode.Accepted:
+            self._bar.pushSuccess(
+                self.tr("PG service"),
+                self.tr("{} service(s) edited.").format(len(dlg.edited_services)),
+            )
+            self._refresh_service_list()
+
+    @pyqtSlot()
+    def _edit_services_in_grid(self):
+        if not self.__discard_pending_edits():
+            return
+
+        # Edit the services listed by the current search, all if none
+        service_names = None
+        if self.txtServiceFilter.text().strip():
+            service_names = self._service_list_model.service_names()
+        try:
+            dlg = ServiceGridDialog(self, self._conf_file_path, service_names)
+        except ServiceFileNotFound:
+            self._refresh_service_list()
+            return
+
+        dlg.exec()
+        if dlg.edited_services:
+            self._bar.pushSuccess(
+                self.tr("PG service"),
+                self.tr("{} service(s) edited.").format(len(dlg.edited_services)),
+            )
+            self._refresh_service_list()
 
     # -- Settings: use QGIS-specific model, delegate, and dialogs --
 
@@ -253,25 +549,19 @@ class _QgisServiceWidget(PGServiceParserWidget):
                 )
                 != QMessageBox.StandardButton.Yes
             ):
-                self.lstServices.blockSignals(True)
-                items = self.lstServices.findItems(
-                    self._edit_model.service_name(), Qt.MatchFlag.MatchExactly
-                )
-                if items:
-                    self.lstServices.setCurrentItem(items[0])
-                self.lstServices.blockSignals(False)
+                self.select_service(self._edit_model.service_name(), block_signals=True)
                 return
 
-        # Use QGIS-specific model and delegate
-        self._edit_model = ServiceConfigModel(
+        # Use the QGIS-specific model, reset for each service
+        self._config_model.set_service(
             service_name, service_config(service_name, self._conf_file_path)
         )
-        self.tblServiceConfig.setModel(self._edit_model)
-        self.tblServiceConfig.setItemDelegate(ServiceConfigDelegate(self))
-        self.tblServiceConfig.selectionModel().selectionChanged.connect(
-            self._update_settings_buttons
-        )
-        self._edit_model.is_dirty_changed.connect(self.btnUpdateService.setEnabled)
+        self._edit_model = self._config_model
+        if self.tblServiceConfig.model() is not self._config_model:
+            self.tblServiceConfig.setModel(self._config_model)
+            self.tblServiceConfig.selectionModel().selectionChanged.connect(
+                self._update_settings_buttons
+            )
         self.btnUpdateService.setDisabled(True)
 
         if self._new_empty_file:
@@ -287,24 +577,30 @@ class _QgisServiceWidget(PGServiceParserWidget):
         dlg.exec()
 
         if dlg.settings_to_add:
+            catalog = service_settings_catalog()
             settings = {
-                k: v["default"] for k, v in SERVICE_SETTINGS().items() if k in dlg.settings_to_add
+                key: catalog.defaults[key] for key in catalog.keys if key in dlg.settings_to_add
             }
             self._edit_model.add_settings(settings)
             self._update_add_settings_button()
 
     def _update_add_settings_button(self):
-        # Plugin uses SERVICE_SETTINGS() (callable)
-        enable = bool(self._edit_model and self._edit_model.rowCount() < len(SERVICE_SETTINGS()))
+        # Plugin uses its own (translated) settings catalog
+        enable = bool(
+            self._edit_model
+            and service_settings_catalog().has_addable_settings(
+                self._edit_model.current_setting_keys()
+            )
+        )
         self.btnAddSettings.setEnabled(enable)
 
     @pyqtSlot()
     def _copy_settings_clicked(self):
-        selected_items = self.lstServices.selectedItems()
-        if not selected_items or len(selected_items) != 1:
+        if not self._edit_model:
             return
 
-        service_name = selected_items[0].text()
+        # The edited service may be filtered out of the list
+        service_name = self._edit_model.service_name()
         settings_text = write_service_to_text(service_name, self._edit_model.service_config())
         QApplication.clipboard().setText(settings_text)
         self._bar.pushSuccess(
@@ -325,31 +621,31 @@ class _QgisServiceWidget(PGServiceParserWidget):
                 )
                 return
 
-            selected_items = self.lstServices.selectedItems()
-            if not selected_items or len(selected_items) != 1:
-                return
-
-            target_service = selected_items[0].text()
-            try:
-                write_service(
-                    target_service,
-                    self._edit_model.service_config(),
-                    self._conf_file_path,
-                )
-            except PermissionError:
-                self._permission_warning()
-            else:
-                self._bar.pushSuccess(
-                    self.tr("PG service"),
-                    self.tr("PG service '{}' updated!").format(target_service),
-                )
-                self._edit_model.set_not_dirty()
+            edit_model = self._edit_model
+            target_service = edit_model.service_name()
+            settings = edit_model.service_config()
+            service_writer().run(
+                lambda: write_service(target_service, settings, self._conf_file_path),
+                lambda _result: self.__service_updated(edit_model, settings),
+                self.__write_failed,
+            )
         else:
             self._bar.pushInfo(
                 self.tr("PG service"),
                 self.tr("Edit the service configuration and try again."),
             )
 
+    def __service_updated(self, edit_model: ServiceConfigModel, settings: dict):
+        self._bar.pushSuccess(
+            self.tr("PG service"),
+            self.tr("PG service '{}' updated!").format(edit_model.service_name()),
+        )
+        # Settings may have been edited again while writing
+        if edit_model is self._edit_model and edit_model.service_config() == settings:
+            edit_model.set_not_dirty()
+        # Keep the setting index, and so setting filters, up-to-date
+        service_file_watcher().check()
+
 
 # ---------------------------------------------------------------------------
 #  Plugin dialog
@@ -367,12 +663,38 @@ class PgServiceDialog(QDialog, DIALOG_UI):
 
         self.__conf_file_path = conf_path()
         self.__new_empty_file = False
+        self.__initialized = False
+        # Shortcuts and connection tabs are built when first visited
+        self.__shortcuts_tab_built = False
+        self.__connection_tab_built = False
+        self.btnCreateServiceFile.clicked.connect(self.__create_file_clicked)
         self.__initialize_dialog()
 
+    def refresh(self):
+        """Bring the dialog up-to-date before showing it again."""
+        if not self.__initialized:
+            self.__initialize_dialog()
+            return
+
+        service_file_watcher().check()
+        if self.__connection_tab_built:
+            self.__connection_services_model.refresh_counts()
+
+    def select_service(self, service: str):
+        if not self.__initialized:
+            return
+
+        self.tabWidget.setCurrentIndex(EDIT_TAB_INDEX)
+        self.__service_widget.select_service(service)
+
+    def cleanup(self):
+        """To be called before deleting the dialog."""
+        if self.__initialized:
+            service_file_watcher().services_changed.disconnect(self.__services_changed)
+
     def __initialize_dialog(self):
         if not self.__conf_file_path.exists():
             self.btnCreateServiceFile.setIcon(QgsApplication.getThemeIcon("/mActionNewPage.svg"))
-            self.btnCreateServiceFile.clicked.connect(self.__create_file_clicked)
             self.lblConfFile.setText(self.tr("Config file not found!"))
             not_found_tooltip = self.tr(
                 "Create a config file at a default location or\n"
@@ -402,6 +724,10 @@ class PgServiceDialog(QDialog, DIALOG_UI):
         self.btnCreateServiceFile.setVisible(False)
         self.tblServiceConnections.horizontalHeader().setVisible(True)
         self.shortcutRemoveButton.setEnabled(False)
+        # Shared service names, followed by their number of QGIS connections
+        self.__connection_services_model = _ConnectionCountProxyModel(self)
+        self.__connection_services_model.setSourceModel(service_names_model())
+        self.cboConnectionService.setModel(self.__connection_services_model)
 
         # Message bar
         self.bar = QgsMessageBar()
@@ -431,8 +757,10 @@ class PgServiceDialog(QDialog, DIALOG_UI):
 
         self.__make_combo_box_searchable(self.cboConnectionService)
 
-        self.__initialize_shortcuts()
-        self.__initialize_connection_services()
+        service_file_watcher().services_changed.connect(self.__services_changed)
+        self.__initialized = True
+
+        self.__build_tab(self.tabWidget.currentIndex())
 
     @pyqtSlot()
     def __create_file_clicked(self):
@@ -441,13 +769,26 @@ class PgServiceDialog(QDialog, DIALOG_UI):
         if dlg.result() == QDialog.DialogCode.Accepted:
             self.__conf_file_path = conf_path(create_if_missing=True)
 
-            try:
-                create_service(dlg.new_name, {})
-            except PermissionError:
-                self.permissionWarning()
-            else:
-                self.__new_empty_file = True
-                self.__initialize_dialog()
+            transaction = ServiceTransaction(self.__conf_file_path)
+            transaction.create(dlg.new_name, {})
+            service_writer().submit(
+                transaction,
+                on_finished=self.__file_created,
+                on_failed=lambda error: self.iface.messageBar().pushWarning(
+                    self.tr("PG service"),
+                    self.tr("Could not write the service file: {}").format(error),
+                ),
+            )
+
+    def __file_created(self):
+        self.__new_empty_file = True
+        self.__initialize_dialog()
+
+    # ---- Service File Changes ----
+
+    @pyqtSlot(object)
+    def __services_changed(self, diff):
+        self.__service_widget.apply_service_diff(diff)
 
     # ---- Service Rename Propagation ----
 
@@ -466,10 +807,7 @@ class PgServiceDialog(QDialog, DIALOG_UI):
 
     def __initialize_shortcuts(self):
         self.shortcutsTableView.setModel(self.__shortcuts_model)
-        self.__shortcut_delegate = ShortcutServiceDelegate(
-            lambda: service_names(self.__conf_file_path, sorted_alphabetically=True),
-            self,
-        )
+        self.__shortcut_delegate = ShortcutServiceDelegate(service_names_model(), self)
         self.shortcutsTableView.setItemDelegate(self.__shortcut_delegate)
         self.shortcutsTableView.horizontalHeader().setSectionResizeMode(
             0, QHeaderView.ResizeMode.Interactive
@@ -520,35 +858,47 @@ class PgServiceDialog(QDialog, DIALOG_UI):
 
     @pyqtSlot(int)
     def __current_tab_changed(self, index):
-        if index == SHORTCUTS_TAB_INDEX:
-            pass  # Shortcuts are always up-to-date
-        elif index == EDIT_TAB_INDEX:
-            self.__service_widget._refresh_service_list()
-        elif index == CONNECTION_TAB_INDEX:
+        # Service lists are kept up-to-date by the file watcher, only check
+        # now in case the file system does not notify changes (e.g., shares)
+        service_file_watcher().check()
+        if not self.__build_tab(index) and index == CONNECTION_TAB_INDEX:
+            self.__connection_services_model.refresh_counts()
+
+    def __build_tab(self, index) -> bool:
+        """
+        Build the shortcuts or connection tab on its first visit.
+
+        :return: True if the tab was just built
+        """
+        if index == SHORTCUTS_TAB_INDEX and not self.__shortcuts_tab_built:
+            self.__initialize_shortcuts()
+            self.__shortcuts_tab_built = True
+            return True
+        if index == CONNECTION_TAB_INDEX and not self.__connection_tab_built:
             self.__initialize_connection_services()
+            self.__connection_tab_built = True
+            return True
+
+        return False
 
     # ---- Connection Tab ----
 
     def __initialize_connection_services(self):
         self.__connection_model = None
-        current_text = self.cboConnectionService.currentText()
-        self.cboConnectionService.blockSignals(True)
-        self.cboConnectionService.clear()
-        self.cboConnectionService.blockSignals(False)
-        self.cboConnectionService.addItems(
-            [""] + service_names(self.__conf_file_path, sorted_alphabetically=True)
-        )
-        if current_text:
-            self.cboConnectionService.setCurrentIndex(
-                self.cboConnectionService.findText(current_text)
-            )
+        self.__initialize_service_connections()
+
+    def __current_connection_service(self) -> str:
+        return self.cboConnectionService.currentData(ServiceNamesModel.ServiceNameRole) or ""
 
     @pyqtSlot(int)
     def __connection_service_changed(self, index):
         self.__initialize_service_connections()
 
     def __initialize_service_connections(self, selected_index=QModelIndex()):
-        service = self.cboConnectionService.currentText()
+        service = self.__current_connection_service()
+        if service:
+            # Keep the connection count up-to-date after connection changes
+            self.__connection_services_model.refresh_count(service)
         self.__connection_model = ServiceConnectionModel(service, get_connections(service))
         self.__update_connection_controls(False)
         self.tblServiceConnections.setModel(self.__connection_model)
@@ -563,7 +913,7 @@ class PgServiceDialog(QDialog, DIALOG_UI):
 
     @pyqtSlot()
     def __add_connection_clicked(self):
-        service = self.cboConnectionService.currentText()
+        service = self.__current_connection_service()
         dlg = NewNameDialog(EnumNewName.CONNECTION, self, service)
         dlg.exec()
         if dlg.result() == QDialog.DialogCode.Accepted:
@@ -631,14 +981,19 @@ class PgServiceDialog(QDialog, DIALOG_UI):
         combo_box.setEditable(True)
         combo_box.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
 
-        filter_model = QSortFilterProxyModel(combo_box)
-        filter_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
-        filter_model.setSourceModel(combo_box.model())
+        # Completions from the service name index, best matches first
+        search_model = ServiceSearchModel(service_names_model(), combo_box)
 
-        completer = QCompleter(filter_model, combo_box)
+        completer = QCompleter(search_model, combo_box)
         completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
         combo_box.setCompleter(completer)
-        combo_box.lineEdit().textEdited.connect(filter_model.setFilterFixedString)
+        combo_box.lineEdit().textEdited.connect(search_model.filter_later)
+        # Completion rows are not combo box rows
+        completer.activated[str].connect(
+            lambda name: combo_box.setCurrentIndex(
+                combo_box.findData(name, ServiceNamesModel.ServiceNameRole)
+            )
+        )
 
         if not allow_custom_name:
             combo_box.installEventFilter(ServiceComboBoxLostFocusFilter(combo_box, self))
@@ -665,3 +1020,58 @@ class ServiceComboBoxLostFocusFilter(QObject):
             self.__combo_box.blockSignals(True)  # Avoid triggering custom slot while resetting
             self.__combo_box.setCurrentIndex(self.__combo_box.currentIndex())
             self.__combo_box.blockSignals(False)
+
+
+class _ConnectionCountProxyModel(QIdentityProxyModel):
+    """Service names followed by their number of QGIS connections."""
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        value = super().data(index, role)
+        if role == Qt.ItemDataRole.DisplayRole and value:
+            count = connection_count(value)
+            if count:
+                return f"{value} ({count})"
+
+        return value
+
+    def refresh_count(self, service_name: str):
+        row = self.sourceModel().row(service_name)
+        if row != -1:
+            index = self.index(row, 0)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole])
+
+    def refresh_counts(self):
+        if self.rowCount() > 1:
+            self.dataChanged.emit(
+                self.index(1, 0),
+                self.index(self.rowCount() - 1, 0),
+                [Qt.ItemDataRole.DisplayRole],
+            )
+
+
+def _parent_layout(layout, widget):
+    """The layout holding a widget, searched recursively from the given layout."""
+    if layout.indexOf(widget) != -1:
+        return layout
+
+    for i in range(layout.count()):
+        child = layout.itemAt(i).layout()
+        if child is not None:
+            found = _parent_layout(child, widget)
+            if found is not None:
+                return found
+
+    return None
+
+
+class _ServiceListModel(ServiceSearchModel):
+    """Searchable service list, with the project usage of services as tooltips."""
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.ToolTipRole and index.isValid():
+            count = project_usage_index().project_count(
+                super().data(index, ServiceNamesModel.ServiceNameRole)
+            )
+            return self.tr("Used by {} project(s)").format(count) if count else None
+
+        return super().data(index, role)
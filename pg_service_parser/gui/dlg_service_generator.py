@@ -0,0 +1,145 @@
+import configparser
+from pathlib import Path
+
+from qgis.PyQt.QtCore import QTimer, pyqtSlot
+from qgis.PyQt.QtWidgets import QDialog, QDialogButtonBox, QHeaderView, QMessageBox
+
+from pg_service_parser.core.generated_services_model import GeneratedServicesModel
+from pg_service_parser.core.service_cache import snapshot
+from pg_service_parser.core.service_generator import (
+    ServiceGenerator,
+    parse_matrix,
+)
+from pg_service_parser.libs.pgserviceparser.exceptions import ServiceFileNotFound
+from pg_service_parser.utils import get_ui_class
+
+DIALOG_UI = get_ui_class("service_generator_dialog.ui")
+
+
+class ServiceGeneratorDialog(QDialog, DIALOG_UI):
+    """Create services from a template service, one per combination of parameter values."""
+
+    PREVIEW_DELAY = 300  # ms
+
+    def __init__(self, parent, conf_file_path: Path, template_name: str):
+        """
+        :raises ServiceFileNotFound: when the service file is not found
+        :raises KeyError: when the template service is not found
+        """
+        QDialog.__init__(self, parent)
+        self.setupUi(self)
+        self.__conf_file_path = conf_file_path
+        self.__template_settings = snapshot(conf_file_path).config(template_name)
+        self.generated_services = []
+
+        self.__model = GeneratedServicesModel(self)
+        self.tblPreview.setModel(self.__model)
+        self.tblPreview.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.ResizeToContents
+        )
+        self.tblPreview.horizontalHeader().setStretchLastSection(True)
+
+        self.lblTemplateName.setText(template_name)
+        self.txtNamePattern.setToolTip(
+            self.tr(
+                "Name of the generated services, referring to their settings "
+                "between braces, e.g., '{dbname}-{host}'."
+            )
+        )
+        self.txtParameters.setToolTip(
+            self.tr(
+                "Values of the settings to vary, one 'key=values' line per setting.\n"
+                "Values are separated by commas, ranges like 'node01..node12' or "
+                "'5432..5435' are expanded.\n"
+                "A service is generated for each combination of values."
+            )
+        )
+
+        # Preview once the form did not change for a while
+        self.__timer = QTimer(self)
+        self.__timer.setSingleShot(True)
+        self.__timer.setInterval(self.PREVIEW_DELAY)
+        self.__timer.timeout.connect(self.__update_preview)
+
+        self.txtNamePattern.textChanged.connect(self.__form_changed)
+        self.txtParameters.textChanged.connect(self.__timer.start)
+        self.buttonBox.accepted.connect(self.__accepted)
+
+        self.__update_preview()
+
+    def service_generator(self) -> ServiceGenerator:
+        return ServiceGenerator(
+            self.__template_settings,
+            self.txtNamePattern.text(),
+            parse_matrix(self.txtParameters.toPlainText()),
+        )
+
+    @pyqtSlot(str)
+    def __form_changed(self, text):
+        self.__timer.start()  # Restart the preview delay
+
+    @pyqtSlot()
+    def __update_preview(self):
+        self.__timer.stop()
+        generator = self.service_generator()
+        error = ""
+        services = []
+        if generator.name_pattern and generator.parameters:
+            try:
+                services = generator.preview(self.__conf_file_path)
+            except ValueError as e:
+                error = str(e)
+            except ServiceFileNotFound:
+                error = self.tr("The service file could not be found.")
+
+        self.__model.set_services(services, list(generator.parameters))
+        collision_count = self.__model.collision_count()
+        if error:
+            self.lblSummary.setText(error)
+        elif collision_count:
+            self.lblSummary.setText(
+                self.tr(
+                    "{} of {} service name(s) are already used, change the name pattern."
+                ).format(collision_count, len(services))
+            )
+        else:
+            self.lblSummary.setText(
+                self.tr("{} service(s) will be created.").format(len(services))
+            )
+        self.buttonBox.button(QDialogButtonBox.StandardButton.Ok).setEnabled(
+            bool(services) and not collision_count
+        )
+
+    @pyqtSlot()
+    def __accepted(self):
+        self.__update_preview()  # Commit what is previewed
+        if not self.buttonBox.button(QDialogButtonBox.StandardButton.Ok).isEnabled():
+            return
+
+        try:
+            generated_services = self.service_generator().commit(self.__conf_file_path)
+        except PermissionError:
+            QMessageBox.warning(
+                self,
+                self.windowTitle(),
+                self.tr("The service file is read-only and permissions could not be changed."),
+            )
+            return
+        except ServiceFileNotFound:
+            QMessageBox.warning(
+                self,
+                self.windowTitle(),
+                self.tr("The service file could not be found."),
+            )
+            return
+        except configparser.DuplicateSectionError as e:
+            QMessageBox.warning(
+                self,
+                self.windowTitle(),
+                self.tr("Service '{}' already exists, nothing was created.").format(e.section),
+            )
+            self.__update_preview()
+            return
+
+        self.generated_services = generated_services
+        self.accept()
@@ -0,0 +1,185 @@
+from pathlib import Path
+
+from qgis.PyQt.QtCore import Qt, pyqtSlot
+from qgis.PyQt.QtGui import QKeySequence
+from qgis.PyQt.QtWidgets import (
+    QAction,
+    QApplication,
+    QDialog,
+    QDialogButtonBox,
+    QHeaderView,
+    QMessageBox,
+)
+
+from pg_service_parser.core.service_table import ServiceTable
+from pg_service_parser.core.service_table_model import ServiceTableModel
+from pg_service_parser.libs.pgserviceparser.exceptions import (
+    ServiceFileNotFound,
+    ServiceNotFound,
+)
+from pg_service_parser.utils import get_ui_class
+
+DIALOG_UI = get_ui_class("service_grid_dialog.ui")
+
+
+class ServiceGridDialog(QDialog, DIALOG_UI):
+    """Edit the settings of many services at once, as a spreadsheet."""
+
+    def __init__(self, parent, conf_file_path: Path, service_names: list[str] | None = None):
+        """
+        :param service_names: services to edit, all services of the file if None
+        :raises ServiceFileNotFound: when the service file is not found
+        """
+        QDialog.__init__(self, parent)
+        self.setupUi(self)
+        self.edited_services = []
+
+        self.__model = ServiceTableModel(
+            ServiceTable.from_file(conf_file_path, service_names), self
+        )
+        self.tblServices.setModel(self.__model)
+        self.tblServices.horizontalHeader().setSectionResizeMode(
+            QHeaderView.ResizeMode.Interactive
+        )
+        # Services in file order until sorted by a column
+        self.tblServices.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.tblServices.setSortingEnabled(True)
+
+        self.cboFilterKey.addItems(self.__model.keys())
+        self.cboFilterKey.setCurrentText("host")
+        self.txtFilter.setToolTip(
+            self.tr(
+                "Only show services whose setting value matches, ignoring case.\n"
+                "Patterns may contain * and ? wildcards."
+            )
+        )
+
+        paste_action = QAction(self.tr("Paste"), self.tblServices)
+        paste_action.setShortcut(QKeySequence(QKeySequence.StandardKey.Paste))
+        paste_action.setShortcutContext(Qt.ShortcutContext.WidgetShortcut)
+        paste_action.triggered.connect(self.__paste)
+        self.tblServices.addAction(paste_action)
+
+        self.txtFilter.textChanged.connect(self.__filter_text_changed)
+        self.cboFilterKey.currentIndexChanged.connect(self.__filter_key_changed)
+        self.__model.is_dirty_changed.connect(self.__dirty_changed)
+        self.__model.dataChanged.connect(self.__update_summary)
+        self.__model.modelReset.connect(self.__update_summary)
+        self.buttonBox.button(QDialogButtonBox.StandardButton.Save).clicked.connect(self.__save)
+
+        self.__dirty_changed(False)
+
+    @pyqtSlot(str)
+    def __filter_text_changed(self, text):
+        self.__apply_filter()
+
+    @pyqtSlot(int)
+    def __filter_key_changed(self, index):
+        self.__apply_filter()
+
+    def __apply_filter(self):
+        self.__model.set_filter(self.cboFilterKey.currentText(), self.txtFilter.text())
+
+    @pyqtSlot(bool)
+    def __dirty_changed(self, dirty):
+        self.buttonBox.button(QDialogButtonBox.StandardButton.Save).setEnabled(dirty)
+        self.__update_summary()
+
+    @pyqtSlot()
+    def __update_summary(self):
+        self.lblSummary.setText(
+            self.tr("{} of {} service(s) shown, {} setting(s) edited.").format(
+                self.__model.filtered_count(),
+                len(self.__model.table()),
+                self.__model.table().edit_count(),
+            )
+        )
+
+    @pyqtSlot()
+    def __paste(self):
+        """
+        Paste tab-separated values from the clipboard, e.g., copied from a
+        spreadsheet, starting at the top left selected cell. A single value
+        is pasted to all selected cells.
+        """
+        text = QApplication.clipboard().text()
+        if not text:
+            return
+
+        lines = text.replace("\r\n", "\n").rstrip("\n").split("\n")
+        block = [line.split("\t") for line in lines]
+        selected = self.tblServices.selectionModel().selectedIndexes()
+        if not selected:
+            current = self.tblServices.currentIndex()
+            if not current.isValid():
+                return
+            selected = [current]
+
+        if len(block) == 1 and len(block[0]) == 1:
+            values = [(index, block[0][0]) for index in selected]
+        else:
+            top = min(index.row() for index in selected)
+            left = min(index.column() for index in selected)
+            last_row = top + len(block) - 1
+            while last_row >= self.__model.rowCount() and self.__model.canFetchMore():
+                self.__model.fetchMore()
+            values = [
+                (self.__model.index(top + i, left + j), value)
+                for i, line in enumerate(block)
+                for j, value in enumerate(line)
+                if top + i < self.__model.rowCount() and left + j < self.__model.columnCount()
+            ]
+
+        self.__model.set_values(values)
+
+    @pyqtSlot()
+    def __save(self):
+        try:
+            edited_services = self.__model.save()
+        except PermissionError:
+            QMessageBox.warning(
+                self,
+                self.windowTitle(),
+                self.tr("The service file is read-only and permissions could not be changed."),
+            )
+            return
+        except ServiceFileNotFound:
+            QMessageBox.warning(
+                self,
+                self.windowTitle(),
+                self.tr("The service file could not be found."),
+            )
+            return
+        except ServiceNotFound:
+            QMessageBox.warning(
+                self,
+                self.windowTitle(),
+                self.tr(
+                    "An edited service was removed from the service file meanwhile, "
+                    "nothing was saved."
+                ),
+            )
+            return
+
+        self.edited_services.extend(
+            name for name in edited_services if name not in self.edited_services
+        )
+
+    def reject(self):
+        if self.__model.is_dirty():
+            if (
+                QMessageBox.question(
+                    self,
+                    self.tr("Pending edits"),
+                    self.tr(
+                        "There are {} unsaved setting edit(s). "
+                        "Are you sure you want to discard them?"
+                    ).format(self.__model.table().edit_count()),
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+                    QMessageBox.StandardButton.No,
+                )
+                != QMessageBox.StandardButton.Yes
+            ):
+                return
+
+        super().reject()
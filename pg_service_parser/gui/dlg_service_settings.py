@@ -1,7 +1,7 @@
 from qgis.PyQt.QtCore import Qt, pyqtSlot
 from qgis.PyQt.QtWidgets import QDialog, QDialogButtonBox, QListWidgetItem
 
-from pg_service_parser.conf.service_settings import SERVICE_SETTINGS
+from pg_service_parser.conf.service_settings import service_settings_catalog
 from pg_service_parser.utils import get_ui_class
 
 DIALOG_UI = get_ui_class("service_settings_dialog.ui")
@@ -19,7 +19,7 @@ class ServiceSettingsDialog(QDialog, DIALOG_UI):
         self.__selection_changed()  # Initialize button status
 
         # Load data
-        for setting, data in SERVICE_SETTINGS().items():
+        for setting, data in service_settings_catalog().settings.items():
             item = QListWidgetItem(setting)
             if setting in used_settings:
                 item.setFlags(
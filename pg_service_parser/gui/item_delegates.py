@@ -3,15 +3,25 @@
 
 from qgis.gui import QgsFileWidget, QgsPasswordLineEdit
 from qgis.PyQt.QtCore import Qt
-from qgis.PyQt.QtWidgets import QComboBox, QStyledItemDelegate
+from qgis.PyQt.QtWidgets import (
+    QComboBox,
+    QCompleter,
+    QLineEdit,
+    QStyledItemDelegate,
+)
 
 from pg_service_parser.conf.enums import WidgetTypeEnum
 from pg_service_parser.core.setting_model import ServiceConfigModel
 
 
 class ServiceConfigDelegate(QStyledItemDelegate):
-    def __init__(self, parent):
+    def __init__(self, parent, setting_values_func=None):
+        """
+        :param setting_values_func: optional function returning the values of a
+                                    setting key used by services, to be completed
+        """
         super().__init__(parent)
+        self.__setting_values_func = setting_values_func
 
     def createEditor(self, parent, option, index):
         if ServiceConfigModel.is_custom_widget_cell(index):
@@ -22,7 +32,7 @@ class ServiceConfigDelegate(QStyledItemDelegate):
                 options = config["values"]
 
                 widget = QComboBox(parent)
-                if isinstance(options, list):
+                if isinstance(options, (list, tuple)):
                     for value in options:
                         widget.addItem(value, value)
 
@@ -53,7 +63,20 @@ class ServiceConfigDelegate(QStyledItemDelegate):
                 widget.editingFinished.connect(self.commit_and_close_editor)
                 return widget
 
-        return QStyledItemDelegate.createEditor(self, parent, option, index)
+        editor = QStyledItemDelegate.createEditor(self, parent, option, index)
+        if (
+            self.__setting_values_func
+            and index.column() == ServiceConfigModel.VALUE_COL
+            and isinstance(editor, QLineEdit)
+        ):
+            key = index.siblingAtColumn(ServiceConfigModel.KEY_COL).data(
+                Qt.ItemDataRole.DisplayRole
+            )
+            completer = QCompleter(self.__setting_values_func(key), editor)
+            completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+            editor.setCompleter(completer)
+
+        return editor
 
     def commit_and_close_editor(self):
         editor = self.sender()
@@ -96,19 +119,22 @@ class ServiceConfigDelegate(QStyledItemDelegate):
 
 
 class ShortcutServiceDelegate(QStyledItemDelegate):
-    """Delegate that shows a combobox with available services for From/To columns."""
+    """
+    Delegate that shows a combobox with available services for From/To columns.
+    Editors share the given service names model instead of copying the names.
+    """
 
     FROM_COL = 1
     TO_COL = 2
 
-    def __init__(self, service_names_func, parent=None):
+    def __init__(self, service_names_model, parent=None):
         super().__init__(parent)
-        self.__service_names_func = service_names_func
+        self.__service_names_model = service_names_model
 
     def createEditor(self, parent, option, index):
         if index.column() in (self.FROM_COL, self.TO_COL):
             widget = QComboBox(parent)
-            widget.addItems([""] + self.__service_names_func())
+            widget.setModel(self.__service_names_model)
             widget.currentIndexChanged.connect(self.__commit_and_close_editor)
             return widget
 
@@ -1,26 +1,70 @@
 import os
+import time
 from pathlib import Path
 
-from qgis.core import NULL, Qgis, QgsDataSourceUri, QgsProviderRegistry, QgsSettingsTree
-from qgis.PyQt.QtCore import QCoreApplication, QLocale, QSettings, Qt, QTranslator
+from qgis.core import (
+    NULL,
+    Qgis,
+    QgsApplication,
+    QgsDataSourceUri,
+    QgsMessageLog,
+    QgsProject,
+    QgsProviderRegistry,
+    QgsSettingsTree,
+)
+from qgis.PyQt.QtCore import (
+    QCoreApplication,
+    QLocale,
+    QSettings,
+    QTimer,
+    QTranslator,
+)
 from qgis.PyQt.QtGui import QIcon
-from qgis.PyQt.QtWidgets import QAction, QMenu, QToolButton
+from qgis.PyQt.QtWidgets import (
+    QAction,
+    QFileDialog,
+    QMenu,
+    QMessageBox,
+    QToolButton,
+)
 
+from pg_service_parser.core.connection_index import connection_index
 from pg_service_parser.core.copy_shortcuts import ShortcutsModel
-from pg_service_parser.core.plugin_settings import PLUGIN_NAME
+from pg_service_parser.core.index_cache import INDEX_CACHE_DIR_NAME
+from pg_service_parser.core.plugin_settings import PLUGIN_NAME, PluginSettings
+from pg_service_parser.core.project_files import format_report
+from pg_service_parser.core.project_tasks import (
+    RewriteProjectsTask,
+    ScanProjectUsageTask,
+)
+from pg_service_parser.core.service_cache import (
+    cached_snapshot,
+    has_service,
+    service_configs,
+    set_index_cache_dir,
+    snapshot,
+)
 from pg_service_parser.core.service_connections import (
     edit_connection,
     refresh_connections,
 )
-from pg_service_parser.gui.dlg_new_name import EnumNewName, get_new_name
-from pg_service_parser.gui.dlg_pg_service import PgServiceDialog
-from pg_service_parser.libs.pgserviceparser import (
-    conf_path,
-    copy_service_settings,
-    create_service,
-    service_config,
-    service_names,
+from pg_service_parser.core.service_matching import match_index
+from pg_service_parser.core.service_names_model import (
+    dispose_service_names_model,
+    service_names_model,
+)
+from pg_service_parser.core.service_transaction import ServiceTransaction
+from pg_service_parser.core.service_watcher import (
+    dispose_service_file_watcher,
+    service_file_watcher,
 )
+from pg_service_parser.core.service_writer import service_writer
+from pg_service_parser.core.switch_layers_task import SwitchLayersToServicesTask
+from pg_service_parser.libs.pgserviceparser import conf_path
+from pg_service_parser.libs.pgserviceparser.exceptions import ServiceFileNotFound
+
+# Number of layer data sources set per event loop iteration
+SWITCH_LAYERS_BATCH_SIZE = 50
 
 
 class PgServiceParserPlugin:
@@ -38,16 +82,34 @@ class PgServiceParserPlugin:
 
         self.action = None
         self.shortcuts_model = None
+        self.service_writer = None
 
         self.default_action = None
         self.add_service_action = None
         self.register_connection_action = None
         self.switch_to_service_action = None
+        self.switch_project_action = None
+        self.rewrite_project_files_action = None
+        self.scan_project_usage_action = None
+        self.__switch_task = None
+        self.__rewrite_task = None
+        self.__scan_task = None
+
+        self.button_menu = None
+        self.__dialog = None
+        self.__unloaded = False
+        self.__shortcut_actions = {}  # Shortcut name -> action in both menus
+        self.__free_shortcut_actions = []  # Actions of removed shortcuts, to be reused
+
+        # Layer id -> (layer source, connection index revision, register_conn)
+        self.__register_conn_cache = {}
+        self.__watched_layer_ids = set()  # Layers whose dataSourceChanged is connected
 
     def tr(self, text: str) -> str:
         return QCoreApplication.translate("Plugin", text)
 
     def initGui(self):
+        start = time.perf_counter()
         icon = QIcon(str(Path(__file__).parent / "images" / "logo.png"))
 
         self.default_action = QAction(
@@ -67,11 +129,21 @@ class PgServiceParserPlugin:
         self.button.setDefaultAction(self.default_action)
         self.action = self.iface.addToolBarWidget(self.button)
 
+        if PluginSettings().service_index_cache.value():
+            set_index_cache_dir(
+                Path(QgsApplication.qgisSettingsDirPath()) / PLUGIN_NAME / INDEX_CACHE_DIR_NAME
+            )
+
         self.shortcuts_model = ShortcutsModel(
-            self.iface.mainWindow(),
-            service_names_func=lambda: service_names(conf_path(), sorted_alphabetically=True),
+            self.iface.mainWindow(), service_exists_func=has_service
         )
-        self.shortcuts_model.dataChanged.connect(self.build_menus)
+        self.shortcuts_model.dataChanged.connect(self.__shortcuts_changed)
+        self.shortcuts_model.rowsInserted.connect(self.__sync_shortcut_actions)
+        self.shortcuts_model.rowsRemoved.connect(self.__sync_shortcut_actions)
+
+        self.service_writer = service_writer()
+        self.service_writer.write_finished.connect(self.__service_write_finished)
+        self.service_writer.write_failed.connect(self.__service_write_failed)
 
         self.add_service_action = QAction(
             icon, self.tr("Create PG service from layer connection"), self.iface.mainWindow()
@@ -85,6 +157,18 @@ class PgServiceParserPlugin:
             icon, self.tr("Switch layer to existent PG service"), self.iface.mainWindow()
         )
         self.switch_to_service_action.triggered.connect(self.switch_to_service)
+        self.switch_project_action = QAction(
+            icon, self.tr("Switch all project layers to PG services"), self.iface.mainWindow()
+        )
+        self.switch_project_action.triggered.connect(self.switch_project_to_services)
+        self.rewrite_project_files_action = QAction(
+            icon, self.tr("Switch project files to PG services..."), self.iface.mainWindow()
+        )
+        self.rewrite_project_files_action.triggered.connect(self.rewrite_project_files)
+        self.scan_project_usage_action = QAction(
+            icon, self.tr("Scan project folders for PG service usage..."), self.iface.mainWindow()
+        )
+        self.scan_project_usage_action.triggered.connect(self.scan_project_usage)
 
         self.iface.addCustomActionForLayerType(
             self.add_service_action, "", Qgis.LayerType.Vector, True
@@ -96,84 +180,223 @@ class PgServiceParserPlugin:
             self.switch_to_service_action, "", Qgis.LayerType.Vector, True
         )
         self.iface.layerTreeView().currentLayerChanged.connect(self.current_layer_changed)
+        QgsProject.instance().layersRemoved.connect(self.__layers_removed)
 
-        self.current_layer_changed(self.iface.activeLayer())
+        # Reading the service file is left to the event loop, not to QGIS startup
+        QTimer.singleShot(0, self.__initialize_menus)
+        self.__log_duration("initGui", start)
 
+    def __initialize_menus(self):
+        if self.__unloaded:
+            return
+
+        start = time.perf_counter()
+        self.current_layer_changed(self.iface.activeLayer())
+        service_file_watcher().services_changed.connect(self.__services_changed)
+        # Shared by all service combos and delegates, kept up-to-date from now on
+        service_names_model()
         self.build_menus()
+        self.__log_duration("Deferred initialization", start)
 
-    def build_menus(self):
-        _conf_path = conf_path()
-        if not _conf_path.exists():
-            return
+    def __log_duration(self, step: str, start: float):
+        QgsMessageLog.logMessage(
+            "{} took {:.1f} ms".format(step, (time.perf_counter() - start) * 1000),
+            PLUGIN_NAME,
+            Qgis.MessageLevel.Info,
+        )
+
+    def __services_changed(self, diff):
+        # Shortcut actions only depend on the existence of services
+        if diff.added or diff.removed:
+            self.__update_shortcut_states()
 
+    def build_menus(self):
+        """Fill both menus once, shortcut actions are then kept up-to-date incrementally."""
         self.menu.clear()
         self.menu.addAction(self.default_action)
+        self.menu.addAction(self.switch_project_action)
+        self.menu.addAction(self.rewrite_project_files_action)
+        self.menu.addAction(self.scan_project_usage_action)
+
+        self.button_menu = QMenu(self.button)
+        self.button_menu.setToolTipsVisible(True)
+        self.button_menu.addAction(self.default_action)
+        self.button_menu.addAction(self.switch_project_action)
+        self.button_menu.addAction(self.rewrite_project_files_action)
+        self.button_menu.addAction(self.scan_project_usage_action)
+        self.button_menu.addSeparator()
+        self.button.setMenu(self.button_menu)
+
+        self.__shortcut_actions = {}
+        self.__sync_shortcut_actions()
+
+    def __service_name_set(self) -> frozenset:
+        """Service names, from the last parse of the service file when available."""
+        current = cached_snapshot()
+        if current is None:
+            try:
+                current = snapshot()
+            except ServiceFileNotFound:
+                return frozenset()
+
+        return current.name_set
+
+    def __sync_shortcut_actions(self):
+        """Add, remove or update shortcut actions to match the shortcuts model."""
+        if self.button_menu is None:
+            return  # Menus not built yet
+
+        shortcuts = self.shortcuts_model.shortcuts
+        names = {shortcut.name for shortcut in shortcuts}
+
+        # Recycle the actions of removed (or renamed) shortcuts
+        for name in [name for name in self.__shortcut_actions if name not in names]:
+            action = self.__shortcut_actions.pop(name)
+            self.menu.removeAction(action)
+            self.button_menu.removeAction(action)
+            self.__free_shortcut_actions.append(action)
+
+        services = self.__service_name_set()
+        next_action = None  # Keep the model order
+        for shortcut in reversed(shortcuts):
+            action = self.__shortcut_actions.get(shortcut.name)
+            if action is None:
+                action = self.__shortcut_action(shortcut.name)
+                self.menu.insertAction(next_action, action)
+                self.button_menu.insertAction(next_action, action)
+            self.__update_shortcut_action(action, shortcut, services)
+            next_action = action
+
+        self.button.setPopupMode(
+            QToolButton.ToolButtonPopupMode.MenuButtonPopup
+            if shortcuts
+            else QToolButton.ToolButtonPopupMode.DelayedPopup
+        )
 
-        button_menu = QMenu()
-        button_menu.setToolTipsVisible(True)
-        button_menu.addAction(self.default_action)
-
-        if len(self.shortcuts_model.shortcuts):
-            _services = service_names(_conf_path)
-            self.button.setPopupMode(QToolButton.ToolButtonPopupMode.MenuButtonPopup)
-            button_menu.addSeparator()
-            for shortcut in self.shortcuts_model.shortcuts:
-                action = QAction(shortcut.name, self.iface.mainWindow())
-                action.setToolTip(
-                    self.tr("Copy service '{}' to '{}'.").format(
-                        shortcut.service_from, shortcut.service_to
-                    )
-                )
-                action.setEnabled(
-                    _conf_path.exists()
-                    and shortcut.service_from in _services  # noqa W503
-                    and shortcut.service_to in _services  # noqa W503
-                )
-                action.triggered.connect(
-                    lambda _triggered, _shortcut=shortcut: self.copy_service(
-                        _shortcut.service_from, _shortcut.service_to
-                    )
-                )
-                button_menu.addAction(action)
-                self.menu.addAction(action)
+    def __shortcut_action(self, name: str) -> QAction:
+        if self.__free_shortcut_actions:
+            action = self.__free_shortcut_actions.pop()
         else:
-            self.button.setPopupMode(QToolButton.ToolButtonPopupMode.DelayedPopup)
+            action = QAction(self.iface.mainWindow())
+            action.triggered.connect(
+                lambda _triggered, _action=action: self.__shortcut_triggered(_action.data())
+            )
+
+        action.setText(name)
+        action.setData(name)
+        self.__shortcut_actions[name] = action
+        return action
 
-        self.button.setMenu(button_menu)
+    def __update_shortcut_action(self, action: QAction, shortcut, services: frozenset):
+        action.setToolTip(
+            self.tr("Copy service '{}' to '{}'.").format(
+                shortcut.service_from, shortcut.service_to
+            )
+        )
+        action.setEnabled(shortcut.service_from in services and shortcut.service_to in services)
+
+    def __shortcut_triggered(self, name: str):
+        shortcut = self.shortcuts_model.shortcut(name)
+        if shortcut is not None:
+            self.copy_service(shortcut.service_from, shortcut.service_to)
+
+    def __shortcuts_changed(self, top_left, bottom_right, roles=()):
+        services = self.__service_name_set()
+        shortcuts = self.shortcuts_model.shortcuts
+        for row in range(top_left.row(), min(bottom_right.row() + 1, len(shortcuts))):
+            shortcut = shortcuts[row]
+            action = self.__shortcut_actions.get(shortcut.name)
+            if action is None:
+                # Renamed shortcut
+                self.__sync_shortcut_actions()
+                return
+            self.__update_shortcut_action(action, shortcut, services)
+
+    def __update_shortcut_states(self):
+        services = self.__service_name_set()
+        for shortcut in self.shortcuts_model.shortcuts:
+            action = self.__shortcut_actions.get(shortcut.name)
+            if action is not None:
+                self.__update_shortcut_action(action, shortcut, services)
 
     def unload(self):
         self.iface.removeToolBarIcon(self.action)
         self.iface.removePluginDatabaseMenu(self.tr("PG service parser"), self.default_action)
         self.iface.layerTreeView().currentLayerChanged.disconnect(self.current_layer_changed)
+        QgsProject.instance().layersRemoved.disconnect(self.__layers_removed)
+        if self.button_menu is not None:
+            service_file_watcher().services_changed.disconnect(self.__services_changed)
+        self.__unloaded = True
         self.iface.removeCustomActionForLayerType(self.add_service_action)
         self.iface.removeCustomActionForLayerType(self.register_connection_action)
         self.iface.removeCustomActionForLayerType(self.switch_to_service_action)
 
+        if self.__switch_task is not None:
+            self.__switch_task.cancel()
+        if self.__rewrite_task is not None:
+            self.__rewrite_task.cancel()
+        if self.__scan_task is not None:
+            self.__scan_task.cancel()
+
+        self.service_writer.shutdown()
+
+        if self.__dialog is not None:
+            self.__dialog.cleanup()
+            self.__dialog.deleteLater()
+            self.__dialog = None
+
+        # Shared by the dialogs, their watcher and timers would outlive a plugin reload
+        dispose_service_names_model()
+        dispose_service_file_watcher()
+
         self.menu.clear()
         del self.menu
+        for action in list(self.__shortcut_actions.values()) + self.__free_shortcut_actions:
+            action.deleteLater()
+        self.__shortcut_actions = {}
+        self.__free_shortcut_actions = []
         QgsSettingsTree.unregisterPluginTreeNode(PLUGIN_NAME)
 
+    def __service_dialog(self):
+        # Built once and kept alive, refreshed each time it is shown again
+        if self.__dialog is None:
+            # Imported on first use, loading the dialog UI is costly
+            from pg_service_parser.gui.dlg_pg_service import PgServiceDialog
+
+            self.__dialog = PgServiceDialog(self.shortcuts_model, self.iface)
+        else:
+            self.__dialog.refresh()
+
+        return self.__dialog
+
     def run(self):
-        dlg = PgServiceDialog(self.shortcuts_model, self.iface)
-        dlg.exec()
+        self.__service_dialog().exec()
 
     def open(self, service):
-        dlg = PgServiceDialog(self.shortcuts_model, self.iface)
-        # Select the service in the list widget
-        items = dlg.lstServices.findItems(service, Qt.MatchFlag.MatchExactly)
-        if items:
-            dlg.lstServices.setCurrentItem(items[0])
+        dlg = self.__service_dialog()
+        dlg.select_service(service)
         dlg.exec()
 
     def copy_service(self, service_from: str, service_to: str):
         _conf_path = conf_path()
         if _conf_path.exists():
-            copy_service_settings(service_from, service_to, _conf_path)
-            self.iface.messageBar().pushMessage(
-                self.tr("PG service"),
+            # Written in the background, the message is shown once done
+            transaction = ServiceTransaction(_conf_path)
+            transaction.copy(service_from, service_to)
+            self.service_writer.submit(
+                transaction,
                 self.tr("PG service copied from '{}' to '{}'!").format(service_from, service_to),
             )
 
+    def __service_write_finished(self, message: str):
+        if message:
+            self.iface.messageBar().pushMessage(self.tr("PG service"), message)
+
+    def __service_write_failed(self, error: str):
+        self.iface.messageBar().pushWarning(
+            self.tr("PG service"), self.tr("Could not write the service file: {}").format(error)
+        )
+
     def current_layer_changed(self, layer):
         is_postgres = layer is not None and layer.providerType() == "postgres"
         no_service = is_postgres and QgsDataSourceUri(layer.source()).service() == ""
@@ -181,32 +404,38 @@ class PgServiceParserPlugin:
         self.switch_to_service_action.setVisible(no_service)
 
         if is_postgres:
-            register_conn = True
-            uri = QgsDataSourceUri(layer.source())
-            for n, c in (
-                QgsProviderRegistry.instance().providerMetadata("postgres").connections().items()
-            ):
-                curi = QgsDataSourceUri(c.uri())
-
-                if (
-                    curi.service() != uri.service()
-                    or curi.host() != uri.host()
-                    or curi.port() != uri.port()
-                    or curi.database() != uri.database()
-                    or curi.username() != uri.username()
-                    or curi.password() != uri.password()
-                    or curi.sslMode() != uri.sslMode()
-                ):
-                    continue
-
-                register_conn = False
-                break
+            register_conn = self.__layer_needs_connection(layer)
         else:
             register_conn = False
 
         self.register_connection_action.setVisible(register_conn)
 
+    def __layer_needs_connection(self, layer) -> bool:
+        """Whether no stored QGIS connection matches the layer connection (cached per layer)."""
+        index = connection_index()
+        source = layer.source()
+        cached = self.__register_conn_cache.get(layer.id())
+        if cached is not None and cached[0] == source and cached[1] == index.revision:
+            return cached[2]
+
+        if layer.id() not in self.__watched_layer_ids:
+            self.__watched_layer_ids.add(layer.id())
+            layer.dataSourceChanged.connect(
+                lambda _layer_id=layer.id(): self.__register_conn_cache.pop(_layer_id, None)
+            )
+
+        register_conn = not index.has_connection_for_uri(QgsDataSourceUri(source))
+        self.__register_conn_cache[layer.id()] = (source, index.revision, register_conn)
+        return register_conn
+
+    def __layers_removed(self, layer_ids):
+        for layer_id in layer_ids:
+            self.__register_conn_cache.pop(layer_id, None)
+            self.__watched_layer_ids.discard(layer_id)
+
     def add_service(self):
+        from pg_service_parser.gui.dlg_new_name import EnumNewName, get_new_name
+
         uri = QgsDataSourceUri(self.iface.activeLayer().source())
 
         name = get_new_name(EnumNewName.SERVICE, self.iface.mainWindow())
@@ -227,14 +456,20 @@ class PgServiceParserPlugin:
         if uri.sslMode() != QgsDataSourceUri.SslMode.SslPrefer:
             settings["sslmode"] = QgsDataSourceUri.encodeSslMode(uri.sslMode())
 
-        if create_service(name, settings):
-            self.open(name)
-        else:
-            self.iface.messageBar().pushMessage(
+        # Written in the background, the service is opened once done
+        transaction = ServiceTransaction()
+        transaction.create(name, settings, exist_ok=False)
+        self.service_writer.submit(
+            transaction,
+            on_finished=lambda: self.open(name),
+            on_failed=lambda _error: self.iface.messageBar().pushMessage(
                 self.tr("PG service"), self.tr("Could not add service {}").format(name)
-            )
+            ),
+        )
 
     def register_connection(self):
+        from pg_service_parser.gui.dlg_new_name import EnumNewName, get_new_name
+
         QgsDataSourceUri(self.iface.activeLayer().source())
 
         name = get_new_name(EnumNewName.CONNECTION, self.iface.mainWindow())
@@ -255,59 +490,217 @@ class PgServiceParserPlugin:
         if uri.service() != "":
             return
 
-        final_data_source = source
-        final_service = ""
+        matches = match_index().ranked_matches(source)
+        if matches:
+            match = matches[0]
+            layer.setDataSource(match.data_source)
+            self.iface.messageBar().pushSuccess(
+                self.tr("PG service"),
+                self.tr("Connection for layer '{}'  switched to service '{}'!").format(
+                    layer.name(), match.service
+                ),
+            )
+            if not match.exact and len(matches) > 1:
+                self.iface.messageBar().pushInfo(
+                    self.tr("PG service"),
+                    self.tr(
+                        "No service fully matches the layer connection. Other candidates: {}"
+                    ).format(", ".join(m.service for m in matches[1:6])),
+                )
+        else:
+            self.iface.messageBar().pushMessage(
+                self.tr("PG service"),
+                self.tr("No matching service found."),
+            )
+
+    def switch_project_to_services(self):
+        if self.__switch_task is not None:
+            return  # Already running
 
-        for name in service_names():
-            # remove everything that matches the service and keep the shortest uri
+        layer_sources = {}
+        for layer in QgsProject.instance().mapLayers().values():
+            if (
+                layer.providerType() == "postgres"
+                and QgsDataSourceUri(layer.source()).service() == ""  # noqa W503
+            ):
+                layer_sources[layer.id()] = layer.source()
 
-            uri = QgsDataSourceUri(source)
-            config = service_config(name)
+        if not layer_sources:
+            self.iface.messageBar().pushInfo(
+                self.tr("PG service"),
+                self.tr("No PG layer without service found in the project."),
+            )
+            return
 
-            uri.setService(name)
+        task = SwitchLayersToServicesTask(layer_sources, match_index())
+        task.taskCompleted.connect(lambda: self.__switch_task_completed(task))
+        task.taskTerminated.connect(self.__switch_task_terminated)
+        self.__switch_task = task
+        QgsApplication.taskManager().addTask(task)
 
-            if uri.host() != "" and "host" in config and uri.host() == config["host"]:
-                uri.setHost("")
+    def __switch_task_completed(self, task):
+        self.__switch_task = None
+        self.__apply_switched_layers(list(task.switched), len(task.unmatched))
 
-            if uri.port() != "" and "port" in config and uri.port() == config["port"]:
-                uri.setPort("")
+    def __switch_task_terminated(self):
+        self.__switch_task = None
+        self.iface.messageBar().pushInfo(
+            self.tr("PG service"), self.tr("Switching layers to PG services was canceled.")
+        )
 
-            sslmode = QgsDataSourceUri.encodeSslMode(uri.sslMode())
-            if sslmode != "sslprefer" and "sslmode" in config and sslmode == config["sslmode"]:
-                uri.setSslMode(QgsDataSourceUri.SslMode.SslPrefer)
+    def __apply_switched_layers(self, switched, unmatched_count, switched_count=0, services=None):
+        """
+        Set the new data sources on the main thread, one batch per
+        event loop iteration to keep QGIS responsive.
+        """
+        services = services if services is not None else set()
+        for layer_id, source, service, data_source in switched[:SWITCH_LAYERS_BATCH_SIZE]:
+            layer = QgsProject.instance().mapLayer(layer_id)
+            if layer is None or layer.source() != source:
+                unmatched_count += 1  # Removed or modified meanwhile
+                continue
+
+            layer.setDataSource(data_source, layer.name(), layer.providerType())
+            switched_count += 1
+            services.add(service)
+
+        remaining = switched[SWITCH_LAYERS_BATCH_SIZE:]
+        if remaining:
+            QTimer.singleShot(
+                0,
+                lambda: self.__apply_switched_layers(
+                    remaining, unmatched_count, switched_count, services
+                ),
+            )
+            return
 
-            if (
-                uri.database() != ""
-                and "dbname" in config  # noqa W503
-                and uri.database() == config["dbname"]  # noqa W503
-            ):
-                uri.setDatabase("")
+        self.iface.messageBar().pushSuccess(
+            self.tr("PG service"),
+            self.tr(
+                "{} layer(s) switched to {} PG service(s), {} layer(s) left unchanged."
+            ).format(switched_count, len(services), unmatched_count),
+        )
 
-            if uri.username() != "" and "user" in config and uri.username() == config["user"]:
-                uri.setUsername("")
+    def rewrite_project_files(self):
+        if self.__rewrite_task is not None:
+            return  # Already running
 
-            if (
-                uri.password() != ""
-                and "password" in config  # noqa W503
-                and uri.password() == config["password"]  # noqa W503
-            ):
-                uri.setPassword("")
+        if not conf_path().exists():
+            self.iface.messageBar().pushWarning(
+                self.tr("PG service"), self.tr("Config file not found!")
+            )
+            return
 
-            data_source = uri.uri()
-            if len(data_source) - len(name) < len(final_data_source) - len(final_service):
-                final_data_source = data_source
-                final_service = name
+        directory = QFileDialog.getExistingDirectory(
+            self.iface.mainWindow(), self.tr("Select a folder containing QGIS projects")
+        )
+        if not directory:
+            return
 
-        if final_data_source != "":
-            layer.setDataSource(final_data_source)
-            self.iface.messageBar().pushSuccess(
+        # Dry run first, to review the changes
+        self.__start_rewrite_task(
+            RewriteProjectsTask(service_configs(), dry_run=True, directories=[Path(directory)])
+        )
+
+    def __start_rewrite_task(self, task):
+        task.taskCompleted.connect(lambda: self.__rewrite_task_completed(task))
+        task.taskTerminated.connect(self.__rewrite_task_terminated)
+        self.__rewrite_task = task
+        QgsApplication.taskManager().addTask(task)
+
+    def __rewrite_task_completed(self, task):
+        self.__rewrite_task = None
+        if task.dry_run:
+            self.__review_project_rewrites(task)
+            return
+
+        errors = [result for result in task.results if result.error]
+        self.iface.messageBar().pushSuccess(
+            self.tr("PG service"),
+            self.tr("{} project file(s) switched to PG services, {} error(s).").format(
+                sum(1 for result in task.results if result.written), len(errors)
+            ),
+        )
+
+    def __rewrite_task_terminated(self):
+        self.__rewrite_task = None
+        self.iface.messageBar().pushInfo(
+            self.tr("PG service"),
+            self.tr("Switching project files to PG services was canceled."),
+        )
+
+    def __review_project_rewrites(self, task):
+        results = task.results
+        to_rewrite = [result.path for result in results if result.changes and not result.error]
+        if not to_rewrite:
+            self.iface.messageBar().pushInfo(
                 self.tr("PG service"),
-                self.tr("Connection for layer '{}'  switched to service '{}'!").format(
-                    layer.name(), final_service
+                self.tr("No layer to switch to PG services found in {} project(s).").format(
+                    task.project_count
                 ),
             )
-        else:
-            self.iface.messageBar().pushMessage(
-                self.tr("PG service"),
-                self.tr("No matching service found."),
+            return
+
+        message_box = QMessageBox(
+            QMessageBox.Icon.Question,
+            self.tr("Switch project files to PG services"),
+            self.tr("{} layer(s) in {} project file(s) can be switched to PG services.").format(
+                sum(len(result.changes) for result in results), len(to_rewrite)
             )
+            + "\n"
+            + self.tr("Do you want to rewrite these project files?"),
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
+            self.iface.mainWindow(),
+        )
+        skipped_count = sum(len(result.skipped) for result in results)
+        if skipped_count:
+            message_box.setInformativeText(
+                self.tr(
+                    "{} layer(s) only nearly matching a service are left unchanged, "
+                    "see the details."
+                ).format(skipped_count)
+            )
+        message_box.setDetailedText(format_report(results))
+        if message_box.exec() != QMessageBox.StandardButton.Yes:
+            return
+
+        self.__start_rewrite_task(
+            RewriteProjectsTask(task.configs, dry_run=False, paths=to_rewrite)
+        )
+
+    def scan_project_usage(self):
+        if self.__scan_task is not None:
+            return  # Already running
+
+        directory = QFileDialog.getExistingDirectory(
+            self.iface.mainWindow(), self.tr("Select a folder containing QGIS projects")
+        )
+        if not directory:
+            return
+
+        directories = PluginSettings().project_directories.value()
+        if directory not in directories:
+            directories.append(directory)
+            PluginSettings().project_directories.setValue(directories)
+
+        task = ScanProjectUsageTask([Path(d) for d in directories])
+        task.taskCompleted.connect(lambda: self.__scan_task_completed(task))
+        task.taskTerminated.connect(self.__scan_task_terminated)
+        self.__scan_task = task
+        QgsApplication.taskManager().addTask(task)
+
+    def __scan_task_completed(self, task):
+        self.__scan_task = None
+        self.iface.messageBar().pushSuccess(
+            self.tr("PG service"),
+            self.tr("{} new or modified project file(s) scanned for PG service usage.").format(
+                task.scanned_count
+            ),
+        )
+
+    def __scan_task_terminated(self):
+        self.__scan_task = None
+        self.iface.messageBar().pushInfo(
+            self.tr("PG service"),
+            self.tr("Scanning project files for PG service usage was canceled."),
+        )
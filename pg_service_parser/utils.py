@@ -1,18 +1,53 @@
+import hashlib
+import importlib
 import os
 
+from qgis.PyQt.QtCore import QT_VERSION_STR
 from qgis.PyQt.uic import loadUiType
 
+# Python modules generated from the .ui files when packaging the plugin
+COMPILED_UI_PACKAGE = "pg_service_parser.ui.compiled"
+
 
 def get_ui_class(ui_file):
     """Get UI Python class from .ui file.
        Can be filename.ui or subdirectory/filename.ui
+       The class generated at packaging time is used if available and
+       up-to-date, sparing the parsing of the .ui file at runtime.
     :param ui_file: The file of the ui in svir.ui
     :type ui_file: str
     """
     ui_file_path = get_ui_file_path(ui_file)
+    ui_class = _get_compiled_ui_class(ui_file_path)
+    if ui_class is not None:
+        return ui_class
+
     return loadUiType(ui_file_path)[0]
 
 
+def _get_compiled_ui_class(ui_file_path):
+    if not QT_VERSION_STR.startswith("5."):
+        return None  # Generated with pyuic5
+
+    module_name = os.path.splitext(os.path.basename(ui_file_path))[0]
+    try:
+        module = importlib.import_module(f"{COMPILED_UI_PACKAGE}.{module_name}")
+    except ImportError:
+        return None
+
+    # Hash written at packaging time, mtimes not being kept by zip archives
+    with open(ui_file_path, "rb") as f:
+        ui_file_hash = hashlib.sha256(f.read()).hexdigest()
+    if getattr(module, "UI_FILE_HASH", None) != ui_file_hash:
+        return None  # Outdated, the .ui file was edited since
+
+    for name in dir(module):
+        if name.startswith("Ui_"):
+            return getattr(module, name)
+
+    return None
+
+
 def get_ui_file_path(ui_file) -> str:
     os.path.sep.join(ui_file.split("/"))
     ui_file_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "ui", ui_file))
@@ -0,0 +1,35 @@
+"""
+Make the core modules importable without QGIS.
+
+The package __init__ imports the plugin, and so QGIS: the package is
+registered without running it. The vendored pgserviceparser is used once
+copied to pg_service_parser/libs by the packaging, the installed one
+(see requirements.txt) otherwise.
+"""
+
+import importlib
+import sys
+import types
+from pathlib import Path
+
+PACKAGE_DIR = Path(__file__).resolve().parent.parent / "pg_service_parser"
+
+
+def _register_package():
+    if "pg_service_parser" in sys.modules:
+        return
+
+    package = types.ModuleType("pg_service_parser")
+    package.__path__ = [str(PACKAGE_DIR)]
+    sys.modules["pg_service_parser"] = package
+
+    if (PACKAGE_DIR / "libs" / "pgserviceparser").is_dir():
+        return
+
+    libs = importlib.import_module("pg_service_parser.libs")
+    for name in ("pgserviceparser", "pgserviceparser.exceptions"):
+        sys.modules["pg_service_parser.libs." + name] = importlib.import_module(name)
+    libs.pgserviceparser = sys.modules["pg_service_parser.libs.pgserviceparser"]
+
+
+_register_package()
@@ -0,0 +1,87 @@
+import pytest
+
+from pg_service_parser.core.bulk_edit import BulkEdit
+from pg_service_parser.core.service_transaction import ServiceChangedError
+
+SERVICES = """\
+# Production
+[DEFAULT]
+port=5432
+
+[prod-a]
+host=db-prod-03
+dbname=a
+
+[prod-b]
+host=db-prod-03
+port=6432
+
+[test-a]
+host=db-test-01
+"""
+
+
+@pytest.fixture
+def conf_file(tmp_path):
+    path = tmp_path / "pg_service.conf"
+    path.write_text(SERVICES)
+    return path
+
+
+def _changes(changes) -> list[tuple]:
+    return [
+        (change.service_name, change.key, change.old_value, change.new_value) for change in changes
+    ]
+
+
+def test_preview_selects_by_name_and_setting(conf_file):
+    edit = BulkEdit.from_query("prod host=db-prod-03")
+    edit.set("host", "db-prod-04")
+
+    assert _changes(edit.preview(conf_file)) == [
+        ("prod-a", "host", "db-prod-03", "db-prod-04"),
+        ("prod-b", "host", "db-prod-03", "db-prod-04"),
+    ]
+
+
+def test_preview_skips_settings_inherited_from_default(conf_file):
+    edit = BulkEdit("*")
+    edit.remove("port")
+
+    assert _changes(edit.preview(conf_file)) == [("prod-b", "port", "6432", None)]
+
+
+def test_commit_writes_previewed_changes(conf_file):
+    edit = BulkEdit("prod-*")
+    edit.replace("host", "prod-03", "prod-04")
+    edit.remove("port")
+
+    BulkEdit.commit(edit.preview(conf_file), conf_file)
+
+    assert conf_file.read_text() == SERVICES.replace("prod-03", "prod-04").replace(
+        "port=6432\n", ""
+    )
+
+
+def test_commit_ignores_services_selected_since_preview(conf_file):
+    edit = BulkEdit.from_query("host=db-prod-03")
+    edit.set("port", "7432")
+    changes = edit.preview(conf_file)
+    conf_file.write_text(SERVICES + "\n[prod-c]\nhost=db-prod-03\n")
+
+    BulkEdit.commit(changes, conf_file)
+
+    assert "[prod-c]\nhost=db-prod-03\n" in conf_file.read_text()
+    assert conf_file.read_text().count("port=7432") == 2
+
+
+def test_commit_fails_when_a_setting_changed_since_preview(conf_file):
+    edit = BulkEdit("prod-b")
+    edit.set("host", "db-prod-04")
+    changes = edit.preview(conf_file)
+    edited = SERVICES.replace("host=db-prod-03\nport", "host=db-prod-05\nport")
+    conf_file.write_text(edited)
+
+    with pytest.raises(ServiceChangedError):
+        BulkEdit.commit(changes, conf_file)
+    assert conf_file.read_text() == edited
@@ -0,0 +1,59 @@
+from pg_service_parser.core.project_files import (
+    format_report,
+    read_project_xml,
+    rewrite_projects,
+)
+
+CONFIGS = {
+    "prod": {"host": "db-prod", "dbname": "gis", "user": "reader"},
+    "prod-admin": {"host": "db-prod", "dbname": "gis", "user": "admin"},
+}
+
+PROJECT = """\
+<qgis>
+  <projectlayers>
+    <maplayer>
+      <id>roads</id>
+      <layername>Roads</layername>
+      <provider>postgres</provider>
+      <datasource>{roads}</datasource>
+    </maplayer>
+    <maplayer>
+      <id>parcels</id>
+      <layername>Parcels</layername>
+      <provider>postgres</provider>
+      <datasource>{parcels}</datasource>
+    </maplayer>
+  </projectlayers>
+</qgis>
+"""
+ROADS = "dbname='gis' host=db-prod user='reader' table=\"public\".\"roads\" (geom)"
+PARCELS = "dbname='gis' host=db-prod user='editor' table=\"public\".\"parcels\" (geom)"
+
+
+def _project(tmp_path):
+    path = tmp_path / "project.qgs"
+    path.write_text(PROJECT.format(roads=ROADS, parcels=PARCELS))
+    return path
+
+
+def test_exact_matches_are_switched(tmp_path):
+    path = _project(tmp_path)
+
+    (result,) = rewrite_projects([path], CONFIGS, dry_run=False)
+
+    assert result.written
+    assert [(change[0], change[3]) for change in result.changes] == [("Roads", "prod")]
+    xml = read_project_xml(path).decode()
+    assert "service='prod'" in xml
+    assert "user='editor'" in xml
+
+
+def test_near_matches_are_reported_as_skipped(tmp_path):
+    path = _project(tmp_path)
+
+    (result,) = rewrite_projects([path], CONFIGS, dry_run=True)
+
+    assert result.skipped == [("Parcels", PARCELS, ["prod", "prod-admin"])]
+    assert "Parcels skipped, near match only: 'prod', 'prod-admin'" in format_report([result])
+    assert read_project_xml(path).decode() == PROJECT.format(roads=ROADS, parcels=PARCELS)
@@ -0,0 +1,100 @@
+import configparser
+
+import pytest
+
+from pg_service_parser.core.section_index import (
+    build_section_index,
+    index_bytes,
+    parse_section,
+    rewrite_sections,
+    write_section,
+)
+
+SERVICE_FILES = {
+    "plain": "# comment\n[a]\nhost=x\n\n[b]\nhost=y\n",
+    "indented": "[a]\n  host=x\n  port=1\n\n[b]\n\thost=y\n\t  more\n",
+    "indented header": "[a]\nhost=x\n  [b]\nport=1\n",
+    "indented settings": "[a]\n  host=x\n  [b]\n  port=1\n    [continued]\n",
+    "multiline value": "[a]\nhost=x\n  [not a service]\n  more\n[b]\nport=1\n",
+    "multiline value with blank line": "[a]\nhost=x\n\n    [not a service]\n[b]\nport=1\n",
+    "header after header": "[a]\n  [b]\nhost=x\n",
+    "commented headers": "[a]\nhost=x\n# [x]\n; [y]\n[b]\nport=1\n",
+    "default": "[DEFAULT]\nuser=u\n[a]\nhost=x\n[DEFAULT]\nport=1\n[b]\nhost=y\n",
+    "crlf": "[a]\r\nhost=x\r\n  [not a service]\r\n[b]\r\nport=1\r\n",
+    "cr": "[a]\rhost=x\r  [not a service]\r[b]\rport=1\r",
+    "trailing text": "[a] ; comment\nhost=x\n[b]]\nport=1\n",
+}
+
+
+@pytest.mark.parametrize("content", SERVICE_FILES.values(), ids=SERVICE_FILES.keys())
+def test_index_matches_configparser(tmp_path, content):
+    path = tmp_path / "pg_service.conf"
+    path.write_bytes(content.encode())
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path)
+
+    index = build_section_index(path)
+
+    assert index.names == config.sections()
+    for name in config.sections():
+        assert index.read_section(name) == dict(config[name])
+
+
+def _read(path) -> configparser.ConfigParser:
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path)
+    return config
+
+
+def _edited(settings: dict) -> dict:
+    """Settings with a value changed, one removed and multiline one added."""
+    edited = dict(settings)
+    edited.pop(next(iter(edited), None), None)
+    edited["port"] = "6543"
+    edited["options"] = "-c search_path=gis\n-c work_mem=64MB"
+    return edited
+
+
+def _expected(config: configparser.ConfigParser, name: str, settings: dict) -> dict:
+    expected = dict(settings)
+    for key, value in config.defaults().items():
+        expected.setdefault(key, value)
+    return expected
+
+
+@pytest.mark.parametrize("content", SERVICE_FILES.values(), ids=SERVICE_FILES.keys())
+def test_write_section_round_trip(tmp_path, content):
+    path = tmp_path / "pg_service.conf"
+    path.write_bytes(content.encode())
+    original = _read(path)
+
+    for name in original.sections():
+        index = build_section_index(path)
+        settings = _edited(parse_section(index.read_bytes(name).decode(), name))
+        write_section(index, name, settings)
+
+        config = _read(path)
+        assert config.sections() == original.sections()
+        assert dict(config[name]) == _expected(config, name, settings)
+        assert build_section_index(path).names == config.sections()
+
+
+@pytest.mark.parametrize("content", SERVICE_FILES.values(), ids=SERVICE_FILES.keys())
+def test_rewrite_sections_round_trip(tmp_path, content):
+    path = tmp_path / "pg_service.conf"
+    path.write_bytes(content.encode())
+    data = path.read_bytes()
+    index = index_bytes(path, data)
+    original = _read(path)
+    removed, *edited = original.sections()
+
+    changes = {removed: None, "new": {"host": "y"}}
+    for name in edited:
+        changes[name] = _edited(parse_section(index.read_bytes(name).decode(), name))
+    path.write_bytes(rewrite_sections(index, data, changes))
+
+    config = _read(path)
+    assert config.sections() == edited + ["new"]
+    for name in config.sections():
+        assert dict(config[name]) == _expected(config, name, changes[name])
+    assert build_section_index(path).names == config.sections()
@@ -0,0 +1,21 @@
+from pg_service_parser.core.service_cache import cached_snapshot, snapshot
+
+
+def test_configs_of_a_file_changed_since_the_snapshot(tmp_path):
+    path = tmp_path / "pg_service.conf"
+    path.write_text("[a]\nhost=x\n")
+    current = snapshot(path)
+    path.write_text("[a]\nhost=y\n\n[b]\nhost=z\n")
+
+    assert current.configs == {"a": {"host": "y"}, "b": {"host": "z"}}
+    assert cached_snapshot(path).names == ["a", "b"]
+    assert cached_snapshot(path).configs is current.configs
+
+
+def test_configs_of_an_unchanged_file(tmp_path):
+    path = tmp_path / "pg_service.conf"
+    path.write_text("[DEFAULT]\nport=5432\n[a]\nhost=x\n")
+    current = snapshot(path)
+
+    assert current.configs == {"a": {"host": "x", "port": "5432"}}
+    assert cached_snapshot(path) is current
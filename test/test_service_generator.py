@@ -0,0 +1,90 @@
+import configparser
+
+import pytest
+
+from pg_service_parser.core.service_generator import (
+    ServiceGenerator,
+    parse_matrix,
+    parse_values,
+)
+
+
+@pytest.mark.parametrize(
+    "text, values",
+    [
+        ("gis, water", ["gis", "water"]),
+        (" gis,,water ,", ["gis", "water"]),
+        ("node1..3", ["node1", "node2", "node3"]),
+        ("node01..node03", ["node01", "node02", "node03"]),
+        ("5432..5430", ["5432", "5431", "5430"]),
+        ("08..10", ["08", "09", "10"]),
+        ("a, 1..2, b", ["a", "1", "2", "b"]),
+        ("1.2", ["1.2"]),
+    ],
+)
+def test_parse_values(text, values):
+    assert parse_values(text) == values
+
+
+def test_parse_matrix():
+    assert parse_matrix("DBname=gis, water\nport=5432..5433\n\nnot a parameter") == {
+        "dbname": ["gis", "water"],
+        "port": ["5432", "5433"],
+    }
+
+
+def test_services_flag_collisions():
+    generator = ServiceGenerator(
+        {"host": "db", "user": "u"}, "{dbname}", {"dbname": ["gis", "water", "gis", "old"]}
+    )
+
+    services = generator.services({"old"})
+
+    assert [(service.name, service.collision) for service in services] == [
+        ("gis", False),
+        ("water", False),
+        ("old", True),
+    ]
+    assert services[0].settings == {"host": "db", "user": "u", "dbname": "gis"}
+
+
+def test_services_generated_twice_collide():
+    generator = ServiceGenerator({}, "{host}", {"host": ["a", "b"], "port": ["1", "2"]})
+
+    assert [(service.name, service.collision) for service in generator.services(())] == [
+        ("a", False),
+        ("a", True),
+        ("b", False),
+        ("b", True),
+    ]
+
+
+@pytest.mark.parametrize("name_pattern", ["", "{unknown}", "{host", "[{host}]"])
+def test_invalid_name_patterns(name_pattern):
+    with pytest.raises(ValueError):
+        ServiceGenerator({}, name_pattern, {"host": ["a"]}).expand()
+
+
+def test_commit_does_not_write_on_collision(tmp_path):
+    path = tmp_path / "pg_service.conf"
+    path.write_text("[gis-node1]\nhost=node1\n")
+    generator = ServiceGenerator(
+        {"dbname": "gis"}, "gis-{host}", {"host": parse_values("node1..2")}
+    )
+
+    with pytest.raises(configparser.DuplicateSectionError):
+        generator.commit(path)
+    assert path.read_text() == "[gis-node1]\nhost=node1\n"
+
+
+def test_commit_writes_all_services(tmp_path):
+    path = tmp_path / "pg_service.conf"
+    path.write_text("# Template\n[gis]\ndbname=gis\n")
+    generator = ServiceGenerator.from_template("gis", "gis-{host}", {"host": ["n1", "n2"]}, path)
+
+    assert generator.commit(path) == ["gis-n1", "gis-n2"]
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path)
+    assert config.sections() == ["gis", "gis-n1", "gis-n2"]
+    assert dict(config["gis-n2"]) == {"dbname": "gis", "host": "n2"}
+    assert path.read_text().startswith("# Template\n[gis]\ndbname=gis\n")
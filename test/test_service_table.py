@@ -0,0 +1,101 @@
+import pytest
+
+# The settings catalog is translated with Qt
+pytest.importorskip("qgis")
+
+from pg_service_parser.core.service_table import ServiceTable  # noqa: E402
+from pg_service_parser.libs.pgserviceparser.exceptions import ServiceNotFound  # noqa: E402
+
+SERVICES = """\
+[prod-a]
+host=db-prod
+port=5433
+custom=x
+
+[prod-b]
+host=DB-PROD-2
+
+[test-a]
+host=db-test
+port=5432
+"""
+
+
+@pytest.fixture
+def conf_file(tmp_path):
+    path = tmp_path / "pg_service.conf"
+    path.write_text(SERVICES)
+    return path
+
+
+@pytest.fixture
+def table(conf_file):
+    return ServiceTable.from_file(conf_file)
+
+
+def _names(table, rows) -> list[str]:
+    return [table.service_name(row) for row in rows]
+
+
+def test_columns(table):
+    assert table.keys()[:4] == ["host", "port", "dbname", "user"]
+    assert table.keys()[-1] == "custom"
+    assert table.value(table.row("prod-b"), "port") is None
+    assert table.values("port") == ["5433", "5432"]
+
+
+def test_filter_rows(table):
+    rows = range(len(table))
+
+    assert _names(table, table.filter_rows(rows, "host", "db-prod*")) == ["prod-a", "prod-b"]
+    assert _names(table, table.filter_rows(rows, "port", "")) == ["prod-b"]
+
+    table.set_value(table.row("prod-b"), "port", "5433")
+    table.set_value(table.row("prod-a"), "port", None)
+    assert _names(table, table.filter_rows(rows, "port", "5433")) == ["prod-b"]
+    assert _names(table, table.filter_rows(rows, "port", "")) == ["prod-a"]
+
+
+def test_sorted_rows(table):
+    rows = range(len(table))
+
+    assert _names(table, table.sorted_rows(rows, "port")) == ["test-a", "prod-a", "prod-b"]
+    assert _names(table, table.sorted_rows(rows, "host")) == ["prod-a", "prod-b", "test-a"]
+    assert _names(table, table.sorted_rows(rows, None, reverse=True)) == [
+        "test-a",
+        "prod-b",
+        "prod-a",
+    ]
+
+    table.set_value(table.row("prod-b"), "port", "1")
+    assert _names(table, table.sorted_rows(rows, "port")) == ["prod-b", "test-a", "prod-a"]
+
+
+def test_setting_back_the_saved_value_drops_the_edit(table):
+    row = table.row("prod-a")
+
+    assert table.set_value(row, "host", "other")
+    assert not table.set_value(row, "host", "db-prod")
+    assert table.edit_count() == 0
+
+
+def test_save(conf_file, table):
+    table.set_value(table.row("prod-a"), "custom", None)
+    table.set_value(table.row("prod-b"), "port", "5434")
+
+    assert table.save() == ["prod-a", "prod-b"]
+
+    assert table.edit_count() == 0
+    assert table.original_value(table.row("prod-b"), "port") == "5434"
+    assert conf_file.read_text() == SERVICES.replace("custom=x\n", "").replace(
+        "host=DB-PROD-2\n", "host=DB-PROD-2\nport=5434\n"
+    )
+
+
+def test_save_removed_service(conf_file, table):
+    table.set_value(table.row("test-a"), "port", "5435")
+    conf_file.write_text(SERVICES[: SERVICES.index("[test-a]")])
+
+    with pytest.raises(ServiceNotFound):
+        table.save()
+    assert table.edit_count() == 1
@@ -0,0 +1,116 @@
+import configparser
+
+import pytest
+
+from pg_service_parser.core.service_transaction import ServiceChangedError, ServiceTransaction
+from pg_service_parser.libs.pgserviceparser.exceptions import (
+    ServiceFileNotFound,
+    ServiceNotFound,
+)
+
+SERVICES = """\
+# Services of the GIS team
+[DEFAULT]
+port=5432
+
+[prod]
+# Main database
+host=db-prod
+dbname=gis
+
+[test]
+host = db-test
+dbname = gis
+"""
+
+
+@pytest.fixture
+def conf_file(tmp_path):
+    path = tmp_path / "pg_service.conf"
+    path.write_text(SERVICES)
+    return path
+
+
+def _read(path) -> configparser.ConfigParser:
+    config = configparser.ConfigParser(interpolation=None)
+    config.read(path)
+    return config
+
+
+def test_only_changed_sections_are_rewritten(conf_file):
+    with ServiceTransaction(conf_file) as transaction:
+        transaction.edit("test", {"host": "db-test-2"})
+        transaction.create("dev", {"host": "localhost"})
+
+    text = conf_file.read_text()
+    assert text.startswith(SERVICES[: SERVICES.index("[test]")])
+    assert "[test]\nhost=db-test-2\ndbname = gis\n" in text
+    assert dict(_read(conf_file)["dev"]) == {"host": "localhost", "port": "5432"}
+
+
+def test_rename_and_remove(conf_file):
+    with ServiceTransaction(conf_file) as transaction:
+        transaction.rename("prod", "production")
+        transaction.remove("test")
+
+    config = _read(conf_file)
+    assert config.sections() == ["production"]
+    assert dict(config["production"]) == {"host": "db-prod", "dbname": "gis", "port": "5432"}
+    assert conf_file.read_text().startswith("# Services of the GIS team\n[DEFAULT]\nport=5432\n")
+
+
+def test_nothing_is_written_when_an_operation_fails(conf_file):
+    transaction = ServiceTransaction(conf_file)
+    transaction.remove("test")
+    transaction.copy("missing", "copy")
+
+    with pytest.raises(ServiceNotFound):
+        transaction.commit()
+    assert conf_file.read_text() == SERVICES
+
+
+def test_create_existing_service(conf_file):
+    transaction = ServiceTransaction(conf_file)
+    transaction.create("prod", {"host": "other"})
+    transaction.commit()
+    assert conf_file.read_text() == SERVICES
+
+    transaction.create("prod", {"host": "other"}, exist_ok=False)
+    with pytest.raises(configparser.DuplicateSectionError):
+        transaction.commit()
+
+
+def test_edit_checks_expected_values(conf_file):
+    transaction = ServiceTransaction(conf_file)
+    transaction.edit("prod", {"host": "db-prod-2"}, expected={"host": "db-other"})
+
+    with pytest.raises(ServiceChangedError):
+        transaction.commit()
+    assert conf_file.read_text() == SERVICES
+
+
+def test_commit_all_applies_transactions_one_by_one(conf_file):
+    failing = ServiceTransaction(conf_file)
+    failing.rename("test", "staging")
+    failing.copy("missing", "copy")
+    succeeding = ServiceTransaction(conf_file)
+    succeeding.update("prod", {"host": "db-prod-2"})
+
+    errors = ServiceTransaction.commit_all([failing, succeeding])
+
+    assert isinstance(errors[0], ServiceNotFound)
+    assert errors[1] is None
+    assert len(failing) == 2
+    assert len(succeeding) == 0
+    config = _read(conf_file)
+    assert config.sections() == ["prod", "test"]
+    assert config["prod"]["host"] == "db-prod-2"
+    assert "dbname" not in config["prod"]
+
+
+def test_missing_file(tmp_path):
+    transaction = ServiceTransaction(tmp_path / "pg_service.conf")
+    transaction.create("prod", {})
+
+    with pytest.raises(ServiceFileNotFound):
+        transaction.commit()